@@ -0,0 +1,151 @@
+"""
+Load-test /chat end to end with a scripted chat completion service in place
+of Azure OpenAI: real FastAPI app, agent, MCP session pool and server
+processes, against a benchmark dataset.
+
+    python benchmarks/bench_chat.py --data benchmarks/data/alerts-100000 \\
+        --requests 200 --concurrency 8 --latency 0.2
+
+The answer cache is bypassed, and every question goes to the agent, unless
+--answer-cache or --router is given (with --router, questions like
+"Analyze alert-000042" are answered by the intent router). Each case
+also reports the prompt tokens sent to the model per turn (counted with
+tiktoken when it is installed); compare them across commits with
+benchmarks/compare.py --metric input_tokens_per_turn, or across tool
+output settings with --tool-format and --tool-max-tokens.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+import httpx
+from harness import DATASETS_DIR, ROOT, time_async_calls, token_counter, write_report
+
+QUESTIONS = [
+    "Summarize the alerts by severity",
+    "Show me the critical alerts",
+    "Analyze alert-000042",
+    "Give me a resource overview",
+    "Generate a fix for the high CPU alert",
+    "Triage the critical alerts",
+]
+
+
+async def main(args: argparse.Namespace):
+    os.environ["COPILOT_DATA_DIR"] = str(args.data.resolve())
+    if not args.tool_cache:
+        os.environ["TOOL_CACHE_SIZE"] = "0"
+    os.environ["TOOL_OUTPUT_FORMAT"] = args.tool_format
+    if not args.router:
+        os.environ["CHAT_ROUTER_THRESHOLD"] = "inf"
+    if args.tool_max_tokens is not None:
+        os.environ["TOOL_MAX_TOKENS"] = str(args.tool_max_tokens)
+    # The backend resolves the MCP server path from the repo root
+    os.chdir(ROOT)
+    sys.path.insert(0, str(ROOT / "src" / "backend"))
+    from agent import azure_agent  # type: ignore[import-not-found]
+    from app import app  # type: ignore[import-not-found]
+    from fake_llm import ScriptedChatCompletion
+
+    tokenizer, count_tokens = token_counter()
+    service = ScriptedChatCompletion(
+        latency=args.latency,
+        token_delay=args.token_delay,
+        answer_tokens=args.answer_tokens,
+        count_tokens=count_tokens,
+    )
+    azure_agent.runtime.kernel = await azure_agent.get_agent(service)
+
+    headers = {} if args.answer_cache else {"X-Cache-Bypass": "1"}
+    results = []
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=300
+        ) as client:
+
+            async def chat(i: int):
+                question = QUESTIONS[i % len(QUESTIONS)]
+                response = await client.post(
+                    "/chat", json={"message": question}, headers=headers
+                )
+                response.raise_for_status()
+
+            async def stream(i: int):
+                question = QUESTIONS[i % len(QUESTIONS)]
+                async with client.stream(
+                    "POST", "/chat/stream", json={"message": question}, headers=headers
+                ) as response:
+                    response.raise_for_status()
+                    async for _ in response.aiter_lines():
+                        pass
+
+            endpoints = {"chat": chat, "chat_stream": stream}
+            for name in args.endpoint:
+                for concurrency in args.concurrency:
+                    service.prompt_tokens = service.turns = 0
+                    result = await time_async_calls(
+                        f"{name}@{concurrency}",
+                        endpoints[name],
+                        args.requests,
+                        concurrency=concurrency,
+                        warmup=len(QUESTIONS),
+                    )
+                    result["input_tokens_per_turn"] = round(
+                        service.prompt_tokens / max(service.turns, 1), 1
+                    )
+                    results.append(result)
+
+    for result in results:
+        print(f"{result['name']}: {result['input_tokens_per_turn']} input tokens/turn")
+    write_report(
+        "chat",
+        {
+            "data": str(args.data),
+            "requests": args.requests,
+            "latency": args.latency,
+            "token_delay": args.token_delay,
+            "answer_tokens": args.answer_tokens,
+            "answer_cache": args.answer_cache,
+            "tool_cache": args.tool_cache,
+            "router": args.router,
+            "tool_format": args.tool_format,
+            "tool_max_tokens": args.tool_max_tokens,
+            "tokenizer": tokenizer,
+            "mcp_pool_size": azure_agent.mcp_client.pool.size,
+        },
+        results,
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the /chat endpoint.")
+    parser.add_argument("--data", type=Path, default=DATASETS_DIR / "alerts-100000")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument(
+        "--endpoint", nargs="+", choices=["chat", "chat_stream"], default=["chat"]
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Simulated LLM time to first token"
+    )
+    parser.add_argument(
+        "--token-delay", type=float, default=0.0, help="Simulated per-token delay"
+    )
+    parser.add_argument("--answer-tokens", type=int, default=40)
+    parser.add_argument("--answer-cache", action="store_true")
+    parser.add_argument("--tool-cache", action="store_true")
+    parser.add_argument("--router", action="store_true")
+    parser.add_argument("--tool-format", choices=["json", "table"], default="table")
+    parser.add_argument(
+        "--tool-max-tokens", type=int, help="Tool output budget (0: no limit)"
+    )
+    parser.add_argument("--output", type=Path, help="Report path")
+    args = parser.parse_args()
+    if not args.data.is_dir():
+        parser.error(f"{args.data} not found; create it with benchmarks/dataset.py")
+    asyncio.run(main(args))
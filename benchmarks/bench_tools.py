@@ -0,0 +1,219 @@
+"""
+Microbenchmark the MCP tools against a dataset, three ways:
+  logic    the *_logic functions in src/mcp/utils.py, called directly
+  inproc   the tools through an in-memory fastmcp client
+  stdio    the tools through a server subprocess, as the backend runs them
+
+    python benchmarks/bench_tools.py --data benchmarks/data/alerts-100000
+
+The tool result cache is disabled unless --cache is given, so each call
+measures the work itself. get_all_logs and get_all_resource_configs are
+left out by default since their cost is just the size of the dataset.
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import sys
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from harness import (
+    DATASETS_DIR,
+    ROOT,
+    check_result,
+    time_async_calls,
+    time_calls,
+    write_report,
+)
+
+MCP_DIR = ROOT / "src" / "mcp"
+
+Case = Callable[[int], dict[str, Any]]
+
+
+def build_cases(utils: Any) -> dict[str, Case]:
+    """Tool arguments per case, sampled from the loaded dataset."""
+    columns = utils.alert_store.columns()
+    ids = [str(i) for i in columns.ids[: min(len(columns), 1000)]]
+    resources = columns.resource_id.values[:1000] or ["vm-01"]
+    short_names = [r.rsplit("/", 1)[-1] for r in resources]
+    scopes = sorted({"/".join(r.split("/")[:5]) for r in resources})
+    run = time.time_ns()
+
+    def ingest(i: int) -> dict[str, Any]:
+        return {
+            "alerts": [
+                {
+                    "id": f"bench-{run}-{i}-{n}",
+                    "severity": "Warning",
+                    "resource_id": resources[n % len(resources)],
+                    "description": "Benchmark alert",
+                }
+                for n in range(10)
+            ]
+        }
+
+    return {
+        "analyze_alert": lambda i: {"alert_id": ids[i % len(ids)] if ids else "x"},
+        "analyze_alerts": lambda i: {"severity": "Critical", "limit": 20},
+        "get_resource_config": lambda i: {
+            "resource_id": short_names[i % len(short_names)]
+        },
+        "generate_fix": lambda i: {
+            "issue_type": "High CPU",
+            "resource_type": "Virtual Machine",
+            "params": f"vmName=vm-{i % 100:05d}",
+        },
+        "query_logs": lambda i: {
+            "severity": "Critical",
+            "fields": "id,resource_id,created_at",
+            "limit": 50,
+        },
+        "query_logs_sorted": lambda i: {"sort": "resource_id,-created_at", "limit": 50},
+        "query_resource_configs": lambda i: {"location": "eastus", "limit": 50},
+        "summarize_alerts": lambda i: {"group_by": "severity,status", "bucket": "1h"},
+        "list_incidents": lambda i: {"limit": 20},
+        "evaluate_compliance": lambda i: {},
+        "list_violations": lambda i: {"limit": 50},
+        "list_resources": lambda i: {"scope": scopes[i % len(scopes)], "limit": 50},
+        "get_resource_alerts": lambda i: {
+            "resource": short_names[i % len(short_names)]
+        },
+        # Writes to the dataset's segment log, so it runs last
+        "ingest_alerts": ingest,
+    }
+
+
+def tool_name(case: str) -> str:
+    return "query_logs" if case == "query_logs_sorted" else case
+
+
+def bench_logic(utils: Any, cases: dict[str, Case], iterations: int) -> list[dict]:
+    results = []
+    for case, arguments in cases.items():
+        logic = getattr(utils, f"{tool_name(case)}_logic")
+
+        # Defaults bind this iteration's tool and arguments
+        def call(i: int, logic: Any = logic, arguments: Case = arguments) -> str:
+            return check_result(logic(**arguments(i)))
+
+        results.append(
+            time_calls(
+                f"logic:{case}",
+                call,
+                iterations,
+                transport="logic",
+            )
+        )
+    return results
+
+
+async def bench_client(
+    client: Any,
+    transport: str,
+    cases: dict[str, Case],
+    iterations: int,
+    concurrency: int,
+) -> list[dict]:
+    results = []
+    async with client:
+        for case, arguments in cases.items():
+
+            async def call(i: int, case: str = case, arguments: Case = arguments):
+                result = await client.call_tool(tool_name(case), arguments(i))
+                check_result(result.content[0].text)
+
+            results.append(
+                await time_async_calls(
+                    f"{transport}:{case}",
+                    call,
+                    iterations,
+                    concurrency=concurrency,
+                    transport=transport,
+                )
+            )
+    return results
+
+
+async def main(args: argparse.Namespace):
+    data = args.data.resolve()
+    os.environ["COPILOT_DATA_DIR"] = str(data)
+    if not args.cache:
+        os.environ["TOOL_CACHE_SIZE"] = "0"
+    sys.path.insert(0, str(MCP_DIR))
+    import utils  # type: ignore[import-not-found]
+    from fastmcp import Client
+    from fastmcp.client.transports import PythonStdioTransport
+
+    start = time.perf_counter()
+    utils.alert_store.refresh()
+    utils.config_store.refresh()
+    load_seconds = time.perf_counter() - start
+
+    cases = build_cases(utils)
+    if args.only:
+        cases = {k: v for k, v in cases.items() if re.search(args.only, k)}
+
+    results = []
+    if "logic" in args.transport:
+        results += bench_logic(utils, cases, args.iterations)
+    if "inproc" in args.transport:
+        import main as server  # type: ignore[import-not-found]
+
+        results += await bench_client(
+            Client(server.mcp), "inproc", cases, args.iterations, args.concurrency
+        )
+    if "stdio" in args.transport:
+        env = {
+            k: v
+            for k, v in os.environ.items()
+            if k.startswith(("COPILOT_", "TOOL_CACHE_"))
+        }
+        transport = PythonStdioTransport(str(MCP_DIR / "main.py"), env=env)
+        results += await bench_client(
+            Client(transport), "stdio", cases, args.iterations, args.concurrency
+        )
+
+    write_report(
+        "tools",
+        {
+            "data": str(data),
+            "alerts": len(utils.alert_store.columns()),
+            "configs": len(utils.config_store.by_resource_id),
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "cache": args.cache,
+            "load_seconds": round(load_seconds, 3),
+        },
+        results,
+        args.output,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the MCP tools.")
+    parser.add_argument(
+        "--data",
+        type=Path,
+        default=DATASETS_DIR / "alerts-100000",
+        help="Dataset directory (see benchmarks/dataset.py)",
+    )
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument(
+        "--transport",
+        nargs="+",
+        choices=["logic", "inproc", "stdio"],
+        default=["logic", "inproc", "stdio"],
+    )
+    parser.add_argument("--only", help="Regex selecting the cases to run")
+    parser.add_argument("--cache", action="store_true", help="Keep the result cache")
+    parser.add_argument("--output", type=Path, help="Report path")
+    args = parser.parse_args()
+    if not args.data.is_dir():
+        parser.error(f"{args.data} not found; create it with benchmarks/dataset.py")
+    asyncio.run(main(args))
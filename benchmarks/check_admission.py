@@ -0,0 +1,75 @@
+"""
+Offline check of /chat admission control with a stubbed run_agent (no
+model, no MCP server): single-flight coalescing, the 429 with Retry-After
+when the queue is full, and round-robin order across clients.
+
+    python benchmarks/check_admission.py
+"""
+
+import asyncio
+import os
+import sys
+
+import httpx
+from harness import ROOT
+
+
+async def main():
+    os.chdir(ROOT)
+    sys.path.insert(0, str(ROOT / "src" / "backend"))
+    import app as app_module  # type: ignore[import-not-found]
+    from services.admission import AdmissionController  # type: ignore[import-not-found]
+
+    started: list[str] = []
+
+    async def run_agent(query: str, session_id: str | None = None) -> str:
+        started.append(query)
+        await asyncio.sleep(0.2)
+        return f"answer to {query}"
+
+    async def route_query(query: str, session_id: str | None = None) -> None:
+        return None
+
+    app_module.run_agent = run_agent
+    app_module.route_query = route_query
+    transport = httpx.ASGITransport(app=app_module.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://check") as c:
+
+        async def chat(message: str, client: str = "a") -> httpx.Response:
+            return await c.post(
+                "/chat", json={"message": message}, headers={"X-Client-Id": client}
+            )
+
+        # Identical questions in flight share one run
+        app_module.admission = AdmissionController(max_concurrent=1, max_queue=4)
+        responses = await asyncio.gather(*(chat("coalesce me") for _ in range(5)))
+        outcomes = sorted(r.headers["X-Answer-Cache"] for r in responses)
+        assert started == ["coalesce me"], started
+        assert outcomes == ["coalesced"] * 4 + ["miss"], outcomes
+        assert all(r.json()["response"] == "answer to coalesce me" for r in responses)
+
+        # One running, one queued, the third is turned away
+        started.clear()
+        app_module.admission = AdmissionController(max_concurrent=1, max_queue=1)
+        responses = await asyncio.gather(*(chat(f"full {i}") for i in range(3)))
+        statuses = sorted(r.status_code for r in responses)
+        assert statuses == [200, 200, 429], statuses
+        rejected = next(r for r in responses if r.status_code == 429)
+        assert int(rejected.headers["Retry-After"]) >= 1
+        assert rejected.headers["X-Answer-Cache"] == "rejected"
+
+        # Client a queues two more before b queues one: b is served second
+        started.clear()
+        app_module.admission = AdmissionController(max_concurrent=1, max_queue=8)
+        tasks = []
+        for message, client in [("a1", "a"), ("a2", "a"), ("a3", "a"), ("b1", "b")]:
+            tasks.append(asyncio.create_task(chat(message, client)))
+            await asyncio.sleep(0.02)
+        await asyncio.gather(*tasks)
+        assert started == ["a1", "a2", "b1", "a3"], started
+
+    print("admission checks passed")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
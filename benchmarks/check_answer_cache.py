@@ -0,0 +1,59 @@
+"""
+Offline check of the answer cache with a fake embedding function, no Azure
+OpenAI needed:
+
+    python benchmarks/check_answer_cache.py
+
+The fake embedding is a bag of words with digits removed, so questions
+that differ only in an alert ID or resource name embed identically; the
+cache must still keep their answers apart.
+"""
+
+import asyncio
+import re
+import sys
+import zlib
+
+import numpy as np
+from harness import ROOT
+
+sys.path.insert(0, str(ROOT / "src" / "backend"))
+from services.answer_cache import AnswerCache  # type: ignore[import-not-found]
+
+DIMENSIONS = 64
+
+
+async def fake_embed(texts: list[str]) -> np.ndarray:
+    vectors = np.zeros((len(texts), DIMENSIONS), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in re.sub(r"\d+", "", text).split():
+            vectors[row, zlib.crc32(word.encode()) % DIMENSIONS] += 1
+    return vectors
+
+
+async def main():
+    cache = AnswerCache(embed=fake_embed, similarity=0.85)
+    await cache.put("Why is vm-01 slow?", "v1", "vm-01 answer")
+
+    assert await cache.get("why is VM-01 slow", "v1") == ("vm-01 answer", "exact")
+    assert await cache.get("so why is vm-01 slow", "v1") == (
+        "vm-01 answer",
+        "semantic",
+    )
+    # Same words, other resource: close embeddings, different entities
+    assert await cache.get("Why is vm-02 slow?", "v1") is None
+    assert await cache.get("why is vm-01 slow", "v2") is None
+
+    await cache.put("Analyze alert alert-001", "v1", "alert-001 answer")
+    assert await cache.get("please analyze alert alert-001", "v1") == (
+        "alert-001 answer",
+        "semantic",
+    )
+    assert await cache.get("please analyze alert alert-002", "v1") is None
+
+    print(cache.stats())
+    print("answer cache checks passed")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+"""
+Offline check of the tracing spans and the /metrics endpoint: runs one
+/chat request through the real app, agent and MCP server with the scripted
+chat completion service, captures spans with an in-memory exporter and
+scrapes /metrics.
+
+    python benchmarks/check_telemetry.py
+"""
+
+import asyncio
+import importlib
+import os
+import sys
+
+import httpx
+from harness import ROOT
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+EXPECTED_SPANS = {"chat", "agent.invoke", "mcp.call_tool"}
+EXPECTED_METRICS = (
+    "copilot_chat_duration_seconds_count",
+    "copilot_tool_duration_seconds_count",
+    "copilot_llm_tokens_total",
+    "copilot_cache_requests",
+    "copilot_mcp_pool_sessions",
+)
+
+
+async def main():
+    os.chdir(ROOT)
+    sys.path.insert(0, str(ROOT / "src" / "backend"))
+    import app as app_module  # type: ignore[import-not-found]
+    from agent import azure_agent  # type: ignore[import-not-found]
+    from fake_llm import ScriptedChatCompletion
+    from services.telemetry import setup_tracing  # type: ignore[import-not-found]
+
+    # Importing the app again must not register its collectors twice
+    app_module = importlib.reload(app_module)
+    exporter = InMemorySpanExporter()
+    setup_tracing(exporter)
+    azure_agent.runtime.kernel = await azure_agent.get_agent(ScriptedChatCompletion())
+
+    app = app_module.app
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://check") as c:
+            response = await c.post(
+                "/chat",
+                json={"message": "Show me the critical alerts"},
+                headers={"X-Cache-Bypass": "1"},
+            )
+            response.raise_for_status()
+            metrics = (await c.get("/metrics")).text
+
+    spans = {span.name for span in exporter.get_finished_spans()}
+    assert EXPECTED_SPANS <= spans, f"missing spans: {EXPECTED_SPANS - spans}"
+    for name in EXPECTED_METRICS:
+        assert name in metrics, f"missing metric: {name}"
+    print(f"{len(spans)} span names, e.g. {sorted(spans)[:6]}")
+    print("telemetry checks passed")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+"""
+Offline check of MCP tool answers that are easy to get wrong, against the
+repository's data/ directory:
+
+    python benchmarks/check_tools.py
+
+Covers joins that match no alerts, which must still return their header,
+alerts that ingest must reject rather than store, and issue and resource
+types that must resolve to the same fix template as before the registry.
+"""
+
+import json
+import sys
+
+from harness import ROOT
+
+sys.path.insert(0, str(ROOT / "src" / "mcp"))
+import utils  # type: ignore[import-not-found]
+from ingest import normalize_alert  # type: ignore[import-not-found]
+
+NO_ALERTS = [
+    {"resource": "vm-01", "severity": "Informational"},
+    {"resource": "vm-01", "since": "2030-01-01"},
+    {"resource": "rg-1"},
+    {"resource": "no-such-resource"},
+]
+
+ALERT = {
+    "id": "check-1",
+    "severity": "Warning",
+    "resource_id": "vm-01",
+    "description": "Check alert",
+}
+INVALID_ALERTS = [
+    {**ALERT, "created_at": "11/24/2025 08:00"},
+    {**ALERT, "created_at": "yesterday"},
+    {**ALERT, "properties": ["not", "an", "object"]},
+]
+
+# (issue type, resource type) -> template name
+FIX_TEMPLATES = {
+    ("High CPU", "vmss"): "vm_resize",
+    ("High CPU", "myvm01"): "vm_resize",
+    ("High CPU", "Virtual Machine"): "vm_resize",
+    ("HighCPU", "AzureVM"): "vm_resize",
+    ("highcpu", "vm"): "vm_resize",
+    ("DTU limit", "SQLDatabase"): "sql_scale",
+    ("mysqlerror", "web"): "sql_scale",
+    ("Disk full", "Storage"): None,
+}
+
+
+def main():
+    for arguments in NO_ALERTS:
+        result = utils.get_resource_alerts_logic(**arguments)
+        assert not result.startswith("Error"), (arguments, result)
+        header = json.loads(result)
+        assert header["with_alerts"] == 0 and header["alerts"] == 0, result
+
+    result = utils.get_resource_alerts_logic("vm-01")
+    header = json.loads(result.splitlines()[0])
+    assert header["with_alerts"] == 1 and header["alerts"] > 0, result
+
+    for alert in INVALID_ALERTS:
+        try:
+            normalize_alert(alert)
+        except ValueError:
+            continue
+        raise AssertionError(f"accepted invalid alert: {alert}")
+    created_at = normalize_alert(ALERT)["created_at"]
+    assert created_at.endswith("+00:00"), created_at
+    assert normalize_alert({**ALERT, "created_at": "2025-11-24T08:00:00Z"})
+
+    for (issue_type, resource_type), expected in FIX_TEMPLATES.items():
+        template = utils.template_registry.match(issue_type, resource_type)
+        name = template.name if template else None
+        assert name == expected, (issue_type, resource_type, name)
+
+    print("tool checks passed")
+
+
+if __name__ == "__main__":
+    main()
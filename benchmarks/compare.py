@@ -0,0 +1,52 @@
+"""
+Compare two benchmark reports case by case.
+
+    python benchmarks/compare.py base.json head.json --threshold 0.1
+
+Exits with status 1 when any case's p95 latency grew by more than the
+threshold (a fraction of the base value).
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def compare(base: dict, head: dict, metric: str, threshold: float) -> list[str]:
+    """Print a comparison table and return the names of regressed cases."""
+    base_results = {r["name"]: r for r in base["results"]}
+    regressions = []
+    width = max([len(r["name"]) for r in head["results"]] + [4])
+    print(f"base {base.get('commit', '')[:8]}  head {head.get('commit', '')[:8]}")
+    print(f"{'case':<{width}}  {'base':>10} {'head':>10} {'change':>8}")
+    for result in head["results"]:
+        name = result["name"]
+        if name not in base_results:
+            print(f"{name:<{width}}  {'-':>10} {result[metric]:>10.2f}      new")
+            continue
+        before, after = base_results[name][metric], result[metric]
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSED"
+        print(f"{name:<{width}}  {before:>10.2f} {after:>10.2f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports.")
+    parser.add_argument("base", type=Path)
+    parser.add_argument("head", type=Path)
+    parser.add_argument("--metric", default="p95_ms")
+    parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    regressions = compare(
+        json.loads(args.base.read_text()),
+        json.loads(args.head.read_text()),
+        args.metric,
+        args.threshold,
+    )
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,76 @@
+"""
+Build a synthetic data directory (alerts, configs and templates) of any
+size for the benchmarks, with scripts/generate_logs.py and
+scripts/generate_configs.py. Point the MCP server and the backend at it
+with COPILOT_DATA_DIR.
+
+    python benchmarks/dataset.py --alerts 1000000 --resources 5000
+"""
+
+import argparse
+import os
+import shutil
+import sys
+from pathlib import Path
+
+from harness import DATASETS_DIR, ROOT
+
+sys.path.insert(0, str(ROOT / "scripts"))
+from generate_configs import generate_configs
+from generate_logs import generate_logs
+
+
+def build_dataset(
+    output: Path,
+    alerts: int,
+    resources: int,
+    resource_types: int | None = None,
+    hours: float = 168.0,
+    output_format: str = "columnar",
+    seed: int = 0,
+    workers: int = 1,
+):
+    output.mkdir(parents=True, exist_ok=True)
+    generate_logs(
+        alerts,
+        output_format,
+        resources=resources,
+        resource_types=resource_types,
+        hours=hours,
+        seed=seed,
+        workers=workers,
+        data_dir=output,
+    )
+    generate_configs(resources, resource_types, seed, output)
+    shutil.copytree(
+        ROOT / "data" / "templates", output / "templates", dirs_exist_ok=True
+    )
+    shutil.copy(ROOT / "data" / "policies.json", output / "policies.json")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a benchmark dataset.")
+    parser.add_argument("--alerts", type=int, default=100_000)
+    parser.add_argument("--resources", type=int, default=1000)
+    parser.add_argument("--resource-types", type=int)
+    parser.add_argument("--hours", type=float, default=168.0)
+    parser.add_argument(
+        "--format", choices=["json", "jsonl", "columnar"], default="columnar"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--output", type=Path, help="Defaults to benchmarks/data/alerts-<count>"
+    )
+    args = parser.parse_args()
+
+    build_dataset(
+        args.output or DATASETS_DIR / f"alerts-{args.alerts}",
+        args.alerts,
+        args.resources,
+        args.resource_types,
+        args.hours,
+        args.format,
+        args.seed,
+        args.workers,
+    )
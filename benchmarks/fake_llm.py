@@ -0,0 +1,184 @@
+import asyncio
+import json
+import re
+from collections.abc import AsyncGenerator, Callable
+from typing import Any, ClassVar
+
+from semantic_kernel.connectors.ai.chat_completion_client_base import (
+    ChatCompletionClientBase,
+)
+from semantic_kernel.connectors.ai.completion_usage import CompletionUsage
+from semantic_kernel.connectors.ai.prompt_execution_settings import (
+    PromptExecutionSettings,
+)
+from semantic_kernel.contents import (
+    AuthorRole,
+    ChatHistory,
+    ChatMessageContent,
+    FunctionCallContent,
+    FunctionResultContent,
+    StreamingChatMessageContent,
+    StreamingTextContent,
+)
+
+# First matching pattern picks the tool calls made for a question
+DEFAULT_SCRIPT: list[tuple[str, list[tuple[str, dict[str, Any]]]]] = [
+    (r"complian|violat", [("evaluate_compliance", {})]),
+    (r"incident|going on", [("list_incidents", {"min_count": 2})]),
+    (r"summar|count|trend|noisiest", [("summarize_alerts", {"group_by": "severity"})]),
+    (r"alert-\d+", [("analyze_alert", {"alert_id": "{match}"})]),
+    (
+        r"fix|remediat",
+        [
+            (
+                "generate_fix",
+                {"issue_type": "High CPU", "resource_type": "Virtual Machine"},
+            )
+        ],
+    ),
+    (r"config|resource", [("query_resource_configs", {"limit": 20})]),
+    (
+        r"triage|critical",
+        [
+            ("analyze_alerts", {"severity": "Critical", "limit": 20}),
+            ("summarize_alerts", {"group_by": "resource", "top_n": 5}),
+        ],
+    ),
+    (r"", [("query_logs", {"severity": "Critical", "limit": 20})]),
+]
+
+
+class ScriptedChatCompletion(ChatCompletionClientBase):
+    """
+    Stand-in for Azure OpenAI that answers without a network call.
+    The first request of a turn asks for the tool calls the script maps
+    the question to; once their results are in the history it streams a
+    fixed-length answer. Latency is simulated with `latency` (time to the
+    first token) and `token_delay` (per streamed token). Prompt tokens,
+    tool calls and results included, are counted with `count_tokens`.
+    """
+
+    SUPPORTS_FUNCTION_CALLING: ClassVar[bool] = True
+
+    latency: float = 0.0
+    token_delay: float = 0.0
+    answer_tokens: int = 40
+    plugin_name: str = "AzureOps"
+    script: list[tuple[str, list[tuple[str, dict[str, Any]]]]] = DEFAULT_SCRIPT
+    count_tokens: Callable[[str], int] = lambda text: len(text) // 4 + 1
+    # Prompt tokens sent and turns started (requests answering a question)
+    prompt_tokens: int = 0
+    turns: int = 0
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(service_id="default", ai_model_id="scripted", **kwargs)
+
+    def _plan(self, chat_history: ChatHistory) -> list[FunctionCallContent] | str:
+        messages = chat_history.messages
+        last_user = max(
+            (i for i, m in enumerate(messages) if m.role == AuthorRole.USER), default=-1
+        )
+        turn = messages[last_user + 1 :]
+        if any(m.role == AuthorRole.TOOL for m in turn):
+            results = sum(1 for m in turn if m.role == AuthorRole.TOOL)
+            words = [f"Found {results} tool result(s)."]
+            words += ["detail"] * max(self.answer_tokens - len(words[0].split()), 0)
+            return " ".join(words)
+
+        question = str(messages[last_user].content) if last_user >= 0 else ""
+        for pattern, calls in self.script:
+            match = re.search(pattern, question, re.IGNORECASE)
+            if match:
+                return [
+                    FunctionCallContent(
+                        id=f"call_{len(messages)}_{n}",
+                        name=f"{self.plugin_name}-{function}",
+                        arguments=json.dumps(
+                            {
+                                k: v.replace("{match}", match.group(0))
+                                if isinstance(v, str)
+                                else v
+                                for k, v in arguments.items()
+                            }
+                        ),
+                    )
+                    for n, (function, arguments) in enumerate(calls)
+                ]
+        return ""
+
+    def _usage(self, chat_history: ChatHistory, completion: int) -> dict[str, Any]:
+        parts = []
+        for message in chat_history.messages:
+            parts.append(str(message.content or ""))
+            for item in message.items:
+                if isinstance(item, FunctionCallContent):
+                    parts.append(f"{item.name}{item.arguments}")
+                elif isinstance(item, FunctionResultContent):
+                    parts.append(str(item.result))
+        prompt = self.count_tokens("\n".join(parts))
+        self.prompt_tokens += prompt
+        if chat_history.messages and chat_history.messages[-1].role == AuthorRole.USER:
+            self.turns += 1
+        return {
+            "usage": CompletionUsage(prompt_tokens=prompt, completion_tokens=completion)
+        }
+
+    async def _inner_get_chat_message_contents(
+        self, chat_history: ChatHistory, settings: PromptExecutionSettings
+    ) -> list[ChatMessageContent]:
+        plan = self._plan(chat_history)
+        if isinstance(plan, str):
+            await asyncio.sleep(self.latency + self.token_delay * len(plan.split()))
+            return [
+                ChatMessageContent(
+                    role=AuthorRole.ASSISTANT,
+                    content=plan,
+                    metadata=self._usage(chat_history, len(plan.split())),
+                )
+            ]
+        await asyncio.sleep(self.latency)
+        return [
+            ChatMessageContent(
+                role=AuthorRole.ASSISTANT,
+                items=plan,  # type: ignore[arg-type]
+                metadata=self._usage(chat_history, 10 * len(plan)),
+            )
+        ]
+
+    async def _inner_get_streaming_chat_message_contents(
+        self,
+        chat_history: ChatHistory,
+        settings: PromptExecutionSettings,
+        function_invoke_attempt: int = 0,
+    ) -> AsyncGenerator[list[StreamingChatMessageContent], Any]:
+        plan = self._plan(chat_history)
+        await asyncio.sleep(self.latency)
+        if not isinstance(plan, str):
+            yield [
+                StreamingChatMessageContent(
+                    role=AuthorRole.ASSISTANT,
+                    choice_index=0,
+                    items=plan,  # type: ignore[arg-type]
+                    metadata=self._usage(chat_history, 10 * len(plan)),
+                    function_invoke_attempt=function_invoke_attempt,
+                )
+            ]
+            return
+        words = plan.split()
+        for n, word in enumerate(words):
+            if n:
+                await asyncio.sleep(self.token_delay)
+            last = n == len(words) - 1
+            yield [
+                StreamingChatMessageContent(
+                    role=AuthorRole.ASSISTANT,
+                    choice_index=0,
+                    items=[
+                        StreamingTextContent(
+                            choice_index=0, text=word if n == 0 else f" {word}"
+                        )
+                    ],
+                    metadata=self._usage(chat_history, len(words)) if last else {},
+                    function_invoke_attempt=function_invoke_attempt,
+                )
+            ]
@@ -0,0 +1,182 @@
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+DATASETS_DIR = ROOT / "benchmarks" / "data"
+
+
+def token_counter() -> tuple[str, Callable[[str], int]]:
+    """
+    A token counter for prompts: tiktoken's o200k_base encoding (used by
+    GPT-4o models) when it is installed, else four characters per token.
+    Returns the counter's name and the counter.
+    """
+    try:
+        import tiktoken  # type: ignore[import-not-found]
+
+        encoding = tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return "estimate", lambda text: len(text) // 4 + 1
+    return "o200k_base", lambda text: len(encoding.encode(text, disallowed_special=()))
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process, in MB."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KB elsewhere
+    return peak / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def summarize(name: str, durations: list[float], wall: float, **extra) -> dict:
+    """Latency percentiles (ms), throughput and RSS for one benchmark case."""
+    ms = np.asarray(durations, dtype=np.float64) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99]) if len(ms) else (0, 0, 0)
+    return {
+        "name": name,
+        "count": len(ms),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "mean_ms": round(float(ms.mean()), 3) if len(ms) else 0.0,
+        "max_ms": round(float(ms.max()), 3) if len(ms) else 0.0,
+        "throughput_per_s": round(len(ms) / wall, 2) if wall else 0.0,
+        "rss_mb": round(rss_mb(), 1),
+        **extra,
+    }
+
+
+def time_calls(
+    name: str, fn: Callable[[int], Any], iterations: int, warmup: int = 1, **extra
+) -> dict:
+    """Call fn(i) sequentially and summarize the per-call latencies."""
+    for i in range(warmup):
+        fn(-1 - i)
+    durations = []
+    errors = 0
+    start = time.perf_counter()
+    for i in range(iterations):
+        t = time.perf_counter()
+        try:
+            fn(i)
+        except Exception:
+            errors += 1
+        durations.append(time.perf_counter() - t)
+    wall = time.perf_counter() - start
+    return summarize(name, durations, wall, errors=errors, **extra)
+
+
+async def time_async_calls(
+    name: str,
+    fn: Callable[[int], Awaitable[Any]],
+    iterations: int,
+    concurrency: int = 1,
+    warmup: int = 1,
+    **extra,
+) -> dict:
+    """Await fn(i) from `concurrency` workers and summarize the latencies."""
+    for i in range(warmup):
+        await fn(-1 - i)
+    durations: list[float] = []
+    errors = 0
+    counter = iter(range(iterations))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            t = time.perf_counter()
+            try:
+                await fn(i)
+            except Exception:
+                errors += 1
+            durations.append(time.perf_counter() - t)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - start
+    return summarize(
+        name, durations, wall, concurrency=concurrency, errors=errors, **extra
+    )
+
+
+def check_result(text: str) -> str:
+    """Raise on the "Error: ..." strings tools return, so they count as errors."""
+    if text.startswith("Error"):
+        raise RuntimeError(text)
+    return text
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def write_report(
+    benchmark: str,
+    params: dict[str, Any],
+    results: list[dict],
+    output: Path | None = None,
+) -> Path:
+    """
+    Print a summary table and write the JSON report.
+    Reports are named after the benchmark, commit and time unless an
+    output path is given, so runs on different commits can be compared
+    with benchmarks/compare.py.
+    """
+    commit = git_commit()
+    now = datetime.now(timezone.utc)
+    report = {
+        "benchmark": benchmark,
+        "commit": commit,
+        "created_at": now.isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "params": params,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "results": results,
+    }
+    if output is None:
+        stamp = now.strftime("%Y%m%dT%H%M%S")
+        output = RESULTS_DIR / f"{benchmark}-{(commit or 'nogit')[:8]}-{stamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+
+    width = max([len(r["name"]) for r in results] + [4])
+    print(f"{'case':<{width}}  {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'ops/s':>9}")
+    for r in results:
+        print(
+            f"{r['name']:<{width}}  {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+            f"{r['p99_ms']:>9.2f} {r['throughput_per_s']:>9.1f}"
+        )
+    print(f"Report written to {output}")
+    return output
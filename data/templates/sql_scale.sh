@@ -1,9 +1,9 @@
 #!/bin/bash
 # Scale SQL Database
-RESOURCE_GROUP=$1
-SERVER_NAME=$2
-DB_NAME=$3
-NEW_SKU=$4
+RESOURCE_GROUP={{resource_group|$1}}
+SERVER_NAME={{server_name|$2}}
+DB_NAME={{db_name|$3}}
+NEW_SKU={{new_sku|$4}}
 
 az sql db update \
     --resource-group $RESOURCE_GROUP \
@@ -0,0 +1,106 @@
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src" / "mcp"))
+from columns import AlertColumns, load_columns, write_columns
+from ingest import SegmentReader, segment_lock, segment_paths
+
+# The directory the MCP server reads (see src/mcp/utils.py)
+DATA_DIR = Path(os.getenv("COPILOT_DATA_DIR", Path(__file__).parent.parent / "data"))
+LOGS_FILE = "logs.json"
+LOGS_COLUMNS_DIR = "logs.columns"
+ALERT_SEGMENTS_DIR = "alerts"
+
+
+def json_to_columns(data_dir: Path = DATA_DIR):
+    source, target = data_dir / LOGS_FILE, data_dir / LOGS_COLUMNS_DIR
+    with open(source, "r") as f:
+        logs = json.load(f)
+    write_columns(AlertColumns.from_records(logs), target)
+    print(f"Converted {len(logs)} logs from {source} to {target}")
+
+
+def columns_to_json(data_dir: Path = DATA_DIR):
+    source, target = data_dir / LOGS_COLUMNS_DIR, data_dir / LOGS_FILE
+    columns, _ = load_columns(source)
+    logs = [columns.record(row) for row in range(len(columns))]
+    with open(target, "w") as f:
+        json.dump(logs, f, indent=2)
+    print(f"Converted {len(logs)} logs from {source} to {target}")
+
+
+def compact(data_dir: Path = DATA_DIR):
+    """
+    Fold the appended alert segments into the columnar directory (or
+    logs.json when there is no columnar copy) and delete them.
+    """
+    segments_dir = data_dir / ALERT_SEGMENTS_DIR
+    columns_dir, logs_file = data_dir / LOGS_COLUMNS_DIR, data_dir / LOGS_FILE
+    with segment_lock(segments_dir):
+        paths = segment_paths(segments_dir)
+        appended = SegmentReader(segments_dir).read_new()
+
+        if columns_dir.exists():
+            columns, _ = load_columns(columns_dir)
+            known = set(columns.ids.tolist())
+            new = [
+                a
+                for a in {a["id"]: a for a in appended}.values()
+                if a["id"] not in known
+            ]
+            if new:
+                write_columns(
+                    columns.concat(AlertColumns.from_records(new)), columns_dir
+                )
+        else:
+            logs = []
+            if logs_file.exists():
+                with open(logs_file, "r") as f:
+                    logs = json.load(f)
+            known = {log["id"] for log in logs}
+            new = [
+                a
+                for a in {a["id"]: a for a in appended}.values()
+                if a["id"] not in known
+            ]
+            if new:
+                with open(logs_file, "w") as f:
+                    json.dump(logs + new, f, indent=2)
+
+        # Readers re-index from the rewritten base before the segments go away
+        for path in paths:
+            path.unlink()
+    print(f"Compacted {len(new)} appended logs from {len(paths)} segments")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert the alert log between JSON and the columnar format."
+    )
+    parser.add_argument(
+        "--to-json",
+        action="store_true",
+        help="Convert the columnar directory back to logs.json",
+    )
+    parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Fold alerts appended via ingestion into the log and clear the segments",
+    )
+    parser.add_argument(
+        "--data-dir",
+        type=Path,
+        default=DATA_DIR,
+        help="Data directory (default: $COPILOT_DATA_DIR or data/)",
+    )
+    args = parser.parse_args()
+
+    if args.compact:
+        compact(args.data_dir)
+    elif args.to_json:
+        columns_to_json(args.data_dir)
+    else:
+        json_to_columns(args.data_dir)
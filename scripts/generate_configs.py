@@ -1,6 +1,11 @@
+import argparse
 import json
+import os
 from pathlib import Path
 
+import numpy as np
+from synthetic import resource_config, resource_kinds
+
 # Ensure data directory exists
 DATA_DIR = Path(__file__).parent.parent / "data"
 DATA_DIR.mkdir(exist_ok=True)
@@ -41,12 +46,53 @@ CONFIGS = [
 ]
 
 
-def generate_configs():
-    with open(CONFIGS_FILE, "w") as f:
-        json.dump(CONFIGS, f, indent=2)
+def generate_configs(
+    resources: int | None = None,
+    resource_types: int | None = None,
+    seed: int = 0,
+    data_dir: Path = DATA_DIR,
+):
+    """
+    Write the three demo configs, or with `resources` a synthetic config for
+    each resource generate_logs.py can raise alerts on (given the same
+    resource and type counts). Synthetic configs are streamed to the file.
+    """
+    path = data_dir / "configs.json"
+    if resources is None:
+        with open(path, "w") as f:
+            json.dump(CONFIGS, f, indent=2)
+        print(f"Generated {len(CONFIGS)} configs in {path}")
+        return
 
-    print(f"Generated {len(CONFIGS)} configs in {CONFIGS_FILE}")
+    kinds = resource_kinds(resource_types)
+    rng = np.random.default_rng(seed)
+    tmp = path.with_name(f"{path.name}.tmp")
+    with open(tmp, "w") as f:
+        f.write("[\n")
+        for index in range(resources):
+            if index:
+                f.write(",\n")
+            f.write(json.dumps(resource_config(index, kinds, rng)))
+        f.write("\n]\n")
+    os.replace(tmp, path)
+    print(
+        f"Generated {resources} configs of {min(resources, len(kinds))} "
+        f"resource types in {path}"
+    )
 
 
 if __name__ == "__main__":
-    generate_configs()
+    parser = argparse.ArgumentParser(description="Generate resource configs.")
+    parser.add_argument(
+        "--resources", type=int, help="Synthetic configs instead of the demo ones"
+    )
+    parser.add_argument(
+        "--resource-types",
+        type=int,
+        help="Pad the built-in resource types with synthetic ones up to this many",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    args = parser.parse_args()
+
+    generate_configs(args.resources, args.resource_types, args.seed, args.data_dir)
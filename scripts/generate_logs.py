@@ -1,58 +1,393 @@
+import argparse
 import json
-import random
-from datetime import datetime, timedelta
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
 from pathlib import Path
-from typing import Any, Dict, List
+
+import numpy as np
+from synthetic import GROUP_SIZE, alert_catalog, resource_id, resource_kinds
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src" / "mcp"))
+from columns import (
+    allocate_columns,
+    open_allocated,
+    publish_columns,
+    to_epoch,
+)
+from ingest import SEGMENT_PREFIX, SEGMENT_SUFFIX
 
 # Ensure data directory exists
 DATA_DIR = Path(__file__).parent.parent / "data"
 DATA_DIR.mkdir(exist_ok=True)
 
-LOGS_FILE = DATA_DIR / "logs.json"
+# Rows generated (and held in memory) per chunk; chunks are the unit of work
+CHUNK_SIZE = 1_000_000
+STATUSES = ["Acknowledged", "Closed", "New"]
+# Alerts this old or older are mostly closed
+CLOSE_AFTER_US = 24 * 3600 * 1_000_000
+
+
+@dataclass
+class Plan:
+    """
+    Everything the chunks share, derived from the seed alone. Chunk `i`
+    is generated from (seed, i), so the output does not depend on how many
+    processes produce it.
+    """
+
+    count: int
+    seed: int
+    chunk_size: int
+    start_us: int
+    end_us: int
+    resources: int
+    # Zipf-skewed cumulative weights over a shuffled resource order
+    resource_order: np.ndarray
+    resource_cdf: np.ndarray
+    # Incidents: start time, mean decay (us), first resource, cumulative size
+    incident_start: np.ndarray
+    incident_decay: np.ndarray
+    incident_first: np.ndarray
+    incident_cdf: np.ndarray
+    storm_fraction: float
+    # Per resource kind: description codes and how many there are
+    kind_alerts: np.ndarray
+    kind_alert_counts: np.ndarray
+    description_severity: np.ndarray
+    critical: int
+    descriptions: list[str]
+    severities: list[str]
+    resource_ids: list[str]
+
+    @property
+    def chunks(self) -> int:
+        return -(-self.count // self.chunk_size)
+
+    @property
+    def id_width(self) -> int:
+        return max(3, len(str(self.count)))
+
+
+def make_plan(
+    count: int,
+    resources: int,
+    resource_types: int | None,
+    hours: float,
+    seed: int,
+    storm_fraction: float,
+    zipf: float,
+    chunk_size: int = CHUNK_SIZE,
+    end: str | None = None,
+) -> Plan:
+    rng = np.random.default_rng([seed, 2**32 - 1])
+    kinds = resource_kinds(resource_types)
+    descriptions, severities, description_severity, table, counts = alert_catalog(kinds)
+    if end is None:
+        end_us = int(np.datetime64("now", "us").astype(np.int64))
+    else:
+        end_us = int(to_epoch([end])[0])
+    start_us = end_us - int(hours * 3600 * 1_000_000)
+
+    # A few resources raise most of the alerts
+    weights = 1.0 / np.arange(1, resources + 1) ** zipf
+    resource_cdf = np.cumsum(weights) / weights.sum()
+    resource_order = rng.permutation(resources)
+
+    # Incidents hit one resource group; sizes are heavy-tailed, so a few
+    # of them turn into alert storms
+    incidents = max(1, min(count // 500, 100_000))
+    sizes = rng.pareto(1.2, incidents) + 1
+    center = resource_order[np.searchsorted(resource_cdf, rng.random(incidents))]
+    return Plan(
+        count=count,
+        seed=seed,
+        chunk_size=chunk_size,
+        start_us=start_us,
+        end_us=end_us,
+        resources=resources,
+        resource_order=resource_order,
+        resource_cdf=resource_cdf,
+        incident_start=rng.integers(start_us, end_us, incidents),
+        incident_decay=rng.lognormal(np.log(600e6), 1.0, incidents),
+        incident_first=center // GROUP_SIZE * GROUP_SIZE,
+        incident_cdf=np.cumsum(sizes) / sizes.sum(),
+        storm_fraction=storm_fraction,
+        kind_alerts=table,
+        kind_alert_counts=counts,
+        description_severity=description_severity,
+        critical=severities.index("Critical"),
+        descriptions=descriptions,
+        severities=severities,
+        resource_ids=[resource_id(i, kinds) for i in range(resources)],
+    )
+
+
+def generate_chunk(plan: Plan, index: int) -> dict[str, np.ndarray]:
+    """Columns of chunk `index`: codes into the plan's dictionaries, and numbers."""
+    first = index * plan.chunk_size
+    n = min(plan.chunk_size, plan.count - first)
+    rng = np.random.default_rng([plan.seed, index])
+
+    in_incident = rng.random(n) < plan.storm_fraction
+    background = ~in_incident
+    resources = np.empty(n, dtype=np.int64)
+    created = np.empty(n, dtype=np.int64)
+    main_alert = in_incident.copy()
 
-RESOURCE_IDS = [
-    "/subscriptions/sub-1/resourceGroups/rg-1/providers/Microsoft.Compute/virtualMachines/vm-01",
-    "/subscriptions/sub-1/resourceGroups/rg-1/providers/Microsoft.Sql/servers/sql-01/databases/db-01",
-    "/subscriptions/sub-1/resourceGroups/rg-1/providers/Microsoft.Web/sites/app-01",
-]
+    # Background noise: Zipf-skewed resources, uniform over the window
+    m = int(background.sum())
+    picks = np.searchsorted(plan.resource_cdf, rng.random(m))
+    resources[background] = plan.resource_order[np.minimum(picks, plan.resources - 1)]
+    created[background] = rng.integers(plan.start_us, plan.end_us, m)
 
-ALERT_DESCRIPTIONS = [
-    "High CPU usage detected (95%)",
-    "Disk space low (5% remaining)",
-    "SQL Database DTU usage high (90%)",
-    "App Service response time high (>2s)",
-]
+    # Incidents: a burst that decays after the start, across one group. The
+    # offsets follow the decay truncated at the end of the window (inverse
+    # CDF), so late incidents do not pile up on the last instant.
+    k = n - m
+    which = np.minimum(
+        np.searchsorted(plan.incident_cdf, rng.random(k)), len(plan.incident_cdf) - 1
+    )
+    start = plan.incident_start[which]
+    decay = plan.incident_decay[which]
+    room = -np.expm1(-(plan.end_us - start) / decay)
+    offset = -decay * np.log1p(-rng.random(k) * room)
+    created[in_incident] = np.minimum(start + offset, plan.end_us - 1).astype(np.int64)
+    group_first = plan.incident_first[which]
+    span = np.minimum(GROUP_SIZE, plan.resources - group_first)
+    resources[in_incident] = group_first + (rng.random(k) * span).astype(np.int64)
 
+    kinds = resources % len(plan.kind_alert_counts)
+    slot = np.where(
+        main_alert, 0, (rng.random(n) * plan.kind_alert_counts[kinds]).astype(np.int64)
+    )
+    descriptions = plan.kind_alerts[kinds, slot]
+    metric_value = np.where(
+        in_incident, rng.integers(90, 101, n), rng.integers(80, 101, n)
+    ).astype(np.float64)
+    # Readings near the ceiling page someone whatever the alert rule says
+    severity = np.where(
+        metric_value >= 99, plan.critical, plan.description_severity[descriptions]
+    )
 
-def generate_logs(count: int = 10):
-    logs: List[Dict[str, Any]] = []
-    for i in range(count):
-        resource_id = random.choice(RESOURCE_IDS)
-        description = random.choice(ALERT_DESCRIPTIONS)
+    # Older alerts are more likely to have been handled
+    age = plan.end_us - created
+    closed = np.clip(age / CLOSE_AFTER_US, 0.0, 0.9)
+    u = rng.random(n)
+    status = np.where(u < closed, 1, np.where(u < closed + 0.15, 0, 2))
 
-        # Determine severity based on description
-        severity = "Warning"
-        if "95%" in description or "5%" in description:
-            severity = "Critical"
+    return {
+        "row": np.arange(first + 1, first + n + 1),
+        "severity": severity.astype(np.int32),
+        "status": status.astype(np.int32),
+        "resource_id": resources.astype(np.int32),
+        "description": descriptions.astype(np.int32),
+        "created_at": created,
+        "metric_value": metric_value,
+        "threshold": np.full(n, 80.0),
+    }
 
-        log = {
-            "id": f"alert-{i + 1:03d}",
-            "severity": severity,
-            "resource_id": resource_id,
-            "description": description,
-            "created_at": (
-                datetime.now() - timedelta(minutes=random.randint(1, 60))
-            ).isoformat(),
-            "status": "New",
-            "properties": {"metric_value": random.randint(80, 100), "threshold": 80},
-        }
-        logs.append(log)
 
-    with open(LOGS_FILE, "w") as f:
-        json.dump(logs, f, indent=2)
+def chunk_ids(plan: Plan, rows: np.ndarray) -> np.ndarray:
+    return np.char.add("alert-", np.char.zfill(rows.astype(str), plan.id_width))
 
-    print(f"Generated {count} logs in {LOGS_FILE}")
+
+def chunk_records(plan: Plan, chunk: dict[str, np.ndarray]) -> list[str]:
+    """One compact JSON alert per row."""
+    columns = {
+        name: np.asarray(getattr(plan, plural), dtype=object)[chunk[name]].tolist()
+        for name, plural in (
+            ("severity", "severities"),
+            ("resource_id", "resource_ids"),
+            ("description", "descriptions"),
+        )
+    }
+    status = np.asarray(STATUSES, dtype=object)[chunk["status"]].tolist()
+    created = np.datetime_as_string(chunk["created_at"].astype("datetime64[us]"))
+    return [
+        json.dumps(
+            {
+                "id": alert_id,
+                "severity": columns["severity"][i],
+                "resource_id": columns["resource_id"][i],
+                "description": columns["description"][i],
+                "created_at": created[i],
+                "status": status[i],
+                "properties": {"metric_value": int(value), "threshold": 80},
+            }
+        )
+        for i, (alert_id, value) in enumerate(
+            zip(chunk_ids(plan, chunk["row"]).tolist(), chunk["metric_value"].tolist())
+        )
+    ]
+
+
+def write_columnar_chunk(plan: Plan, directory: Path, index: int):
+    chunk = generate_chunk(plan, index)
+    first = index * plan.chunk_size
+    rows = slice(first, first + len(chunk["row"]))
+    chunk["id"] = chunk_ids(plan, chunk.pop("row"))
+    for name, values in chunk.items():
+        column = open_allocated(directory, name)
+        column[rows] = values
+        column.flush()
+
+
+def write_json_chunk(plan: Plan, path: Path, index: int):
+    part = path.with_name(f"{path.name}.part{index}")
+    part.write_text(",\n".join(chunk_records(plan, generate_chunk(plan, index))))
+
+
+def write_segment_chunk(plan: Plan, directory: Path, base: int, index: int):
+    # Segment names sort in write order; rename so readers never see a partial file
+    name = f"{SEGMENT_PREFIX}{base + index}{SEGMENT_SUFFIX}"
+    tmp = directory / f".{name}.tmp"
+    tmp.write_text(
+        "".join(
+            f"{line}\n" for line in chunk_records(plan, generate_chunk(plan, index))
+        )
+    )
+    os.replace(tmp, directory / name)
+
+
+def run_chunks(plan: Plan, work, workers: int):
+    if workers > 1 and plan.chunks > 1:
+        with ProcessPoolExecutor(min(workers, plan.chunks)) as pool:
+            list(pool.map(work, range(plan.chunks)))
+    else:
+        for index in range(plan.chunks):
+            work(index)
+
+
+def generate_logs(
+    count: int = 10,
+    output_format: str = "json",
+    resources: int = 3,
+    resource_types: int | None = None,
+    hours: float = 1.0,
+    seed: int | None = None,
+    workers: int = 1,
+    storm_fraction: float = 0.3,
+    zipf: float = 1.1,
+    chunk_size: int = CHUNK_SIZE,
+    data_dir: Path = DATA_DIR,
+    end: str | None = None,
+):
+    if seed is None:
+        seed = int(np.random.default_rng().integers(2**63))
+    plan = make_plan(
+        count,
+        resources,
+        resource_types,
+        hours,
+        seed,
+        storm_fraction,
+        zipf,
+        chunk_size,
+        end,
+    )
+    data_dir.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+
+    if output_format == "columnar":
+        target = data_dir / "logs.columns"
+        id_dtype = np.dtype(f"<U{len('alert-') + plan.id_width}")
+        allocate_columns(target, count, id_dtype)
+        run_chunks(plan, partial(write_columnar_chunk, plan, target), workers)
+        # Ids are zero-padded row numbers, so row order is id order
+        id_order = open_allocated(target, "id_order")
+        id_order[:] = np.arange(count)
+        id_order.flush()
+        del id_order
+        publish_columns(
+            target,
+            {
+                "severity": plan.severities,
+                "status": STATUSES,
+                "resource_id": plan.resource_ids,
+                "description": plan.descriptions,
+            },
+        )
+    elif output_format == "jsonl":
+        # Appended as segments, which the MCP server tails like ingested alerts
+        target = data_dir / "alerts"
+        target.mkdir(parents=True, exist_ok=True)
+        work = partial(write_segment_chunk, plan, target, time.time_ns())
+        run_chunks(plan, work, workers)
+    else:
+        target = data_dir / "logs.json"
+        run_chunks(plan, partial(write_json_chunk, plan, target), workers)
+        tmp = target.with_name(f"{target.name}.tmp")
+        with open(tmp, "w") as out:
+            out.write("[\n")
+            for index in range(plan.chunks):
+                part = target.with_name(f"{target.name}.part{index}")
+                if index:
+                    out.write(",\n")
+                with open(part) as f:
+                    shutil.copyfileobj(f, out)
+                part.unlink()
+            out.write("\n]\n")
+        os.replace(tmp, target)
+
+    print(
+        f"Generated {count} logs in {target} "
+        f"(seed {seed}, {time.perf_counter() - start:.1f}s)"
+    )
 
 
 if __name__ == "__main__":
-    generate_logs()
+    parser = argparse.ArgumentParser(description="Generate sample alert logs.")
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument(
+        "--format",
+        choices=["json", "jsonl", "columnar"],
+        default="json",
+        help="json: data/logs.json, jsonl: segments in data/alerts/, "
+        "columnar: data/logs.columns/",
+    )
+    parser.add_argument("--resources", type=int, default=3)
+    parser.add_argument(
+        "--resource-types",
+        type=int,
+        help="Pad the built-in resource types with synthetic ones up to this many",
+    )
+    parser.add_argument("--hours", type=float, default=1.0, help="Time window")
+    parser.add_argument("--seed", type=int, help="Same seed and --end, same data")
+    parser.add_argument(
+        "--end",
+        help="End of the time window as an ISO time (default: now); "
+        "timestamps are only reproducible with a fixed end",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--storm-fraction",
+        type=float,
+        default=0.3,
+        help="Share of alerts raised by bursty incidents",
+    )
+    parser.add_argument(
+        "--zipf", type=float, default=1.1, help="Skew of alerts across resources"
+    )
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--data-dir", type=Path, default=DATA_DIR)
+    args = parser.parse_args()
+
+    generate_logs(
+        args.count,
+        args.format,
+        args.resources,
+        args.resource_types,
+        args.hours,
+        args.seed,
+        args.workers,
+        args.storm_fraction,
+        args.zipf,
+        args.chunk_size,
+        args.data_dir,
+        args.end,
+    )
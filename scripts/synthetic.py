@@ -0,0 +1,178 @@
+"""
+Synthetic Azure resource universe shared by generate_logs.py and
+generate_configs.py, so generated alerts and configs refer to the same
+resources. Resource `i` is a pure function of `i` and the kind list: the
+first three are the demo resources vm-01, db-01 and app-01.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+
+LOCATIONS = ["eastus", "westus2", "westeurope", "northeurope", "southeastasia"]
+# Resources per resource group; alert incidents spread within one group
+GROUP_SIZE = 50
+GROUPS_PER_SUBSCRIPTION = 20
+
+
+@dataclass
+class ResourceKind:
+    type: str
+    prefix: str
+    # (description, severity) pairs of the alerts this kind raises
+    alerts: list[tuple[str, str]]
+    properties: dict[str, Any] = field(default_factory=dict)
+
+
+RESOURCE_KINDS = [
+    ResourceKind(
+        "Microsoft.Compute/virtualMachines",
+        "vm",
+        [
+            ("High CPU usage detected (95%)", "Critical"),
+            ("Disk space low (5% remaining)", "Critical"),
+        ],
+        {
+            "hardwareProfile": {"vmSize": "Standard_D2s_v3"},
+            "storageProfile": {"osDisk": {"osType": "Linux", "diskSizeGB": 30}},
+        },
+    ),
+    ResourceKind(
+        "Microsoft.Sql/servers/databases",
+        "db",
+        [("SQL Database DTU usage high (90%)", "Warning")],
+        {
+            "sku": {"name": "Standard", "tier": "Standard", "capacity": 10},
+            "maxSizeBytes": 2147483648,
+        },
+    ),
+    ResourceKind(
+        "Microsoft.Web/sites",
+        "app",
+        [("App Service response time high (>2s)", "Warning")],
+        {"httpsOnly": False},
+    ),
+    ResourceKind(
+        "Microsoft.Storage/storageAccounts",
+        "st",
+        [("Storage availability dropped below 99%", "Critical")],
+        {"sku": {"name": "Standard_LRS"}, "supportsHttpsTrafficOnly": True},
+    ),
+    ResourceKind(
+        "Microsoft.ContainerService/managedClusters",
+        "aks",
+        [
+            ("Node CPU pressure high (90%)", "Warning"),
+            ("Pod restarts elevated", "Critical"),
+        ],
+        {"kubernetesVersion": "1.29", "agentPoolProfiles": [{"count": 3}]},
+    ),
+    ResourceKind(
+        "Microsoft.Cache/redis",
+        "redis",
+        [("Redis server load high (90%)", "Warning")],
+        {"sku": {"name": "Standard", "family": "C", "capacity": 1}},
+    ),
+    ResourceKind(
+        "Microsoft.DocumentDB/databaseAccounts",
+        "cosmos",
+        [("Cosmos DB normalized RU consumption high (95%)", "Critical")],
+        {"consistencyPolicy": {"defaultConsistencyLevel": "Session"}},
+    ),
+    ResourceKind(
+        "Microsoft.KeyVault/vaults",
+        "kv",
+        [("Key Vault requests throttled", "Warning")],
+        {"enableSoftDelete": True},
+    ),
+    ResourceKind(
+        "Microsoft.Network/applicationGateways",
+        "agw",
+        [("Unhealthy backend hosts detected", "Critical")],
+        {"sku": {"name": "WAF_v2", "capacity": 2}},
+    ),
+    ResourceKind(
+        "Microsoft.Network/loadBalancers",
+        "lb",
+        [("Health probe failures on backend pool", "Warning")],
+        {"sku": {"name": "Standard"}},
+    ),
+]
+
+
+def resource_kinds(count: int | None = None) -> list[ResourceKind]:
+    """
+    The built-in kinds, padded with synthetic ones up to `count` kinds
+    to model tenants with thousands of resource types.
+    """
+    kinds = list(RESOURCE_KINDS)
+    for n in range(len(kinds), count or 0):
+        kinds.append(
+            ResourceKind(
+                f"Microsoft.Synthetic{n // 100}/kind{n % 100}",
+                f"r{n}",
+                [("Metric threshold exceeded", "Warning")],
+                {"sku": {"name": "Standard"}},
+            )
+        )
+    return kinds
+
+
+def resource_id(index: int, kinds: list[ResourceKind]) -> str:
+    kind = kinds[index % len(kinds)]
+    number = index // len(kinds) + 1
+    group = index // GROUP_SIZE
+    scope = (
+        f"/subscriptions/sub-{group // GROUPS_PER_SUBSCRIPTION + 1}"
+        f"/resourceGroups/rg-{group % GROUPS_PER_SUBSCRIPTION + 1}"
+    )
+    if kind.type == "Microsoft.Sql/servers/databases":
+        return f"{scope}/providers/Microsoft.Sql/servers/sql-{number:02d}/databases/db-{number:02d}"
+    return f"{scope}/providers/{kind.type}/{kind.prefix}-{number:02d}"
+
+
+def resource_config(
+    index: int, kinds: list[ResourceKind], rng: np.random.Generator
+) -> dict[str, Any]:
+    kind = kinds[index % len(kinds)]
+    return {
+        "resource_id": resource_id(index, kinds),
+        "type": kind.type,
+        "location": LOCATIONS[index // GROUP_SIZE % len(LOCATIONS)],
+        "properties": kind.properties,
+        "compliance_status": "NonCompliant" if rng.random() < 0.3 else "Compliant",
+    }
+
+
+def alert_catalog(
+    kinds: list[ResourceKind],
+) -> tuple[list[str], list[str], np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Flatten the kinds' alerts for vectorized sampling.
+    Returns the descriptions, the severity names, each description's
+    severity code, a kinds x alerts table of description codes (the first
+    column is each kind's main alert) and each kind's number of alerts.
+    """
+    descriptions: list[str] = []
+    severity_names = sorted({severity for k in kinds for _, severity in k.alerts})
+    lookup: dict[str, int] = {}
+    severities: list[int] = []
+    widest = max(len(kind.alerts) for kind in kinds)
+    table = np.zeros((len(kinds), widest), dtype=np.int32)
+    counts = np.zeros(len(kinds), dtype=np.int32)
+    for k, kind in enumerate(kinds):
+        for j, (description, severity) in enumerate(kind.alerts):
+            if description not in lookup:
+                lookup[description] = len(descriptions)
+                descriptions.append(description)
+                severities.append(severity_names.index(severity))
+            table[k, j] = lookup[description]
+        counts[k] = len(kind.alerts)
+    return (
+        descriptions,
+        severity_names,
+        np.asarray(severities, dtype=np.int32),
+        table,
+        counts,
+    )
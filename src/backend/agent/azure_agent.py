@@ -1,19 +1,215 @@
+import asyncio
+import contextvars
 import os
-from typing import Annotated
+import re
+import time
+from collections.abc import AsyncGenerator, AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Annotated, Any
 
+import mcp.types
 from dotenv import load_dotenv
 from semantic_kernel import Kernel
-from semantic_kernel.agents import ChatCompletionAgent
+from semantic_kernel.agents import ChatCompletionAgent, ChatHistoryAgentThread
+from semantic_kernel.connectors.ai.chat_completion_client_base import (
+    ChatCompletionClientBase,
+)
 from semantic_kernel.connectors.ai.function_choice_behavior import (
     FunctionChoiceBehavior,
 )
-from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
-from semantic_kernel.functions import kernel_function
-from services.mcp_client import MCPClient  # type: ignore
+from semantic_kernel.connectors.ai.open_ai import (
+    AzureChatCompletion,
+    AzureTextEmbedding,
+)
+from semantic_kernel.connectors.ai.prompt_execution_settings import (
+    PromptExecutionSettings,
+)
+from semantic_kernel.contents import (
+    AuthorRole,
+    ChatHistory,
+    ChatMessageContent,
+    StreamingChatMessageContent,
+)
+from semantic_kernel.filters import FilterTypes, FunctionInvocationContext
+from semantic_kernel.functions import FunctionResult, kernel_function
+from services.admission import Slots  # type: ignore
+from services.answer_cache import AnswerCache  # type: ignore
+from services.conversation import Conversation, ConversationStore  # type: ignore
+from services.intent_router import IntentRouter  # type: ignore
+from services.mcp_client import (  # type: ignore
+    ALERT_DATA,
+    CONFIG_DATA,
+    TEMPLATE_DATA,
+    MCPClient,
+    data_version,
+)
+from services.telemetry import LLM_FIRST_TOKEN, record_usage, tracer  # type: ignore
 
 load_dotenv()
 mcp_client = MCPClient()
 
+# Data files a chat answer can depend on
+ANSWER_DATA = ALERT_DATA + CONFIG_DATA + TEMPLATE_DATA
+
+
+def get_answer_cache() -> AnswerCache:
+    """Answer cache, with the embedding tier enabled if a deployment is set."""
+    embed = None
+    deployment = os.getenv("AZURE_OPENAI_EMBEDDING_DEPLOYMENT_NAME")
+    if deployment:
+        embed = AzureTextEmbedding(
+            deployment_name=deployment,
+            endpoint=os.getenv("AZURE_OPENAI_ENDPOINT", ""),
+            api_key=os.getenv("AZURE_OPENAI_API_KEY", ""),
+        ).generate_embeddings
+    return AnswerCache(
+        max_entries=int(os.getenv("ANSWER_CACHE_SIZE", "256")),
+        ttl=float(os.getenv("ANSWER_CACHE_TTL", "600")),
+        embed=embed,
+        similarity=float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.92")),
+    )
+
+
+answer_cache = get_answer_cache()
+
+
+def answer_data_version() -> str:
+    return data_version(ANSWER_DATA)
+
+
+# Outbound chat completion requests in flight, across all chat requests
+llm_slots = Slots(int(os.getenv("LLM_MAX_CONCURRENCY", "8")))
+
+
+class LimitedAzureChatCompletion(AzureChatCompletion):
+    """Azure OpenAI chat completion that holds an llm_slots slot per request."""
+
+    async def _inner_get_chat_message_contents(
+        self, chat_history: ChatHistory, settings: PromptExecutionSettings
+    ) -> list[ChatMessageContent]:
+        async with llm_slots.hold():
+            return await super()._inner_get_chat_message_contents(
+                chat_history, settings
+            )
+
+    async def _inner_get_streaming_chat_message_contents(
+        self,
+        chat_history: ChatHistory,
+        settings: PromptExecutionSettings,
+        function_invoke_attempt: int = 0,
+    ) -> AsyncGenerator[list[StreamingChatMessageContent], Any]:
+        async with llm_slots.hold():
+            async for messages in super()._inner_get_streaming_chat_message_contents(
+                chat_history, settings, function_invoke_attempt
+            ):
+                yield messages
+
+
+# Encoding of tool results with rows: "table" (fewer tokens) or "json"
+TOOL_OUTPUT_FORMAT = os.getenv("TOOL_OUTPUT_FORMAT", "table")
+# How the rows look in each format, for the agent's instructions
+ROW_FORMATS = {
+    "table": "a line of column names and one |-separated line per row",
+    "json": "one JSON object per row",
+}
+
+# Server-side chat sessions, so follow-up questions keep their context
+conversations = ConversationStore(
+    max_sessions=int(os.getenv("CHAT_SESSIONS", "1000")),
+    ttl=float(os.getenv("CHAT_SESSION_TTL", "3600")),
+    budget=int(os.getenv("CHAT_HISTORY_TOKENS", "4000")),
+    summary_budget=int(os.getenv("CHAT_SUMMARY_TOKENS", "500")),
+    tool_result_tokens=int(os.getenv("CHAT_TOOL_RESULT_TOKENS", "1500")),
+)
+
+# Conversation of the chat request currently running, if it has a session
+_conversation: contextvars.ContextVar[Conversation | None] = contextvars.ContextVar(
+    "conversation", default=None
+)
+
+# Event queue of the streaming request currently running, if any
+_stream_events: contextvars.ContextVar[asyncio.Queue | None] = contextvars.ContextVar(
+    "stream_events", default=None
+)
+
+
+async def tool_progress_filter(context: FunctionInvocationContext, next):
+    """Report tool start/finish events to the streaming request, if any."""
+    events = _stream_events.get()
+    if events is None:
+        await next(context)
+        return
+
+    tool = context.function.name
+    events.put_nowait({"type": "tool_started", "tool": tool})
+    start = time.perf_counter()
+    ok = False
+    try:
+        await next(context)
+        ok = True
+    finally:
+        events.put_nowait(
+            {
+                "type": "tool_finished",
+                "tool": tool,
+                "ok": ok,
+                "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+            }
+        )
+
+
+async def session_tool_filter(context: FunctionInvocationContext, next):
+    """Answer a tool call already made in this session from its result."""
+    conversation = _conversation.get()
+    if conversation is None:
+        await next(context)
+        return
+
+    key = (
+        context.function.name,
+        tuple(sorted((k, str(v)) for k, v in context.arguments.items())),
+    )
+    version = answer_data_version()
+    cached = conversation.tool_result(key, version)
+    if cached is not None:
+        conversations.tool_hits += 1
+        context.result = FunctionResult(
+            function=context.function.metadata, value=cached
+        )
+        return
+
+    conversations.tool_misses += 1
+    await next(context)
+    if context.result is not None:
+        result = str(context.result.value)
+        if not result.startswith("Error"):
+            conversation.remember_tool_result(key, version, result)
+
+
+@asynccontextmanager
+async def conversation_thread(
+    session_id: str | None,
+) -> AsyncIterator[ChatHistoryAgentThread]:
+    """
+    Thread for one agent turn: a fresh one without a session. With one,
+    the thread starts from the session's history and the turn is added
+    to the session once it completes.
+    """
+    if not session_id:
+        yield ChatHistoryAgentThread()
+        return
+    conversation = conversations.get(session_id)
+    async with conversation.lock:
+        history = conversation.history()
+        start = len(history.messages)
+        token = _conversation.set(conversation)
+        try:
+            yield ChatHistoryAgentThread(chat_history=history)
+        finally:
+            _conversation.reset(token)
+        conversation.add_turn(history.messages[start:])
+        conversations.save(session_id, conversation)
+
 
 class AzureOpsPlugin:
     """Plugin wrapping the MCP tools for Semantic Kernel."""
@@ -26,6 +222,36 @@ class AzureOpsPlugin:
     ) -> str:
         return await mcp_client.execute("analyze_alert", alert_id=alert_id)
 
+    @kernel_function(
+        name="analyze_alerts",
+        description=(
+            "Analyze many Azure Monitor alerts in one call, by IDs or by filter. "
+            "Returns each affected resource's config with its alerts. Prefer this "
+            "over calling analyze_alert repeatedly."
+        ),
+    )
+    async def analyze_alerts_wrapper(
+        self,
+        alert_ids: Annotated[str, "Comma-separated alert IDs, e.g. 'alert-001'"] = "",
+        severity: Annotated[str, "Filter by severity, e.g. 'Critical'"] = "",
+        status: Annotated[str, "Filter by status, e.g. 'New'"] = "",
+        resource_prefix: Annotated[str, "Filter by the start of the resource ID"] = "",
+        since: Annotated[str, "Only alerts created at or after this ISO time"] = "",
+        until: Annotated[str, "Only alerts created before this ISO time"] = "",
+        limit: Annotated[int, "Maximum alerts to analyze when filtering"] = 20,
+    ) -> str:
+        return await mcp_client.execute(
+            "analyze_alerts",
+            alert_ids=alert_ids,
+            severity=severity,
+            status=status,
+            resource_prefix=resource_prefix,
+            since=since,
+            until=until,
+            limit=limit,
+            format=TOOL_OUTPUT_FORMAT,
+        )
+
     @kernel_function(
         name="get_resource_config",
         description="Get the configuration of an Azure resource.",
@@ -43,33 +269,274 @@ class AzureOpsPlugin:
         self,
         issue_type: Annotated[str, "The type of issue (e.g., 'High CPU')"],
         resource_type: Annotated[str, "The type of resource"],
+        params: Annotated[
+            str, "Optional name=value pairs for the template, e.g. 'vmName=vm-01'"
+        ] = "",
+    ) -> str:
+        return await mcp_client.execute(
+            "generate_fix",
+            issue_type=issue_type,
+            resource_type=resource_type,
+            params=params,
+        )
+
+    @kernel_function(
+        name="query_logs",
+        description=(
+            "Query Azure Monitor alerts with filters, a field projection, sorting "
+            "and paging. Use this to list, filter or summarize alerts. Returns a "
+            "header with total and next_cursor, then one row per alert."
+        ),
+    )
+    async def query_logs_wrapper(
+        self,
+        severity: Annotated[str, "Filter by severity, e.g. 'Critical'"] = "",
+        status: Annotated[str, "Filter by status, e.g. 'New'"] = "",
+        resource_prefix: Annotated[str, "Filter by the start of the resource ID"] = "",
+        since: Annotated[str, "Only alerts created at or after this ISO time"] = "",
+        until: Annotated[str, "Only alerts created before this ISO time"] = "",
+        fields: Annotated[str, "Comma-separated fields to return"] = "",
+        sort: Annotated[str, "Comma-separated sort keys, '-' for descending"] = (
+            "-created_at"
+        ),
+        limit: Annotated[int, "Maximum number of alerts to return"] = 50,
+        cursor: Annotated[str, "next_cursor from a previous page"] = "",
+    ) -> str:
+        return await mcp_client.execute(
+            "query_logs",
+            severity=severity,
+            status=status,
+            resource_prefix=resource_prefix,
+            since=since,
+            until=until,
+            fields=fields,
+            sort=sort,
+            limit=limit,
+            cursor=cursor,
+            format=TOOL_OUTPUT_FORMAT,
+        )
+
+    @kernel_function(
+        name="query_resource_configs",
+        description=(
+            "Query Azure resource configurations with filters, a field projection, "
+            "sorting and paging. Use this for resource overviews. Returns a "
+            "header with total and next_cursor, then one row per config."
+        ),
+    )
+    async def query_resource_configs_wrapper(
+        self,
+        resource_type: Annotated[
+            str, "Filter by type, e.g. 'Microsoft.Web/sites'"
+        ] = "",
+        location: Annotated[str, "Filter by location, e.g. 'eastus'"] = "",
+        compliance_status: Annotated[str, "Filter by compliance status"] = "",
+        resource_prefix: Annotated[str, "Filter by the start of the resource ID"] = "",
+        fields: Annotated[str, "Comma-separated fields to return"] = "",
+        sort: Annotated[str, "Comma-separated sort keys, '-' for descending"] = (
+            "resource_id"
+        ),
+        limit: Annotated[int, "Maximum number of configs to return"] = 50,
+        cursor: Annotated[str, "next_cursor from a previous page"] = "",
     ) -> str:
         return await mcp_client.execute(
-            "generate_fix", issue_type=issue_type, resource_type=resource_type
+            "query_resource_configs",
+            resource_type=resource_type,
+            location=location,
+            compliance_status=compliance_status,
+            resource_prefix=resource_prefix,
+            fields=fields,
+            sort=sort,
+            limit=limit,
+            cursor=cursor,
+            format=TOOL_OUTPUT_FORMAT,
         )
 
     @kernel_function(
-        name="get_all_logs",
-        description="Get all recent Azure Monitor logs/alerts. Use this to summarize alerts or get an overview.",
+        name="summarize_alerts",
+        description=(
+            "Summarize Azure Monitor alerts server-side: counts per group, "
+            "optional time buckets, the noisiest resources and metric_value "
+            "percentiles against threshold. Use this for any summary or count."
+        ),
     )
-    async def get_all_logs_wrapper(self) -> str:
-        return await mcp_client.execute("get_all_logs")
+    async def summarize_alerts_wrapper(
+        self,
+        group_by: Annotated[
+            str, "Comma-separated: severity, status, resource, description"
+        ] = "severity",
+        bucket: Annotated[str, "Optional time bucket width, e.g. '15m', '1h'"] = "",
+        top_n: Annotated[int, "Number of noisiest resources to list"] = 5,
+        severity: Annotated[str, "Filter by severity"] = "",
+        status: Annotated[str, "Filter by status"] = "",
+        since: Annotated[str, "Only alerts created at or after this ISO time"] = "",
+        until: Annotated[str, "Only alerts created before this ISO time"] = "",
+    ) -> str:
+        return await mcp_client.execute(
+            "summarize_alerts",
+            group_by=group_by,
+            bucket=bucket,
+            top_n=top_n,
+            severity=severity,
+            status=status,
+            since=since,
+            until=until,
+        )
+
+    @kernel_function(
+        name="list_resources",
+        description=(
+            "List the Azure resources under a subscription, resource group or "
+            "any leading part of a resource ID, optionally of one resource type. "
+            "Returns one row per resource with a next_cursor for paging."
+        ),
+    )
+    async def list_resources_wrapper(
+        self,
+        scope: Annotated[
+            str, "e.g. '/subscriptions/sub-1/resourceGroups/rg-1'; empty for all"
+        ] = "",
+        resource_type: Annotated[
+            str, "Optional type, e.g. 'Microsoft.Sql/servers/databases'"
+        ] = "",
+        fields: Annotated[str, "Comma-separated fields to return"] = "",
+        limit: Annotated[int, "Maximum resources per page"] = 50,
+        cursor: Annotated[str, "next_cursor from the previous page"] = "",
+    ) -> str:
+        return await mcp_client.execute(
+            "list_resources",
+            scope=scope,
+            resource_type=resource_type,
+            fields=fields,
+            limit=limit,
+            cursor=cursor,
+            format=TOOL_OUTPUT_FORMAT,
+        )
 
     @kernel_function(
-        name="get_all_resource_configs",
-        description="Get all Azure resource configurations. Use this to get an overview of all resources.",
+        name="get_resource_alerts",
+        description=(
+            "Get the alerts raised on a resource (full ID, short name or end of "
+            "an ID) or on every resource under a scope such as a resource group, "
+            "with each resource's config and alert counts."
+        ),
     )
-    async def get_all_resource_configs_wrapper(self) -> str:
-        return await mcp_client.execute("get_all_resource_configs")
+    async def get_resource_alerts_wrapper(
+        self,
+        resource: Annotated[str, "Resource ID, short name or scope"],
+        severity: Annotated[str, "Filter by severity"] = "",
+        status: Annotated[str, "Filter by status"] = "",
+        since: Annotated[str, "Only alerts created at or after this ISO time"] = "",
+        until: Annotated[str, "Only alerts created before this ISO time"] = "",
+        alerts_per_resource: Annotated[int, "Latest alerts listed per resource"] = 3,
+        limit: Annotated[int, "Maximum resources to return"] = 20,
+    ) -> str:
+        return await mcp_client.execute(
+            "get_resource_alerts",
+            resource=resource,
+            severity=severity,
+            status=status,
+            since=since,
+            until=until,
+            alerts_per_resource=alerts_per_resource,
+            limit=limit,
+            format=TOOL_OUTPUT_FORMAT,
+        )
 
+    @kernel_function(
+        name="evaluate_compliance",
+        description=(
+            "Evaluate the compliance policies against the resource configurations "
+            "and count compliant and non-compliant resources per rule. Use this "
+            "for any compliance question instead of reading all configs."
+        ),
+    )
+    async def evaluate_compliance_wrapper(
+        self,
+        scope: Annotated[str, "Optional subscription or resource group ID"] = "",
+        resource_type: Annotated[str, "Optional type, e.g. 'Microsoft.Web/sites'"] = "",
+        rule: Annotated[str, "Optional rule name"] = "",
+    ) -> str:
+        return await mcp_client.execute(
+            "evaluate_compliance",
+            scope=scope,
+            resource_type=resource_type,
+            rule=rule,
+            format=TOOL_OUTPUT_FORMAT,
+        )
 
-async def get_agent() -> Kernel:
+    @kernel_function(
+        name="list_violations",
+        description=(
+            "List the resources violating compliance policies, with the expected "
+            "and actual value. Returns one row per violation with a next_cursor "
+            "for paging."
+        ),
+    )
+    async def list_violations_wrapper(
+        self,
+        rule: Annotated[str, "Optional rule name"] = "",
+        resource_type: Annotated[str, "Optional resource type"] = "",
+        severity: Annotated[str, "Optional rule severity: High, Medium or Low"] = "",
+        scope: Annotated[str, "Optional subscription or resource group ID"] = "",
+        limit: Annotated[int, "Maximum violations per page"] = 50,
+        cursor: Annotated[str, "next_cursor from the previous page"] = "",
+    ) -> str:
+        return await mcp_client.execute(
+            "list_violations",
+            rule=rule,
+            resource_type=resource_type,
+            severity=severity,
+            scope=scope,
+            limit=limit,
+            cursor=cursor,
+            format=TOOL_OUTPUT_FORMAT,
+        )
+
+    @kernel_function(
+        name="list_incidents",
+        description=(
+            "List incidents instead of raw alerts: repeats of the same alert on "
+            "the same resource are collapsed into one incident with a count and "
+            "first/last seen, grouped by resource group. Use this to triage."
+        ),
+    )
+    async def list_incidents_wrapper(
+        self,
+        severity: Annotated[str, "Filter by severity"] = "",
+        status: Annotated[str, "Filter by status"] = "",
+        resource_prefix: Annotated[str, "Start of the resource ID"] = "",
+        since: Annotated[str, "Only alerts created at or after this ISO time"] = "",
+        until: Annotated[str, "Only alerts created before this ISO time"] = "",
+        min_count: Annotated[int, "Skip incidents with fewer alerts"] = 1,
+        limit: Annotated[int, "Maximum incidents to return"] = 20,
+    ) -> str:
+        return await mcp_client.execute(
+            "list_incidents",
+            severity=severity,
+            status=status,
+            resource_prefix=resource_prefix,
+            since=since,
+            until=until,
+            min_count=min_count,
+            limit=limit,
+            format=TOOL_OUTPUT_FORMAT,
+        )
+
+
+async def get_agent(chat_service: ChatCompletionClientBase | None = None) -> Kernel:
+    """
+    Build the kernel. Uses Azure OpenAI unless another chat completion
+    service is given (the benchmarks pass a scripted one).
+    """
     kernel = Kernel()
 
     service_id = "default"
     try:
         kernel.add_service(
-            AzureChatCompletion(
+            chat_service
+            # mypy reads the pydantic fields, not AzureChatCompletion.__init__
+            or LimitedAzureChatCompletion(  # type: ignore[call-arg]
                 service_id=service_id,
                 deployment_name=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4"),
                 endpoint=os.getenv("AZURE_OPENAI_ENDPOINT", ""),
@@ -80,40 +547,184 @@ async def get_agent() -> Kernel:
         print(f"Warning: Could not configure Azure OpenAI: {e}")
 
     kernel.add_plugin(AzureOpsPlugin(), plugin_name="AzureOps")
+    kernel.add_filter(FilterTypes.FUNCTION_INVOCATION, tool_progress_filter)
+    kernel.add_filter(FilterTypes.FUNCTION_INVOCATION, session_tool_filter)
 
     return kernel
 
 
+def tool_summary(tools: list[mcp.types.Tool], names: set[str]) -> str:
+    """
+    One line per tool the agent can call: its name and the first sentence
+    of its description. The kernel already sends the full parameter
+    schemas, so the prompt only needs what each tool is for.
+    """
+    lines = []
+    for tool in tools:
+        if tool.name in names:
+            description = " ".join((tool.description or "").split())
+            sentence = re.split(r"(?<!e\.g)(?<!i\.e)\.(?:\s|$)", description)[0]
+            lines.append(f"- {tool.name}: {sentence}")
+    return "\n".join(lines)
+
+
 async def get_chat_agent(kernel: Kernel) -> ChatCompletionAgent:
     tools = await mcp_client.list_tools()
+    names = set(kernel.get_plugin("AzureOps").functions)
     agent = ChatCompletionAgent(
         kernel=kernel,
         name="AzureOpsAgent",
         instructions=f"""You are an AI assistant that helps with Azure Operations.
 
 You have access to the following tools:
-{tools}
+{tool_summary(tools, names)}
 
-When users ask to "summarize logs" or "show all alerts", use the get_all_logs tool.
-When users ask about "all resources" or "resource overview", use the get_all_resource_configs tool.""",
+When users ask to "summarize logs" or want counts, trends or the noisiest resources, use the summarize_alerts tool.
+When users ask to "show all alerts" or list specific alerts, use the query_logs tool.
+When users ask what is going on, which incidents are active or what to look at first, use the list_incidents tool.
+When users ask to analyze or triage several alerts, use the analyze_alerts tool once instead of analyze_alert per alert.
+When users ask about "all resources" or "resource overview", use the query_resource_configs tool.
+When users ask about compliance, use the evaluate_compliance tool, then list_violations for the offending resources.
+When users ask about the resources in a subscription or resource group, use the list_resources tool; for the alerts on a resource or resource group, use the get_resource_alerts tool.
+Request only the fields you need and follow next_cursor only when more rows are required.
+Tools that list rows return a JSON header line, then {ROW_FORMATS.get(TOOL_OUTPUT_FORMAT, "one line per row")}. A last line starting with "…" means rows were left out to keep the result short.""",
         function_choice_behavior=FunctionChoiceBehavior.Auto(),
     )
     return agent
 
 
-async def run_agent(query: str):
-    kernel = await get_agent()
-    agent = await get_chat_agent(kernel)
+class AgentRuntime:
+    """Kernel and agent shared by all chat requests."""
+
+    def __init__(self) -> None:
+        self.kernel: Kernel | None = None
+        self.agent: ChatCompletionAgent | None = None
+        self._tools_version = -1
+
+    async def start(self):
+        """Build the kernel and agent (called at application startup)."""
+        await self.get_chat_agent()
+
+    async def get_chat_agent(self) -> ChatCompletionAgent:
+        """Return the shared agent, rebuilding it if the MCP tool list changed."""
+        if self.kernel is None:
+            with tracer.start_as_current_span("agent.build_kernel"):
+                self.kernel = await get_agent()
+        if self.agent is None or self._tools_version != mcp_client.tools_version:
+            tools_version = mcp_client.tools_version
+            with tracer.start_as_current_span("agent.build_agent"):
+                self.agent = await get_chat_agent(self.kernel)
+            self._tools_version = tools_version
+        return self.agent
+
+
+runtime = AgentRuntime()
+
+# Questions answered by a single tool call skip the model; a question is
+# routed when the share of its words a route accounts for reaches the
+# threshold (above 1 turns routing off)
+intent_router = IntentRouter(threshold=float(os.getenv("CHAT_ROUTER_THRESHOLD", "0.8")))
+
+
+async def route_query(query: str, session_id: str | None = None) -> str | None:
+    """
+    Answer a question the intent router recognizes, without the model, or
+    return None. In a session the question and answer are kept as a turn.
+    """
+    with tracer.start_as_current_span("agent.route") as span:
+        answer = await intent_router.answer(query, mcp_client.execute)
+        span.set_attribute("routed", answer is not None)
+    if answer is not None and session_id:
+        conversation = conversations.get(session_id)
+        async with conversation.lock:
+            conversation.add_turn(
+                [
+                    ChatMessageContent(role=AuthorRole.USER, content=query),
+                    ChatMessageContent(role=AuthorRole.ASSISTANT, content=answer),
+                ]
+            )
+        conversations.save(session_id, conversation)
+    return answer
+
+
+async def run_agent(query: str, session_id: str | None = None):
+    agent = await runtime.get_chat_agent()
 
     final_response = []
-    async for response_item in agent.invoke(query):
-        if hasattr(response_item, "message") and response_item.message:
-            message = response_item.message
+    # Conversation state is per session (or per request without one); the
+    # kernel and agent are shared. Tool calls lease a pooled MCP session
+    # only while they run.
+    with tracer.start_as_current_span("agent.invoke"):
+        async with conversation_thread(session_id) as thread, mcp_client.turn():
+            async for response_item in agent.invoke(query, thread=thread):
+                if hasattr(response_item, "message") and response_item.message:
+                    message = response_item.message
+                    record_usage(getattr(message, "metadata", None))
 
-            if hasattr(message, "content") and message.content:
-                final_response.append(str(message.content))
+                    if hasattr(message, "content") and message.content:
+                        final_response.append(str(message.content))
 
-        elif hasattr(response_item, "content") and response_item.content:
-            final_response.append(str(response_item.content))
+                elif hasattr(response_item, "content") and response_item.content:
+                    final_response.append(str(response_item.content))
 
     return "".join(final_response)
+
+
+async def stream_agent(
+    query: str, session_id: str | None = None
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    Run the agent and yield events as they happen: token deltas, tool
+    progress and a final summary (or an error).
+    """
+    agent = await runtime.get_chat_agent()
+    events: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue()
+    start = time.perf_counter()
+
+    async def produce():
+        _stream_events.set(events)
+        final_response = []
+        first_token_ms = None
+        try:
+            with tracer.start_as_current_span("agent.invoke_stream") as span:
+                async with (
+                    conversation_thread(session_id) as thread,
+                    mcp_client.turn(),
+                ):
+                    async for item in agent.invoke_stream(query, thread=thread):
+                        record_usage(item.message.metadata)
+                        delta = item.message.content
+                        if not delta:
+                            continue
+                        if first_token_ms is None:
+                            elapsed = time.perf_counter() - start
+                            first_token_ms = round(elapsed * 1000, 1)
+                            LLM_FIRST_TOKEN.observe(elapsed)
+                            span.add_event("first_token")
+                        final_response.append(str(delta))
+                        events.put_nowait({"type": "token", "content": str(delta)})
+            events.put_nowait(
+                {
+                    "type": "done",
+                    "response": "".join(final_response),
+                    "first_token_ms": first_token_ms,
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+                }
+            )
+        except Exception as e:
+            events.put_nowait({"type": "error", "detail": str(e)})
+        finally:
+            events.put_nowait(None)
+
+    task = asyncio.create_task(produce())
+    tool_calls = 0
+    try:
+        while (event := await events.get()) is not None:
+            if event["type"] == "tool_finished":
+                tool_calls += 1
+            elif event["type"] == "done":
+                event["tool_calls"] = tool_calls
+            yield event
+    finally:
+        if not task.done():
+            task.cancel()
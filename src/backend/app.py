@@ -1,34 +1,361 @@
+import hashlib
+import json
 import logging
+import os
+import time
+from contextlib import asynccontextmanager
 
-from agent.azure_agent import run_agent  # type: ignore
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from agent.azure_agent import (  # type: ignore
+    answer_cache,
+    answer_data_version,
+    conversations,
+    intent_router,
+    llm_slots,
+    mcp_client,
+    route_query,
+    run_agent,
+    runtime,
+    stream_agent,
+)
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from pydantic import BaseModel, Field
+from services.admission import AdmissionController, QueueFull  # type: ignore
+from services.answer_cache import normalize_query  # type: ignore
+from services.mcp_client import ALERT_DATA, CONFIG_DATA, data_version  # type: ignore
+from services.telemetry import (  # type: ignore
+    CHAT_LATENCY,
+    register_stats,
+    setup_tracing,
+    tracer,
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-app = FastAPI(title="Azure Ops Copilot API")
+# Agent runs in flight; more chat requests queue, fairly across clients
+admission = AdmissionController(
+    max_concurrent=int(os.getenv("CHAT_MAX_CONCURRENCY", "8")),
+    max_queue=int(os.getenv("CHAT_MAX_QUEUE", "64")),
+    max_wait=float(os.getenv("CHAT_QUEUE_TIMEOUT", "30")),
+)
+
+# Cache, pool and queue counters are read at scrape time
+register_stats(
+    caches={
+        "answers": answer_cache.stats,
+        "tools": mcp_client.cache.stats,
+        "sessions": conversations.stats,
+    },
+    pool=lambda: (mcp_client.pool.in_use, mcp_client.pool.size),
+    admission=admission.stats,
+    llm=lambda: (llm_slots.in_use, llm_slots.waiting),
+    router=intent_router.stats,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    setup_tracing()
+    # Warm up the MCP session pool, kernel and agent once instead of per request
+    with tracer.start_as_current_span("startup"):
+        await mcp_client.start()
+        await runtime.start()
+    try:
+        yield
+    finally:
+        await mcp_client.close()
+
+
+app = FastAPI(title="Azure Ops Copilot API", lifespan=lifespan)
 
 
 class ChatRequest(BaseModel):
     message: str
+    # Continue a server-side conversation; without one every question
+    # starts afresh
+    session_id: str | None = None
 
 
 class ChatResponse(BaseModel):
     response: str
+    session_id: str | None = None
+
+
+class IngestRequest(BaseModel):
+    alerts: list[dict] = Field(min_length=1)
+
+
+def cache_bypassed(header: str | None) -> bool:
+    """True if the client asked to skip the answer cache (X-Cache-Bypass: 1)."""
+    return (header or "").strip().lower() in ("1", "true", "yes")
+
+
+def client_id(request: Request, header: str | None) -> str:
+    """Key for fair queuing: X-Client-Id if given, else the client address."""
+    if header:
+        return header
+    return request.client.host if request.client else ""
+
+
+def too_many_requests(e: QueueFull) -> HTTPException:
+    # Headers set on the endpoint's Response are dropped with an exception
+    headers = {"Retry-After": str(e.retry_after), "X-Answer-Cache": "rejected"}
+    return HTTPException(status_code=429, detail=str(e), headers=headers)
 
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(
+    request: ChatRequest,
+    http_request: Request,
+    response: Response,
+    x_cache_bypass: str | None = Header(default=None),
+    x_client_id: str | None = Header(default=None),
+):
+    start = time.perf_counter()
+    with tracer.start_as_current_span("chat") as span:
+        try:
+            logger.info(f"Received chat request: {request.message}")
+            # Single-tool questions are answered without the model or a slot
+            routed = await route_query(request.message, request.session_id)
+            if routed is not None:
+                response.headers["X-Answer-Cache"] = "routed"
+                return ChatResponse(response=routed, session_id=request.session_id)
+
+            version = answer_data_version()
+            # Identical questions in flight share one agent run
+            key: tuple[str, str] | None = (normalize_query(request.message), version)
+            if request.session_id:
+                # Answers depend on the conversation so far
+                response.headers["X-Answer-Cache"] = "session"
+                key = None
+            elif cache_bypassed(x_cache_bypass):
+                response.headers["X-Answer-Cache"] = "bypass"
+                key = None
+            else:
+                cached = await answer_cache.get(request.message, version)
+                if cached is not None:
+                    response.headers["X-Answer-Cache"] = cached[1]
+                    return ChatResponse(response=cached[0])
+                response.headers["X-Answer-Cache"] = "miss"
+                if admission.in_flight(key):
+                    # Waits for the run in flight without taking a slot
+                    response.headers["X-Answer-Cache"] = "coalesced"
+
+            result = str(
+                await admission.run(
+                    lambda: run_agent(request.message, request.session_id),
+                    client=client_id(http_request, x_client_id),
+                    key=key,
+                )
+            )
+            if request.session_id:
+                return ChatResponse(response=result, session_id=request.session_id)
+            await answer_cache.put(request.message, version, result)
+            return ChatResponse(response=result)
+        except QueueFull as e:
+            response.headers["X-Answer-Cache"] = "rejected"
+            raise too_many_requests(e)
+        except Exception as e:
+            logger.error(f"Error processing request: {e}")
+            response.headers["X-Answer-Cache"] = "error"
+            raise HTTPException(status_code=500, detail=str(e))
+        finally:
+            cache = response.headers.get("X-Answer-Cache", "error")
+            span.set_attribute("answer_cache", cache)
+            CHAT_LATENCY.labels("chat", cache).observe(time.perf_counter() - start)
+
+
+@app.post("/chat/stream")
+async def chat_stream(
+    request: ChatRequest,
+    http_request: Request,
+    x_cache_bypass: str | None = Header(default=None),
+    x_client_id: str | None = Header(default=None),
+):
+    """
+    Stream the agent's answer as Server-Sent Events. Streams take a run
+    slot like /chat but are not coalesced; a request that is rejected
+    after the stream has started gets an error event. Cached and routed
+    answers come as a single token event.
+    """
+    logger.info(f"Received streaming chat request: {request.message}")
+    version = answer_data_version()
+    session_id = request.session_id
+    cached = None
+    routed = await route_query(request.message, session_id)
+    if routed is not None:
+        cached = (routed, "routed")
+    elif not session_id and not cache_bypassed(x_cache_bypass):
+        cached = await answer_cache.get(request.message, version)
+    if cached is None:
+        try:
+            admission.check()
+        except QueueFull as e:
+            raise too_many_requests(e)
+    client = client_id(http_request, x_client_id)
+
+    async def events():
+        if cached is not None:
+            yield {"type": "token", "content": cached[0]}
+            yield {"type": "done", "response": cached[0], "cached": cached[1]}
+            return
+        try:
+            async with admission.slot(client):
+                async for event in stream_agent(request.message, session_id):
+                    if event["type"] == "done" and not session_id:
+                        await answer_cache.put(
+                            request.message, version, event["response"]
+                        )
+                    yield event
+        except QueueFull as e:
+            yield {"type": "error", "detail": str(e), "retry_after": e.retry_after}
+
+    async def event_stream():
+        start = time.perf_counter()
+        outcome = "bypass" if cache_bypassed(x_cache_bypass) else "miss"
+        if cached is not None:
+            outcome = cached[1]
+        elif session_id:
+            outcome = "session"
+        with tracer.start_as_current_span(
+            "chat.stream", attributes={"answer_cache": outcome}
+        ):
+            async for event in events():
+                if event["type"] == "error":
+                    logger.error(f"Error processing request: {event['detail']}")
+                    outcome = "error"
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        CHAT_LATENCY.labels("chat_stream", outcome).observe(time.perf_counter() - start)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.delete("/chat/sessions/{session_id}", status_code=204)
+async def end_session(session_id: str):
+    """Forget a conversation (e.g. when the user clears the chat)."""
+    conversations.delete(session_id)
+    return Response(status_code=204)
+
+
+@app.post("/alerts/ingest")
+async def ingest_alerts(request: IngestRequest):
+    """Append a batch of alerts (e.g. from an Azure Monitor webhook)."""
     try:
-        logger.info(f"Received chat request: {request.message}")
-        result = await run_agent(request.message)
-        return ChatResponse(response=str(result))
+        result = await mcp_client.execute("ingest_alerts", alerts=request.alerts)
     except Exception as e:
-        logger.error(f"Error processing request: {e}")
+        logger.error(f"Error ingesting alerts: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    if result.startswith("Error"):
+        raise HTTPException(status_code=400, detail=result)
+    return json.loads(result)
+
+
+async def paged_listing(
+    request: Request, tool_name: str, data: tuple[str, ...], params: dict
+) -> Response:
+    """
+    Run a paged query tool and return {total, returned, next_cursor, items}.
+    The ETag covers the data version and the query, so an unchanged page is
+    answered with 304 before the MCP server is even asked.
+    """
+    key = data_version(data) + json.dumps(params, sort_keys=True)
+    etag = f'"{hashlib.sha1(key.encode()).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    # Full pages as JSON lines; the output budget is for the agent
+    result = await mcp_client.execute(tool_name, **params, format="json", max_tokens=0)
+    if result.startswith("Error"):
+        raise HTTPException(status_code=400, detail=result)
+    header, *lines = result.splitlines()
+    page = json.loads(header)
+    page["items"] = [json.loads(line) for line in lines]
+    return JSONResponse(page, headers=headers)
+
+
+@app.get("/alerts")
+async def list_alerts(
+    request: Request,
+    severity: str = "",
+    status: str = "",
+    resource_prefix: str = "",
+    since: str = "",
+    until: str = "",
+    fields: str = "id,severity,description,resource_id,status,created_at",
+    sort: str = "-created_at",
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str = "",
+):
+    """One page of alerts, filtered and sorted server-side."""
+    params = {
+        "severity": severity,
+        "status": status,
+        "resource_prefix": resource_prefix,
+        "since": since,
+        "until": until,
+        "fields": fields,
+        "sort": sort,
+        "limit": limit,
+        "cursor": cursor,
+    }
+    return await paged_listing(request, "query_logs", ALERT_DATA, params)
+
+
+@app.get("/configs")
+async def list_configs(
+    request: Request,
+    resource_type: str = "",
+    location: str = "",
+    compliance_status: str = "",
+    resource_prefix: str = "",
+    fields: str = "resource_id,type,location,compliance_status",
+    sort: str = "resource_id",
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str = "",
+):
+    """One page of resource configs, filtered and sorted server-side."""
+    params = {
+        "resource_type": resource_type,
+        "location": location,
+        "compliance_status": compliance_status,
+        "resource_prefix": resource_prefix,
+        "fields": fields,
+        "sort": sort,
+        "limit": limit,
+        "cursor": cursor,
+    }
+    return await paged_listing(request, "query_resource_configs", CONFIG_DATA, params)
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit/miss counters of the answer cache and the tool result caches."""
+    try:
+        server = json.loads(await mcp_client.read_resource("azure://cache/stats"))
+    except Exception as e:
+        logger.error(f"Error reading MCP cache stats: {e}")
+        server = None
+    return {
+        "answers": answer_cache.stats(),
+        "client": mcp_client.cache.stats(),
+        "sessions": conversations.stats(),
+        "server": server,
+    }
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 
 @app.get("/health")
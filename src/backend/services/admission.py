@@ -0,0 +1,201 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator, Awaitable, Callable, Hashable
+from contextlib import asynccontextmanager
+from typing import Any, TypeVar
+
+from services.telemetry import CHAT_COALESCED_WAIT, CHAT_QUEUE_WAIT  # type: ignore
+
+T = TypeVar("T")
+
+
+class QueueFull(Exception):
+    """Raised when a request cannot be admitted; retry_after is in seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Too many requests in progress, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """
+    Runs at most `max_concurrent` requests at a time. Up to `max_queue` more
+    wait for a slot, served round-robin across clients so one busy client
+    cannot starve the others; beyond that (or after waiting `max_wait`
+    seconds) requests are rejected with QueueFull. Identical requests
+    already in flight share one execution.
+    """
+
+    def __init__(
+        self, max_concurrent: int = 8, max_queue: int = 64, max_wait: float = 30.0
+    ):
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queue = max(0, max_queue)
+        self.max_wait = max_wait
+        self.running = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.coalesced = 0
+        # Waiters per client; the first client is served next, then moved last
+        self._waiting: OrderedDict[Hashable, deque[asyncio.Future[None]]] = (
+            OrderedDict()
+        )
+        self._in_flight: dict[Hashable, asyncio.Future[Any]] = {}
+        # Moving average of run time, for the Retry-After estimate
+        self._run_seconds = 1.0
+
+    def retry_after(self) -> int:
+        """Seconds until the queue has likely drained enough to admit one more."""
+        rounds = (self.queued + 1) / self.max_concurrent
+        return max(1, math.ceil(self._run_seconds * rounds))
+
+    def check(self):
+        """Raise QueueFull now if a new request would be rejected."""
+        if self.running >= self.max_concurrent and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise QueueFull(self.retry_after())
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._in_flight
+
+    async def acquire(self, client: Hashable = None):
+        """Wait for a run slot; raises QueueFull if the queue is full or too slow."""
+        start = time.monotonic()
+        if self.running < self.max_concurrent and not self.queued:
+            self.running += 1
+            self.admitted += 1
+            CHAT_QUEUE_WAIT.observe(0)
+            return
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise QueueFull(self.retry_after())
+
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(client, deque()).append(waiter)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(waiter, self.max_wait)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait ended
+                self.release()
+            else:
+                self._forget(client, waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                self.rejected += 1
+                raise QueueFull(self.retry_after()) from None
+            raise
+        self.admitted += 1
+        CHAT_QUEUE_WAIT.observe(time.monotonic() - start)
+
+    def release(self):
+        """Free a run slot, handing it to the next client in turn if any waits."""
+        while self._waiting:
+            client, waiters = next(iter(self._waiting.items()))
+            waiter = waiters.popleft()
+            self.queued -= 1
+            if waiters:
+                self._waiting.move_to_end(client)
+            else:
+                del self._waiting[client]
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.running -= 1
+
+    def _forget(self, client: Hashable, waiter: asyncio.Future[None]):
+        waiters = self._waiting.get(client)
+        if waiters is not None and waiter in waiters:
+            waiters.remove(waiter)
+            self.queued -= 1
+            if not waiters:
+                del self._waiting[client]
+
+    @asynccontextmanager
+    async def slot(self, client: Hashable = None) -> AsyncIterator[None]:
+        await self.acquire(client)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            self._run_seconds = 0.8 * self._run_seconds + 0.2 * elapsed
+            self.release()
+
+    async def _run(self, fn: Callable[[], Awaitable[T]], client: Hashable) -> T:
+        async with self.slot(client):
+            return await fn()
+
+    async def run(
+        self,
+        fn: Callable[[], Awaitable[T]],
+        client: Hashable = None,
+        key: Hashable | None = None,
+    ) -> T:
+        """
+        Run `fn` once admitted. With a key, callers arriving while a run for
+        the same key is queued or running wait for that run's result instead
+        of starting their own; the run continues if its first caller leaves.
+        Such callers take no slot, so they are never rejected, and their
+        wait is recorded in CHAT_COALESCED_WAIT rather than CHAT_QUEUE_WAIT.
+        """
+        if key is None:
+            return await self._run(fn, client)
+        shared = self._in_flight.get(key)
+        if shared is None:
+            shared = asyncio.ensure_future(self._run(fn, client))
+            self._in_flight[key] = shared
+            shared.add_done_callback(lambda done: self._finished(key, done))
+            return await asyncio.shield(shared)
+        self.coalesced += 1
+        start = time.monotonic()
+        try:
+            return await asyncio.shield(shared)
+        finally:
+            CHAT_COALESCED_WAIT.observe(time.monotonic() - start)
+
+    def _finished(self, key: Hashable, done: asyncio.Future[Any]):
+        if self._in_flight.get(key) is done:
+            del self._in_flight[key]
+        if not done.cancelled():
+            # Mark the error retrieved even if every caller has gone
+            done.exception()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "running": self.running,
+            "queued": self.queued,
+            "clients_waiting": len(self._waiting),
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "coalesced": self.coalesced,
+        }
+
+
+class Slots:
+    """A semaphore that counts its holders and waiters, for metrics."""
+
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self.in_use = 0
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(self.limit)
+
+    @asynccontextmanager
+    async def hold(self) -> AsyncIterator[None]:
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        self.in_use += 1
+        try:
+            yield
+        finally:
+            self.in_use -= 1
+            self._semaphore.release()
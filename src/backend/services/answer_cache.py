@@ -0,0 +1,175 @@
+import logging
+import re
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Turns a batch of texts into one embedding row per text
+EmbedFn = Callable[[list[str]], Awaitable[np.ndarray]]
+
+
+# IDs and names a question is about: alert-001, vm-01, resource ID paths
+ENTITY = re.compile(r"/\S+|[\w.]+(?:-[\w.]+)+")
+
+
+def normalize_query(query: str) -> str:
+    """Case-fold, collapse whitespace and drop trailing punctuation."""
+    return re.sub(r"\s+", " ", query).strip().lower().rstrip("?!. ")
+
+
+def query_entities(query: str) -> frozenset[str]:
+    """The alert IDs, resource names and paths named in a normalized query."""
+    return frozenset(m.rstrip(",;:?!.") for m in ENTITY.findall(query))
+
+
+@dataclass
+class CachedAnswer:
+    version: str
+    expires: float
+    answer: str
+    vector: np.ndarray | None = None
+    entities: frozenset[str] = frozenset()
+
+
+class AnswerCache:
+    """
+    Cache of chat answers keyed on the normalized question and a data version.
+    Exact matches are served first. When an embedding function is given,
+    a question whose embedding is close enough to a cached one (cosine
+    similarity at or above the threshold) is served from that entry too,
+    but only if both name the same alert IDs and resources: "Why is vm-01
+    slow?" embeds close to "Why is vm-02 slow?" and must not share its
+    answer.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl: float = 600.0,
+        embed: EmbedFn | None = None,
+        similarity: float = 0.92,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.embed = embed
+        self.similarity = similarity
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, CachedAnswer] = OrderedDict()
+        # Stacked unit vectors of the entries that have one, rebuilt lazily
+        self._index: tuple[list[str], np.ndarray] | None = None
+        # Embeddings computed on a miss, reused when the answer is stored
+        self._pending: OrderedDict[str, np.ndarray] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _live(self, key: str, version: str) -> CachedAnswer | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.version != version or time.monotonic() >= entry.expires:
+            del self._entries[key]
+            self._index = None
+            return None
+        return entry
+
+    async def _embed(self, text: str) -> np.ndarray | None:
+        if self.embed is None:
+            return None
+        try:
+            vector = np.asarray((await self.embed([text]))[0], dtype=np.float32)
+        except Exception as e:
+            # The exact tier keeps working if the embedding service is down
+            logger.warning(f"Error embedding query for the answer cache: {e}")
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _nearest(
+        self, vector: np.ndarray, version: str, entities: frozenset[str]
+    ) -> str | None:
+        if self._index is None:
+            vectors = {
+                k: e.vector for k, e in self._entries.items() if e.vector is not None
+            }
+            matrix = (
+                np.stack(list(vectors.values()))
+                if vectors
+                else np.zeros((0, len(vector)), dtype=np.float32)
+            )
+            self._index = (list(vectors), matrix)
+        keys, matrix = self._index
+        if not keys:
+            return None
+        scores = matrix @ vector
+        for i in np.argsort(-scores):
+            if scores[i] < self.similarity:
+                break
+            # Skip entries that have expired, were computed on older data or
+            # are about other alerts or resources
+            entry = self._live(keys[i], version)
+            if entry is not None and entry.entities == entities:
+                return keys[i]
+        return None
+
+    async def get(self, query: str, version: str) -> tuple[str, str] | None:
+        """Return (answer, "exact" or "semantic") or None on a miss."""
+        key = normalize_query(query)
+        entry = self._live(key, version)
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.answer, "exact"
+
+        vector = await self._embed(key)
+        if vector is not None:
+            self._pending[key] = vector
+            while len(self._pending) > self.max_entries:
+                self._pending.popitem(last=False)
+            match = self._nearest(vector, version, query_entities(key))
+            if match is not None:
+                self._entries.move_to_end(match)
+                self.semantic_hits += 1
+                return self._entries[match].answer, "semantic"
+
+        self.misses += 1
+        return None
+
+    async def put(self, query: str, version: str, answer: str):
+        if self.max_entries <= 0 or not answer:
+            return
+        key = normalize_query(query)
+        vector = self._pending.pop(key, None)
+        if vector is None:
+            vector = await self._embed(key)
+        self._entries[key] = CachedAnswer(
+            version, time.monotonic() + self.ttl, answer, vector, query_entities(key)
+        )
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._index = None
+
+    def clear(self):
+        self._entries.clear()
+        self._pending.clear()
+        self._index = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "semantic": self.embed is not None,
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,183 @@
+import asyncio
+from collections import deque
+from collections.abc import Hashable
+from dataclasses import dataclass, field
+from typing import Any
+
+from semantic_kernel.contents import (
+    AuthorRole,
+    ChatHistory,
+    ChatMessageContent,
+    FunctionCallContent,
+    FunctionResultContent,
+)
+from services.ttl_cache import TTLCache  # type: ignore
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: about four characters per token."""
+    return len(text) // 4 + 1
+
+
+def message_tokens(message: ChatMessageContent) -> int:
+    tokens = estimate_tokens(message.content or "")
+    for item in message.items:
+        if isinstance(item, FunctionCallContent):
+            tokens += estimate_tokens(f"{item.name}{item.arguments}")
+        elif isinstance(item, FunctionResultContent):
+            tokens += estimate_tokens(str(item.result))
+    return tokens
+
+
+def shorten(text: str, tokens: int) -> str:
+    """Cut text to about `tokens` tokens."""
+    limit = tokens * 4
+    if len(text) <= limit:
+        return text
+    return text[:limit].rstrip() + " …"
+
+
+@dataclass
+class Turn:
+    """One question and everything it added to the chat history."""
+
+    question: str
+    answer: str
+    tools: list[str]
+    messages: list[ChatMessageContent]
+    tokens: int = field(init=False)
+
+    def __post_init__(self):
+        self.tokens = sum(message_tokens(m) for m in self.messages)
+
+    def summary(self) -> str:
+        tools = f" [tools: {', '.join(self.tools)}]" if self.tools else ""
+        return f"- Q: {shorten(self.question, 40)}{tools} A: {shorten(self.answer, 60)}"
+
+
+class Conversation:
+    """
+    One chat session. Recent turns are replayed verbatim, tool calls and
+    results included, while they fit in `budget` tokens; older turns are
+    compacted into one-line summaries, of which the newest that fit in
+    `summary_budget` tokens are kept. Tool results longer than
+    `tool_result_tokens` are cut before they are kept, so the prompt stays
+    bounded however long the conversation runs.
+    """
+
+    def __init__(
+        self,
+        budget: int = 4000,
+        summary_budget: int = 500,
+        tool_result_tokens: int = 1500,
+        max_tool_results: int = 64,
+    ):
+        self.budget = budget
+        self.summary_budget = summary_budget
+        self.tool_result_tokens = tool_result_tokens
+        self.turns: deque[Turn] = deque()
+        self.summaries: deque[str] = deque()
+        # Full tool results fetched in this session, per data version
+        self.tool_results = TTLCache(max_entries=max_tool_results, ttl=float("inf"))
+        # Turns of one session run one at a time
+        self.lock = asyncio.Lock()
+
+    @property
+    def tokens(self) -> int:
+        return sum(t.tokens for t in self.turns) + sum(
+            estimate_tokens(s) for s in self.summaries
+        )
+
+    def history(self) -> ChatHistory:
+        """Chat history to start the next turn from."""
+        history = ChatHistory()
+        if self.summaries:
+            history.add_system_message(
+                "Earlier in this conversation:\n" + "\n".join(self.summaries)
+            )
+        for turn in self.turns:
+            for message in turn.messages:
+                history.add_message(message)
+        return history
+
+    def add_turn(self, messages: list[ChatMessageContent]):
+        """Keep the messages of a finished turn, compacting older turns."""
+        question = answer = ""
+        tools = []
+        for message in messages:
+            if message.role == AuthorRole.USER and not question:
+                question = message.content or ""
+            elif message.role == AuthorRole.ASSISTANT and message.content:
+                answer = message.content
+            for item in message.items:
+                if isinstance(item, FunctionCallContent):
+                    tools.append(item.function_name)
+                elif isinstance(item, FunctionResultContent):
+                    result = str(item.result)
+                    if estimate_tokens(result) > self.tool_result_tokens:
+                        item.result = shorten(result, self.tool_result_tokens)
+        self.turns.append(Turn(question, answer, tools, messages))
+
+        while self.turns and sum(t.tokens for t in self.turns) > self.budget:
+            self.summaries.append(self.turns.popleft().summary())
+        while (
+            self.summaries
+            and sum(estimate_tokens(s) for s in self.summaries) > self.summary_budget
+        ):
+            self.summaries.popleft()
+
+    def tool_result(self, key: Hashable, version: str) -> str | None:
+        return self.tool_results.get(key, version)
+
+    def remember_tool_result(self, key: Hashable, version: str, result: str):
+        self.tool_results.put(key, result, version)
+
+
+class ConversationStore:
+    """Conversations by session ID, dropped when idle for `ttl` seconds."""
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        ttl: float = 3600.0,
+        budget: int = 4000,
+        summary_budget: int = 500,
+        tool_result_tokens: int = 1500,
+    ):
+        self.settings: dict[str, Any] = {
+            "budget": budget,
+            "summary_budget": summary_budget,
+            "tool_result_tokens": tool_result_tokens,
+        }
+        self.sessions = TTLCache(max_entries=max_sessions, ttl=ttl)
+        self.tool_hits = 0
+        self.tool_misses = 0
+
+    def get(self, session_id: str) -> Conversation:
+        """The session's conversation, or a new one."""
+        conversation = self.sessions.get(session_id)
+        if conversation is None:
+            conversation = Conversation(**self.settings)
+            self.sessions.put(session_id, conversation)
+        return conversation
+
+    def save(self, session_id: str, conversation: Conversation):
+        """Store the conversation again, restarting its idle timeout."""
+        self.sessions.put(session_id, conversation)
+
+    def delete(self, session_id: str) -> bool:
+        return self.sessions.discard(session_id)
+
+    def stats(self) -> dict[str, Any]:
+        sessions = self.sessions.stats()
+        return {
+            "entries": sessions["entries"],
+            "max_entries": sessions["max_entries"],
+            "ttl": sessions["ttl"],
+            # Sessions resumed vs started
+            "hits": sessions["hits"],
+            "misses": sessions["misses"],
+            "tool_hits": self.tool_hits,
+            "tool_misses": self.tool_misses,
+            **self.settings,
+        }
@@ -0,0 +1,183 @@
+import json
+import logging
+import re
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Runs an MCP tool by name with keyword arguments and returns its text
+CallTool = Callable[..., Awaitable[str]]
+
+# Words that say nothing about which tool a question needs
+FILLER = frozenset(
+    "a an the for of on in at to me my please can could would you i "
+    "is what what's whats show give get tell about details".split()
+)
+PUNCTUATION = ",;:?!.()\"'`"
+
+
+def words_of(query: str) -> list[str]:
+    """The words of a query, stripped of surrounding punctuation."""
+    words = (word.strip(PUNCTUATION) for word in query.split())
+    return [word for word in words if word]
+
+
+def fields(text: str) -> dict[str, str]:
+    """'Key: value' lines of a tool result, keyed like 'metric_value'."""
+    values = {}
+    for line in text.splitlines():
+        key, sep, value = line.partition(":")
+        if sep and value.strip():
+            values[key.strip().lower().replace(" ", "_")] = value.strip()
+    return values
+
+
+def flatten(value: Any, prefix: str = "") -> dict[str, Any]:
+    """Nested objects as dotted keys, e.g. properties.hardwareProfile.vmSize."""
+    if not isinstance(value, dict):
+        return {prefix: value}
+    flat: dict[str, Any] = {}
+    for key, item in value.items():
+        flat.update(flatten(item, f"{prefix}.{key}" if prefix else key))
+    return flat
+
+
+ALERT_TEMPLATE = (
+    "**{id}** is a {severity} alert on `{resource}`: {description}. "
+    "The metric value is {metric_value}."
+)
+
+
+def render_alert(alert_id: str, result: str) -> str | None:
+    values = fields(result)
+    values["description"] = values.get("description", "").rstrip(".")
+    try:
+        return ALERT_TEMPLATE.format(**values)
+    except KeyError:
+        return None
+
+
+def render_config(resource: str, result: str) -> str | None:
+    try:
+        config = json.loads(result)
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(config, dict):
+        return None
+    lines = [f"Configuration of `{config.pop('resource_id', resource)}`:"]
+    for key, value in flatten(config).items():
+        if isinstance(value, list):
+            value = ", ".join(str(item) for item in value)
+        lines.append(f"- {key}: {value}")
+    return "\n".join(lines)
+
+
+@dataclass
+class Route:
+    """
+    Questions answered by one tool call. A question matches when it names
+    exactly one `entity` (passed to the tool as `argument`) and uses at
+    least one of the `required` words; its confidence is the share of its
+    words that are the entity, route words or filler.
+    """
+
+    name: str
+    tool: str
+    argument: str
+    entity: re.Pattern[str]
+    required: frozenset[str]
+    keywords: frozenset[str]
+    # (entity, tool result) -> answer, or None if the result is unexpected
+    render: Callable[[str, str], str | None]
+
+    def score(self, words: list[str]) -> tuple[float, str | None]:
+        entities = [i for i, word in enumerate(words) if self.entity.fullmatch(word)]
+        if len(entities) != 1:
+            return 0.0, None
+        rest = [w.lower() for i, w in enumerate(words) if i != entities[0]]
+        if not self.required.intersection(rest):
+            return 0.0, None
+        known = self.required | self.keywords | FILLER
+        explained = 1 + sum(1 for word in rest if word in known)
+        return explained / len(words), words[entities[0]]
+
+
+ROUTES = [
+    Route(
+        name="analyze_alert",
+        tool="analyze_alert",
+        argument="alert_id",
+        entity=re.compile(r"alert-[\w-]+", re.IGNORECASE),
+        required=frozenset({"analyze", "analyse", "alert", "investigate", "explain"}),
+        keywords=frozenset({"check", "describe", "look", "into", "this"}),
+        render=render_alert,
+    ),
+    Route(
+        name="get_resource_config",
+        tool="get_resource_config",
+        argument="resource_id",
+        # Short names like vm-01 or resource ID paths, but not alert IDs
+        entity=re.compile(r"(?!alert-)(?:/\S+|[a-z][\w.]*-[\w.-]+)", re.IGNORECASE),
+        required=frozenset({"config", "configuration", "settings"}),
+        keywords=frozenset({"check", "inspect", "describe", "view", "resource"}),
+        render=render_config,
+    ),
+]
+
+
+class IntentRouter:
+    """
+    Answers questions that map to a single tool call without the model:
+    the best-matching route calls its tool and fills in its template.
+    Questions that match no route, or with a confidence below `threshold`,
+    or whose tool call fails, are left to the agent.
+    """
+
+    def __init__(self, routes: list[Route] | None = None, threshold: float = 0.8):
+        self.routes = ROUTES if routes is None else routes
+        self.threshold = threshold
+        self.misses = 0
+        # Per route: questions answered, and matched but left to the agent
+        self.counts = {route.name: {"hits": 0, "fallbacks": 0} for route in self.routes}
+
+    def match(self, query: str) -> tuple[Route, str, float] | None:
+        """The best route for the query, its entity and the confidence."""
+        words = words_of(query)
+        best = None
+        for route in self.routes:
+            confidence, entity = route.score(words)
+            if entity is not None and (best is None or confidence > best[2]):
+                best = (route, entity, confidence)
+        return best
+
+    async def answer(self, query: str, call_tool: CallTool) -> str | None:
+        """The templated answer, or None to fall back to the agent."""
+        match = self.match(query)
+        if match is None:
+            self.misses += 1
+            return None
+        route, entity, confidence = match
+        counts = self.counts[route.name]
+        if confidence < self.threshold:
+            counts["fallbacks"] += 1
+            return None
+        try:
+            result = await call_tool(route.tool, **{route.argument: entity})
+        except Exception as e:
+            logger.warning(f"Error calling {route.tool} for a routed question: {e}")
+            result = "Error"
+        answer = None if result.startswith("Error") else route.render(entity, result)
+        if answer is None:
+            counts["fallbacks"] += 1
+            return None
+        counts["hits"] += 1
+        return answer
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "threshold": self.threshold,
+            "misses": self.misses,
+            "routes": {name: dict(counts) for name, counts in self.counts.items()},
+        }
@@ -1,31 +1,364 @@
+import asyncio
+import contextvars
+import logging
+import os
+import time
+from collections.abc import AsyncIterator, Iterable
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import mcp.types
 from fastmcp import Client
+from fastmcp.client.messages import MessageHandler
+from fastmcp.client.transports import PythonStdioTransport
+from fastmcp.exceptions import ToolError
+from mcp.shared.exceptions import McpError
+from services.telemetry import TOOL_LATENCY, trace_meta, tracer  # type: ignore
+from services.ttl_cache import TTLCache  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# Idle sessions are pinged before reuse once they have been idle this long
+HEALTH_CHECK_INTERVAL = 30.0
+
+# Data files read by the MCP server, relative to the repo root unless
+# COPILOT_DATA_DIR points both processes somewhere else
+DATA_DIR = os.getenv("COPILOT_DATA_DIR", "data")
+ALERT_DATA = tuple(
+    os.path.join(DATA_DIR, name)
+    for name in ("logs.json", "logs.columns/meta.json", "alerts")
+)
+CONFIG_DATA = (os.path.join(DATA_DIR, "configs.json"),)
+TEMPLATE_DATA = (os.path.join(DATA_DIR, "templates"),)
+
+# Settings the MCP server reads from its environment. Stdio servers only
+# inherit a minimal environment, so these are passed on explicitly.
+SERVER_ENV_PREFIXES = ("COPILOT_", "TOOL_CACHE_", "TOOL_MAX_TOKENS", "OTEL_")
+
+# Tools whose results depend only on their arguments and these data files
+CACHED_TOOL_DATA = {
+    "analyze_alert": ALERT_DATA,
+    "get_resource_config": CONFIG_DATA,
+    "generate_fix": TEMPLATE_DATA,
+}
+
+
+def server_env() -> dict[str, str]:
+    return {k: v for k, v in os.environ.items() if k.startswith(SERVER_ENV_PREFIXES)}
+
+
+def data_version(paths: Iterable[str]) -> str:
+    """Token built from the mtimes and sizes of data files (and directory contents)."""
+    parts = []
+    for path in map(Path, paths):
+        files = sorted(path.iterdir()) if path.is_dir() else [path]
+        for file in files:
+            try:
+                stat = file.stat()
+            except FileNotFoundError:
+                continue
+            parts.append(f"{file.name}:{stat.st_mtime_ns}:{stat.st_size}")
+    return "|".join(parts)
+
+
+class PooledSession:
+    """A warm MCP session backed by its own server process."""
+
+    def __init__(self, mcp_path: str, message_handler: MessageHandler | None = None):
+        self.mcp_path = mcp_path
+        self.message_handler = message_handler
+        self.client: Client | None = None
+        self.broken = False
+        self.last_used = 0.0
+        self._restart_lock = asyncio.Lock()
+
+    async def open(self):
+        transport = PythonStdioTransport(self.mcp_path, env=server_env())
+        client = Client(transport, message_handler=self.message_handler)
+        await client.__aenter__()
+        self.client = client
+        self.broken = False
+        self.last_used = time.monotonic()
+
+    async def close(self):
+        client, self.client = self.client, None
+        if client is None:
+            return
+        try:
+            await client.__aexit__(None, None, None)
+        except Exception as e:
+            logger.warning(f"Error closing MCP session: {e}")
+
+    async def restart(self):
+        """Replace a crashed server process with a fresh one."""
+        async with self._restart_lock:
+            if self.is_healthy():
+                return
+            logger.warning("Restarting MCP session")
+            with tracer.start_as_current_span("mcp.session.restart"):
+                await self.close()
+                await self.open()
+
+    async def check(self):
+        """Ping the server and mark the session broken if it does not answer."""
+        try:
+            assert self.client is not None
+            await asyncio.wait_for(self.client.ping(), timeout=5)
+        except Exception as e:
+            logger.warning(f"MCP session failed health check: {e}")
+            self.broken = True
+
+    def is_healthy(self) -> bool:
+        return (
+            not self.broken and self.client is not None and self.client.is_connected()
+        )
+
+
+class MCPSessionPool:
+    """A fixed-size pool of warm MCP sessions leased out per call."""
+
+    def __init__(
+        self,
+        mcp_path: str,
+        size: int = 2,
+        message_handler: MessageHandler | None = None,
+    ):
+        self.mcp_path = mcp_path
+        self.size = max(1, size)
+        self.message_handler = message_handler
+        self._sessions: list[PooledSession] = []
+        self._idle: asyncio.Queue[PooledSession] = asyncio.Queue()
+        self._lock = asyncio.Lock()
+        self._started = False
+
+    @property
+    def in_use(self) -> int:
+        """Number of sessions currently leased out."""
+        return len(self._sessions) - self._idle.qsize()
+
+    async def start(self):
+        """Open all sessions. Safe to call more than once."""
+        async with self._lock:
+            if self._started:
+                return
+            sessions = [
+                PooledSession(self.mcp_path, self.message_handler)
+                for _ in range(self.size)
+            ]
+            with tracer.start_as_current_span(
+                "mcp.pool.start", attributes={"mcp.pool.size": self.size}
+            ):
+                await asyncio.gather(*(s.open() for s in sessions))
+            self._sessions = sessions
+            self._idle = asyncio.Queue()
+            for session in sessions:
+                self._idle.put_nowait(session)
+            self._started = True
+            logger.info(f"Started MCP session pool with {self.size} sessions")
+
+    async def close(self):
+        """Close all sessions."""
+        async with self._lock:
+            sessions, self._sessions = self._sessions, []
+            self._started = False
+        await asyncio.gather(*(s.close() for s in sessions))
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[PooledSession]:
+        """Borrow a healthy session from the pool and return it afterwards."""
+        if not self._started:
+            await self.start()
+        session = await self._idle.get()
+        try:
+            await self._prepare(session)
+            yield session
+        finally:
+            self._release(session)
+
+    async def _prepare(self, session: PooledSession):
+        if time.monotonic() - session.last_used > HEALTH_CHECK_INTERVAL:
+            await session.check()
+        if not session.is_healthy():
+            await session.restart()
+
+    def _release(self, session: PooledSession):
+        session.last_used = time.monotonic()
+        if session in self._sessions:
+            self._idle.put_nowait(session)
+
+
+class TurnSessions:
+    """
+    Tool calls of one agent turn. Each call leases a pool session only
+    while it runs, so no session is held across the model's rounds;
+    overlapping calls of the turn run on separate sessions, at most
+    `limit` of them at a time.
+    """
+
+    def __init__(self, pool: MCPSessionPool, limit: int):
+        self.pool = pool
+        self.limit = asyncio.Semaphore(max(1, limit))
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[PooledSession]:
+        """A session for one tool call, returned to the pool when it ends."""
+        async with self.limit, self.pool.lease() as session:
+            yield session
+
+
+# Tool calls of the current agent turn (see MCPClient.turn)
+_turn_sessions: contextvars.ContextVar[TurnSessions | None] = contextvars.ContextVar(
+    "mcp_turn_sessions", default=None
+)
+
+
+class _ToolListWatcher(MessageHandler):
+    """Invalidates the cached tool list when the server announces a change."""
+
+    def __init__(self, owner: "MCPClient"):
+        self.owner = owner
+
+    async def on_tool_list_changed(
+        self, message: mcp.types.ToolListChangedNotification
+    ):
+        self.owner.invalidate_tools()
 
 
 class MCPClient:
-    def __init__(self):
+    def __init__(self) -> None:
         self.mcp_path = "src/mcp/main.py"
-        self._client = None
+        self.pool = MCPSessionPool(
+            self.mcp_path,
+            size=int(os.getenv("MCP_POOL_SIZE", "2")),
+            message_handler=_ToolListWatcher(self),
+        )
+        # Concurrent tool calls allowed within one agent turn
+        self.turn_concurrency = int(os.getenv("MCP_TURN_CONCURRENCY", "4"))
+        self._tools: list[mcp.types.Tool] | None = None
+        # Bumped whenever the server's tool list changes
+        self.tools_version = 0
+        self.cache = TTLCache(
+            max_entries=int(os.getenv("TOOL_CACHE_SIZE", "1024")),
+            ttl=float(os.getenv("TOOL_CACHE_TTL", "300")),
+        )
+
+    async def start(self):
+        """Open the session pool (called at application startup)."""
+        await self.pool.start()
+
+    async def close(self):
+        """Close the session pool (called at application shutdown)."""
+        await self.pool.close()
+
+    @asynccontextmanager
+    async def turn(self) -> AsyncIterator[TurnSessions]:
+        """
+        Group the tool calls made inside this block into one agent turn,
+        capping how many of them run at once. Sessions are leased per
+        call, not for the whole block.
+        """
+        turn = _turn_sessions.get()
+        if turn is not None:
+            yield turn
+            return
+        turn = TurnSessions(self.pool, self.turn_concurrency)
+        token = _turn_sessions.set(turn)
+        try:
+            yield turn
+        finally:
+            _turn_sessions.reset(token)
 
-    async def _get_client(self):
-        """Get or create the MCP client."""
-        if self._client is None:
-            self._client = Client(self.mcp_path)
-        return self._client
+    async def _call(self, session: PooledSession, tool_name: str, kwargs: dict):
+        if session.client is None:
+            await session.restart()
+        assert session.client is not None
+        # The trace context travels in the request metadata to the server
+        result = await session.client.call_tool(
+            tool_name, arguments=kwargs, meta=trace_meta()
+        )
+        # Extract the text content from the result
+        if hasattr(result, "content") and result.content:
+            return "\n".join(
+                item.text for item in result.content if hasattr(item, "text")
+            )
+        return str(result)
 
     async def execute(self, tool_name: str, **kwargs):
-        """Execute a tool via the MCP client."""
-        client = await self._get_client()
-        async with client:
-            result = await client.call_tool(tool_name, arguments=kwargs)
-            # Extract the text content from the result
-            if hasattr(result, "content") and result.content:
-                return "\n".join(
-                    item.text for item in result.content if hasattr(item, "text")
+        """Execute a tool via the MCP client, serving pure lookups from cache."""
+        start = time.perf_counter()
+        outcome = "error"
+        with tracer.start_as_current_span(
+            "mcp.call_tool", attributes={"mcp.tool": tool_name}
+        ) as span:
+            try:
+                if tool_name not in CACHED_TOOL_DATA:
+                    result = await self._execute(tool_name, kwargs)
+                else:
+                    key = (
+                        tool_name,
+                        tuple(sorted((k, str(v).strip()) for k, v in kwargs.items())),
+                    )
+                    version = data_version(CACHED_TOOL_DATA[tool_name])
+                    result = self.cache.get(key, version)
+                    span.set_attribute("cache.hit", result is not None)
+                    if result is None:
+                        result = await self._execute(tool_name, kwargs)
+                        if not result.startswith("Error"):
+                            self.cache.put(key, result, version)
+                    else:
+                        outcome = "cached"
+                if outcome != "cached":
+                    outcome = "error" if result.startswith("Error") else "ok"
+                return result
+            finally:
+                TOOL_LATENCY.labels(tool_name, outcome).observe(
+                    time.perf_counter() - start
                 )
-            return str(result)
+
+    async def _execute(self, tool_name: str, kwargs: dict):
+        async with self.turn() as turn, turn.acquire() as session:
+            return await self._call_with_retry(session, tool_name, kwargs)
+
+    async def _call_with_retry(
+        self, session: PooledSession, tool_name: str, kwargs: dict
+    ):
+        try:
+            return await self._call(session, tool_name, kwargs)
+        except (ToolError, McpError):
+            raise
+        except Exception as e:
+            # Transport failure: the server process crashed, so restart it
+            # and retry the call once
+            logger.warning(f"MCP session failed during {tool_name}: {e}")
+            session.broken = True
+            await session.restart()
+            return await self._call(session, tool_name, kwargs)
+
+    async def read_resource(self, uri: str) -> str:
+        """Read a text resource from the MCP server."""
+        async with self.pool.lease() as session:
+            if session.client is None:
+                await session.restart()
+            assert session.client is not None
+            contents = await session.client.read_resource(uri)
+        return "\n".join(c.text for c in contents if hasattr(c, "text"))
+
+    def invalidate_tools(self):
+        """Forget the cached tool list so the next list_tools call refetches it."""
+        self._tools = None
+        self.tools_version += 1
 
     async def list_tools(self):
-        """List all available tools."""
-        client = await self._get_client()
-        async with client:
-            return await client.list_tools()
+        """List all available tools, cached until the server's tool list changes."""
+        if self._tools is not None:
+            return self._tools
+        with tracer.start_as_current_span("mcp.list_tools"):
+            return await self._list_tools()
+
+    async def _list_tools(self):
+        async with self.pool.lease() as session:
+            if session.client is None:
+                await session.restart()
+            assert session.client is not None
+            self._tools = await session.client.list_tools()
+        return self._tools
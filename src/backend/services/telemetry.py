@@ -0,0 +1,212 @@
+import logging
+import os
+from collections.abc import Callable, Iterator
+from typing import Any
+
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    SimpleSpanProcessor,
+    SpanExporter,
+)
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import REGISTRY, CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+logger = logging.getLogger(__name__)
+
+tracer = trace.get_tracer("azure-ops-copilot")
+
+# Latency buckets (seconds) spanning cached answers to long agent runs
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+CHAT_LATENCY = Histogram(
+    "copilot_chat_duration_seconds",
+    "End-to-end chat request latency.",
+    ["endpoint", "cache"],
+    buckets=LATENCY_BUCKETS,
+)
+TOOL_LATENCY = Histogram(
+    "copilot_tool_duration_seconds",
+    "MCP tool call latency as seen by the backend.",
+    ["tool", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+CHAT_QUEUE_WAIT = Histogram(
+    "copilot_chat_queue_wait_seconds",
+    "Time a chat request waited for a run slot.",
+    buckets=LATENCY_BUCKETS,
+)
+CHAT_COALESCED_WAIT = Histogram(
+    "copilot_chat_coalesced_wait_seconds",
+    "Time a chat request waited for the identical request it was coalesced with.",
+    buckets=LATENCY_BUCKETS,
+)
+LLM_FIRST_TOKEN = Histogram(
+    "copilot_llm_first_token_seconds",
+    "Time from the start of a streamed answer to its first token.",
+    buckets=LATENCY_BUCKETS,
+)
+LLM_TOKENS = Counter(
+    "copilot_llm_tokens_total",
+    "Tokens reported by the chat completion service.",
+    ["kind"],
+)
+
+
+# Installed by the first setup_tracing call; OpenTelemetry allows only one
+_provider: TracerProvider | None = None
+# Registered by register_stats; replaced if it is called again
+_stats_collector: Collector | None = None
+
+
+def setup_tracing(exporter: SpanExporter | None = None) -> TracerProvider:
+    """
+    Install a tracer provider for the backend, once; later calls reuse it.
+    Spans go to OTLP over HTTP when OTEL_EXPORTER_OTLP_ENDPOINT is set, and
+    to the given exporter (e.g. an in-memory one in tests) if there is one.
+    """
+    global _provider
+    if _provider is None:
+        _provider = TracerProvider(
+            resource=Resource.create(
+                {"service.name": os.getenv("OTEL_SERVICE_NAME", "azure-ops-copilot")}
+            )
+        )
+        if os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+                OTLPSpanExporter,
+            )
+
+            _provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+        trace.set_tracer_provider(_provider)
+    if exporter is not None:
+        _provider.add_span_processor(SimpleSpanProcessor(exporter))
+    return _provider
+
+
+def trace_meta() -> dict[str, Any]:
+    """Current trace context as MCP request metadata (W3C traceparent)."""
+    carrier: dict[str, Any] = {}
+    propagate.inject(carrier)
+    return carrier
+
+
+def record_usage(metadata: dict[str, Any] | None):
+    """Count prompt/completion tokens from a chat message's usage metadata."""
+    usage = (metadata or {}).get("usage")
+    if usage is None:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        count = getattr(usage, kind, None)
+        if count:
+            LLM_TOKENS.labels(kind.removesuffix("_tokens")).inc(count)
+
+
+class StatsCollector(Collector):
+    """
+    Exposes counters kept elsewhere (cache stats, pool usage, admission
+    queue, intent router) at scrape time, so the hot paths do not have to
+    update two sets of counters.
+    """
+
+    def __init__(
+        self,
+        caches: dict[str, Callable[[], dict[str, Any]]],
+        pool: Callable[[], tuple[int, int]],
+        admission: Callable[[], dict[str, Any]] | None = None,
+        llm: Callable[[], tuple[int, int]] | None = None,
+        router: Callable[[], dict[str, Any]] | None = None,
+    ):
+        self.caches = caches
+        self.pool = pool
+        self.admission = admission
+        self.llm = llm
+        self.router = router
+
+    def collect(self) -> Iterator[Any]:
+        requests = CounterMetricFamily(
+            "copilot_cache_requests",
+            "Cache lookups by cache and result.",
+            labels=["cache", "result"],
+        )
+        entries = GaugeMetricFamily(
+            "copilot_cache_entries", "Entries held per cache.", labels=["cache"]
+        )
+        for name, stats in self.caches.items():
+            values = stats()
+            for result in ("hits", "semantic_hits", "misses"):
+                if result in values:
+                    requests.add_metric([name, result], values[result])
+            entries.add_metric([name], values["entries"])
+        yield requests
+        yield entries
+
+        in_use, size = self.pool()
+        pool = GaugeMetricFamily(
+            "copilot_mcp_pool_sessions", "MCP pool sessions.", labels=["state"]
+        )
+        pool.add_metric(["in_use"], in_use)
+        pool.add_metric(["idle"], size - in_use)
+        yield pool
+
+        if self.admission is not None:
+            values = self.admission()
+            chats = GaugeMetricFamily(
+                "copilot_chat_requests", "Chat requests admitted.", labels=["state"]
+            )
+            for state in ("running", "queued"):
+                chats.add_metric([state], values[state])
+            yield chats
+            admissions = CounterMetricFamily(
+                "copilot_chat_admissions",
+                "Chat requests by admission result.",
+                labels=["result"],
+            )
+            for result in ("admitted", "rejected", "coalesced"):
+                admissions.add_metric([result], values[result])
+            yield admissions
+
+        if self.llm is not None:
+            in_use, waiting = self.llm()
+            llm = GaugeMetricFamily(
+                "copilot_llm_requests",
+                "Outbound chat completion requests.",
+                labels=["state"],
+            )
+            llm.add_metric(["in_use"], in_use)
+            llm.add_metric(["waiting"], waiting)
+            yield llm
+
+        if self.router is not None:
+            values = self.router()
+            routed = CounterMetricFamily(
+                "copilot_router_requests",
+                "Chat questions by intent route and result.",
+                labels=["route", "result"],
+            )
+            for route, counts in values["routes"].items():
+                for result in ("hits", "fallbacks"):
+                    routed.add_metric([route, result], counts[result])
+            routed.add_metric(["none", "misses"], values["misses"])
+            yield routed
+
+
+def register_stats(
+    caches: dict[str, Callable[[], dict[str, Any]]],
+    pool: Callable[[], tuple[int, int]],
+    admission: Callable[[], dict[str, Any]] | None = None,
+    llm: Callable[[], tuple[int, int]] | None = None,
+    router: Callable[[], dict[str, Any]] | None = None,
+):
+    """
+    Register the scrape-time collector. Calling it again (e.g. when the app
+    is imported again) replaces the collector instead of failing.
+    """
+    global _stats_collector
+    if _stats_collector is not None:
+        REGISTRY.unregister(_stats_collector)
+    _stats_collector = StatsCollector(caches, pool, admission, llm, router)
+    REGISTRY.register(_stats_collector)
@@ -0,0 +1,61 @@
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+
+class TTLCache:
+    """
+    Bounded LRU cache with a TTL, for use from a single event loop.
+    Entries carry the data version they were computed from; a lookup with
+    a different version drops the entry instead of returning it.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: OrderedDict[Hashable, tuple[str, float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, version: str = "") -> Any | None:
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry_version, expires, value = entry
+            if entry_version == version and time.monotonic() < expires:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+            self.invalidations += 1
+        self.misses += 1
+        return None
+
+    def put(self, key: Hashable, value: Any, version: str = ""):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (version, time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, key: Hashable) -> bool:
+        """Drop an entry; returns whether there was one."""
+        return self._entries.pop(key, None) is not None
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+        }
@@ -1,71 +1,203 @@
+import asyncio
 import json
 import os
-from pathlib import Path
 
 import gradio as gr
+import httpx
 import pandas as pd
-import requests
 
 API_URL = os.getenv("API_URL", "http://localhost:8000")
-DATA_DIR = Path(__file__).parent.parent.parent / "data"
 
+# Answers can take a while; connecting to the backend should not
+HTTP_TIMEOUT = httpx.Timeout(connect=5.0, read=120.0, write=10.0, pool=10.0)
+HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+# Gateway errors worth retrying, and the backoff schedule for them
+RETRY_STATUSES = (502, 503)
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.5
 
-def chat(message, history):
-    """Send message to backend and get response."""
-    try:
-        response = requests.post(f"{API_URL}/chat", json={"message": message})
-        response.raise_for_status()
-        return response.json()["response"]
-    except Exception as e:
-        return f"❌ Error: {str(e)}"
+_http_client: httpx.AsyncClient | None = None
 
 
-def load_alerts_data():
-    """Load alerts data from JSON file."""
+def get_http_client() -> httpx.AsyncClient:
+    """Shared client, so connections to the backend are kept alive and reused."""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            base_url=API_URL, timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS
+        )
+    return _http_client
+
+
+async def post_stream(path, payload):
+    """
+    POST and return the streaming response, retrying with exponential
+    backoff on 502/503 and on connection failures. Requests that may have
+    reached the backend are not retried.
+    """
+    client = get_http_client()
+    for attempt in range(MAX_RETRIES + 1):
+        last_attempt = attempt == MAX_RETRIES
+        try:
+            response = await client.send(
+                client.build_request("POST", path, json=payload), stream=True
+            )
+        except (httpx.ConnectError, httpx.ConnectTimeout):
+            if last_attempt:
+                raise
+        else:
+            if response.status_code not in RETRY_STATUSES or last_attempt:
+                if response.is_error:
+                    await response.aclose()
+                    response.raise_for_status()
+                return response
+            await response.aclose()
+        await asyncio.sleep(RETRY_BACKOFF * 2**attempt)
+    raise RuntimeError("unreachable")
+
+
+async def iter_sse(lines):
+    """Parse Server-Sent Events lines into (event, data) pairs."""
+    event, data = "message", []
+    async for line in lines:
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+        elif line.startswith("event:"):
+            event = line[len("event:") :].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:") :].strip())
+
+
+def render_progress(tools, answer):
+    """Render tool progress lines above the streamed answer."""
+    if not tools:
+        return answer
+    return "\n".join(tools) + "\n\n" + answer
+
+
+async def chat(message, history, request: gr.Request):
+    """
+    Send message to backend and stream the response as it arrives.
+    The browser session is the backend conversation, so follow-up
+    questions keep their context.
+    """
     try:
-        alerts_file = DATA_DIR / "logs.json"
-        if alerts_file.exists():
-            with open(alerts_file, "r") as f:
-                alerts = json.load(f)
-            # Convert to DataFrame for better display
-            df = pd.DataFrame(alerts)
-            # Reorder columns for better readability
-            columns = [
-                "id",
-                "severity",
-                "description",
-                "resource_id",
-                "status",
-                "created_at",
-            ]
-            df = df[columns]
-            return df
-        return pd.DataFrame()
+        response = await post_stream(
+            "/chat/stream", {"message": message, "session_id": request.session_hash}
+        )
+        try:
+            tools = []
+            answer = ""
+            async for event, data in iter_sse(response.aiter_lines()):
+                if event == "token":
+                    answer += data["content"]
+                elif event == "tool_started":
+                    tools.append(f"⏳ Running `{data['tool']}`...")
+                elif event == "tool_finished":
+                    # Mark the earliest still-running call of this tool as done
+                    icon = "✅" if data["ok"] else "⚠️"
+                    line = f"{icon} `{data['tool']}` ({data['duration_ms']:.0f} ms)"
+                    running = f"⏳ Running `{data['tool']}`..."
+                    if running in tools:
+                        tools[tools.index(running)] = line
+                    else:
+                        tools.append(line)
+                elif event == "done":
+                    answer = data["response"]
+                elif event == "error":
+                    answer = f"❌ Error: {data['detail']}"
+                yield render_progress(tools, answer)
+        finally:
+            await response.aclose()
     except Exception as e:
-        return pd.DataFrame({"Error": [str(e)]})
+        yield f"❌ Error: {str(e)}"
 
 
-def load_configs_data():
-    """Load resource configs data from JSON file."""
+async def end_chat_session(request: gr.Request):
+    """Start the next question afresh once the chat has been cleared."""
     try:
-        configs_file = DATA_DIR / "configs.json"
-        if configs_file.exists():
-            with open(configs_file, "r") as f:
-                configs = json.load(f)
-            # Flatten the data for better display
-            flattened = []
-            for config in configs:
-                flat = {
-                    "resource_id": config["resource_id"],
-                    "type": config["type"],
-                    "location": config["location"],
-                    "compliance_status": config["compliance_status"],
-                }
-                flattened.append(flat)
-            return pd.DataFrame(flattened)
-        return pd.DataFrame()
-    except Exception as e:
-        return pd.DataFrame({"Error": [str(e)]})
+        await get_http_client().delete(f"/chat/sessions/{request.session_hash}")
+    except httpx.HTTPError:
+        pass
+
+
+# Rows per dashboard page and how often the visible page is re-checked
+PAGE_SIZE = 25
+REFRESH_SECONDS = 10
+
+ALERT_COLUMNS = ["id", "severity", "description", "resource_id", "status", "created_at"]
+CONFIG_COLUMNS = ["resource_id", "type", "location", "compliance_status"]
+
+
+async def fetch_page(path, filters, cursor, etag=None):
+    """
+    Fetch one page of a backend listing.
+    Returns (page, etag), or (None, etag) if the page has not changed.
+    """
+    params = {name: value for name, value in filters.items() if value}
+    params["limit"] = PAGE_SIZE
+    if cursor:
+        params["cursor"] = cursor
+    headers = {"If-None-Match": etag} if etag else {}
+    response = await get_http_client().get(path, params=params, headers=headers)
+    if response.status_code == 304:
+        return None, etag
+    response.raise_for_status()
+    return response.json(), response.headers.get("ETag")
+
+
+def paged_table(path, columns, filter_names):
+    """
+    Build the handlers of a lazily paged table. The state keeps the
+    active filters, the cursors of the pages visited so far (for going
+    back), the next cursor and the ETag of the visible page.
+    """
+
+    async def show(state):
+        try:
+            page, etag = await fetch_page(
+                path, state["filters"], state["cursors"][-1], state["etag"]
+            )
+        except Exception as e:
+            return pd.DataFrame({"Error": [str(e)]}), "", state
+        if page is None:
+            return gr.skip(), gr.skip(), state
+
+        state = {**state, "etag": etag, "next": page["next_cursor"]}
+        first = (len(state["cursors"]) - 1) * PAGE_SIZE
+        info = (
+            f"Rows {first + 1}–{first + page['returned']} of {page['total']}"
+            if page["returned"]
+            else "No matching rows"
+        )
+        return pd.DataFrame(page["items"], columns=columns), info, state
+
+    async def apply_filters(*values):
+        filters = dict(zip(filter_names, values))
+        return await show(
+            {"filters": filters, "cursors": [""], "next": None, "etag": None}
+        )
+
+    async def next_page(state):
+        if not state["next"]:
+            return gr.skip(), gr.skip(), state
+        cursors = state["cursors"] + [state["next"]]
+        return await show({**state, "cursors": cursors, "etag": None})
+
+    async def previous_page(state):
+        if len(state["cursors"]) < 2:
+            return gr.skip(), gr.skip(), state
+        return await show({**state, "cursors": state["cursors"][:-1], "etag": None})
+
+    async def refresh(state):
+        # Sends the ETag, so an unchanged page costs a 304 and no re-render
+        if state is None:
+            return gr.skip(), gr.skip(), state
+        return await show(state)
+
+    return apply_filters, next_page, previous_page, refresh
 
 
 # Custom CSS for beautiful styling
@@ -197,6 +329,7 @@ with gr.Blocks(
                     ),
                 ),
             )
+            chatbot.chatbot.clear(end_chat_session)
 
         # Sample Data Tab - Alerts
         with gr.Tab("📊 Sample Data: Alerts", id=1):
@@ -208,13 +341,55 @@ with gr.Blocks(
                 """
             )
 
-            alerts_df = load_alerts_data()
-            gr.Dataframe(
-                value=alerts_df,
+            with gr.Row():
+                alert_severity = gr.Dropdown(
+                    ["", "Critical", "Warning", "Informational"],
+                    value="",
+                    label="Severity",
+                )
+                alert_status = gr.Dropdown(
+                    ["", "New", "Acknowledged", "Closed"], value="", label="Status"
+                )
+                alert_prefix = gr.Textbox(label="Resource ID starts with")
+                alert_sort = gr.Dropdown(
+                    ["-created_at", "created_at", "severity", "resource_id"],
+                    value="-created_at",
+                    label="Sort",
+                )
+            alerts_table = gr.Dataframe(
+                headers=ALERT_COLUMNS,
                 interactive=False,
                 wrap=True,
                 column_widths=["10%", "10%", "30%", "35%", "8%", "15%"],
             )
+            with gr.Row():
+                alerts_previous = gr.Button("◀ Previous", size="sm")
+                alerts_info = gr.Markdown()
+                alerts_next = gr.Button("Next ▶", size="sm")
+            alerts_state = gr.State()
+
+            alert_filters = [alert_severity, alert_status, alert_prefix, alert_sort]
+            alert_outputs = [alerts_table, alerts_info, alerts_state]
+            apply_alerts, next_alerts, previous_alerts, refresh_alerts = paged_table(
+                "/alerts",
+                ALERT_COLUMNS,
+                ["severity", "status", "resource_prefix", "sort"],
+            )
+            gr.on(
+                [
+                    alert_severity.change,
+                    alert_status.change,
+                    alert_prefix.submit,
+                    alert_sort.change,
+                ],
+                apply_alerts,
+                alert_filters,
+                alert_outputs,
+            )
+            alerts_next.click(next_alerts, alerts_state, alert_outputs)
+            alerts_previous.click(previous_alerts, alerts_state, alert_outputs)
+            demo.load(apply_alerts, alert_filters, alert_outputs)
+            gr.Timer(REFRESH_SECONDS).tick(refresh_alerts, alerts_state, alert_outputs)
 
             gr.Markdown(
                 """
@@ -235,13 +410,49 @@ with gr.Blocks(
                 """
             )
 
-            configs_df = load_configs_data()
-            gr.Dataframe(
-                value=configs_df,
+            with gr.Row():
+                config_compliance = gr.Dropdown(
+                    ["", "Compliant", "NonCompliant"], value="", label="Compliance"
+                )
+                config_location = gr.Textbox(label="Location")
+                config_prefix = gr.Textbox(label="Resource ID starts with")
+            configs_table = gr.Dataframe(
+                headers=CONFIG_COLUMNS,
                 interactive=False,
                 wrap=True,
                 column_widths=["50%", "25%", "12%", "13%"],
             )
+            with gr.Row():
+                configs_previous = gr.Button("◀ Previous", size="sm")
+                configs_info = gr.Markdown()
+                configs_next = gr.Button("Next ▶", size="sm")
+            configs_state = gr.State()
+
+            config_filters = [config_compliance, config_location, config_prefix]
+            config_outputs = [configs_table, configs_info, configs_state]
+            apply_configs, next_configs, previous_configs, refresh_configs = (
+                paged_table(
+                    "/configs",
+                    CONFIG_COLUMNS,
+                    ["compliance_status", "location", "resource_prefix"],
+                )
+            )
+            gr.on(
+                [
+                    config_compliance.change,
+                    config_location.submit,
+                    config_prefix.submit,
+                ],
+                apply_configs,
+                config_filters,
+                config_outputs,
+            )
+            configs_next.click(next_configs, configs_state, config_outputs)
+            configs_previous.click(previous_configs, configs_state, config_outputs)
+            demo.load(apply_configs, config_filters, config_outputs)
+            gr.Timer(REFRESH_SECONDS).tick(
+                refresh_configs, configs_state, config_outputs
+            )
 
             gr.Markdown(
                 """
@@ -0,0 +1,135 @@
+import re
+
+import numpy as np
+from columns import AlertColumns
+
+# Group-by names accepted by summarize_alerts and the columns they map to
+GROUP_COLUMNS = {
+    "severity": "severity",
+    "status": "status",
+    "resource": "resource_id",
+    "resource_id": "resource_id",
+    "description": "description",
+}
+
+BUCKET_UNITS = {"m": 60, "h": 3600, "d": 86400}
+
+# Keep group tables small enough for the model to read
+MAX_GROUP_ROWS = 50
+
+
+def parse_bucket(bucket: str) -> int:
+    """Parse a bucket width such as '15m', '1h' or '1d' into seconds."""
+    match = re.fullmatch(r"(\d+)\s*([mhd])", bucket.strip().lower())
+    if not match:
+        raise ValueError(f"Invalid bucket '{bucket}', expected e.g. 15m, 1h or 1d")
+    return int(match.group(1)) * BUCKET_UNITS[match.group(2)]
+
+
+def table(headers: list[str], rows: list[list]) -> str:
+    """Render a small markdown table."""
+    lines = ["| " + " | ".join(headers) + " |", "|" + "---|" * len(headers)]
+    lines.extend("| " + " | ".join(str(v) for v in row) + " |" for row in rows)
+    return "\n".join(lines)
+
+
+def group_counts(
+    columns: AlertColumns, group_by: list[str], mask: np.ndarray
+) -> list[list]:
+    """Count alerts per combination of the group-by columns, largest first."""
+    encoded = [getattr(columns, GROUP_COLUMNS[name]) for name in group_by]
+    sizes = [max(1, len(column.values)) for column in encoded]
+
+    # Fold the per-column codes into one integer key per row and count with
+    # bincount; fall back to a sort-based unique if the key space is huge
+    if np.prod(sizes, dtype=float) <= 1 << 24:
+        key = np.zeros(int(mask.sum()), dtype=np.int64)
+        for column, size in zip(encoded, sizes):
+            key = key * size + column.codes[mask]
+        counts = np.bincount(key, minlength=int(np.prod(sizes)))
+        keys = np.flatnonzero(counts)
+        counts = counts[keys]
+        codes = np.array(np.unravel_index(keys, sizes))
+    else:
+        stacked = np.stack([column.codes[mask] for column in encoded])
+        codes, counts = np.unique(stacked, axis=1, return_counts=True)
+
+    order = np.argsort(-counts, kind="stable")
+    return [
+        [column.values[code] for column, code in zip(encoded, codes[:, i])]
+        + [int(counts[i])]
+        for i in order
+    ]
+
+
+def summarize_alerts(
+    columns: AlertColumns,
+    mask: np.ndarray,
+    group_by: list[str],
+    bucket: str = "",
+    top_n: int = 5,
+) -> str:
+    """Aggregate the selected alerts into a few small tables."""
+    total = int(mask.sum())
+    sections = [f"Alerts matched: {total}"]
+    if total == 0:
+        return sections[0]
+
+    if group_by:
+        rows = group_counts(columns, group_by, mask)
+        section = table([*group_by, "count"], rows[:MAX_GROUP_ROWS])
+        if len(rows) > MAX_GROUP_ROWS:
+            section += f"\n... {len(rows) - MAX_GROUP_ROWS} smaller groups omitted"
+        sections.append(section)
+
+    if bucket:
+        width = parse_bucket(bucket)
+        # created_at is in microseconds; bucket starts are whole seconds
+        starts = columns.created_at[mask] // 1_000_000 // width * width
+        keys, counts = np.unique(starts, return_counts=True)
+        sections.append(
+            table(
+                [f"bucket ({bucket})", "count"],
+                [[np.datetime64(int(k), "s"), int(c)] for k, c in zip(keys, counts)],
+            )
+        )
+
+    if top_n > 0:
+        resources = columns.resource_id
+        per_resource = np.bincount(
+            resources.codes[mask], minlength=len(resources.values)
+        )
+        critical = np.bincount(
+            resources.codes[mask & columns.severity.mask("Critical")],
+            minlength=len(resources.values),
+        )
+        top = np.argsort(-per_resource, kind="stable")[:top_n]
+        sections.append(
+            table(
+                ["noisiest resource", "alerts", "critical"],
+                [
+                    [resources.values[i], int(per_resource[i]), int(critical[i])]
+                    for i in top
+                    if per_resource[i] > 0
+                ],
+            )
+        )
+
+    value = columns.metric_value[mask]
+    overshoot = value - columns.threshold[mask]
+    valid = ~np.isnan(overshoot)
+    if valid.any():
+        p_value = np.percentile(value[valid], [50, 90, 99])
+        p_over = np.percentile(overshoot[valid], [50, 90, 99])
+        sections.append(
+            table(
+                ["metric", "p50", "p90", "p99"],
+                [
+                    ["metric_value", *(round(float(p), 1) for p in p_value)],
+                    ["over threshold", *(round(float(p), 1) for p in p_over)],
+                ],
+            )
+            + f"\nAbove threshold: {float((overshoot[valid] > 0).mean()):.1%}"
+        )
+
+    return "\n\n".join(sections)
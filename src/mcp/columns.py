@@ -0,0 +1,287 @@
+import json
+import os
+import warnings
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+# Numeric columns stored as plain arrays, by name and dtype
+NUMERIC_COLUMNS = {
+    "created_at": np.int64,
+    "metric_value": np.float64,
+    "threshold": np.float64,
+}
+# String columns stored as integer codes plus a dictionary in meta.json
+DICT_COLUMNS = ("severity", "status", "resource_id", "description")
+
+# Epoch value of a missing timestamp (numpy's NaT), before any real time
+NAT = int(np.iinfo(np.int64).min)
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+META_FILE = "meta.json"
+FORMAT_VERSION = 1
+
+
+class DictColumn:
+    """A dictionary-encoded string column: integer codes into a value list."""
+
+    def __init__(self, codes: np.ndarray, values: list[str]):
+        self.codes = codes
+        self.values = values
+        self._lookup = {value: code for code, value in enumerate(values)}
+
+    @classmethod
+    def encode(cls, items: list[str]) -> "DictColumn":
+        values, codes = np.unique(np.asarray(items, dtype=str), return_inverse=True)
+        return cls(codes.astype(np.int32), values.tolist())
+
+    def code_of(self, value: str) -> int:
+        """Code of a value, or -1 if it never occurs."""
+        return self._lookup.get(value, -1)
+
+    def mask(self, value: str) -> np.ndarray:
+        return self.codes == self.code_of(value)
+
+    def ranks(self) -> np.ndarray:
+        """Lexical rank of each code (appended values leave codes unsorted)."""
+        ranks = np.empty(len(self.values), dtype=np.int64)
+        ranks[np.argsort(np.asarray(self.values, dtype=str))] = np.arange(
+            len(self.values)
+        )
+        return ranks
+
+    def concat(self, other: "DictColumn") -> "DictColumn":
+        """Append another column, extending this column's dictionary."""
+        values = list(self.values)
+        lookup = dict(self._lookup)
+        remap = np.zeros(len(other.values), dtype=np.int32)
+        for code, value in enumerate(other.values):
+            if value not in lookup:
+                lookup[value] = len(values)
+                values.append(value)
+            remap[code] = lookup[value]
+        codes = np.concatenate([self.codes, remap[other.codes]]).astype(np.int32)
+        return DictColumn(codes, values)
+
+    def prefix_mask(self, prefix: str) -> np.ndarray:
+        matching = [c for c, v in enumerate(self.values) if v.startswith(prefix)]
+        return np.isin(self.codes, matching)
+
+
+def epoch_us(timestamp: str) -> int:
+    """One ISO timestamp as epoch microseconds; naive times are UTC."""
+    if not timestamp:
+        return NAT
+    parsed = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return (parsed - EPOCH) // timedelta(microseconds=1)
+
+
+def to_epoch(timestamps: list[str]) -> np.ndarray:
+    """
+    Convert ISO timestamps to epoch microseconds. Naive times and a
+    trailing "Z" are read as UTC; empty strings become NAT.
+    """
+    # numpy reads naive times as UTC, so only a trailing Z needs dropping
+    values = np.char.rstrip(np.asarray(timestamps, dtype=str), "Z")
+    try:
+        with warnings.catch_warnings():
+            # numpy warns about, rather than rejects, timezone offsets
+            warnings.simplefilter("error")
+            return values.astype("datetime64[us]").astype(np.int64)
+    except (ValueError, UserWarning):
+        return np.asarray([epoch_us(t) for t in timestamps], dtype=np.int64)
+
+
+def from_epoch(micros: int) -> str:
+    return str(np.datetime64(int(micros), "us"))
+
+
+class AlertColumns:
+    """Column-oriented view of the alerts for vectorized scans."""
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        severity: DictColumn,
+        status: DictColumn,
+        resource_id: DictColumn,
+        description: DictColumn,
+        created_at: np.ndarray,
+        metric_value: np.ndarray,
+        threshold: np.ndarray,
+    ):
+        self.ids = ids
+        self.severity = severity
+        self.status = status
+        self.resource_id = resource_id
+        self.description = description
+        self.created_at = created_at
+        self.metric_value = metric_value
+        self.threshold = threshold
+
+    def __len__(self) -> int:
+        return len(self.created_at)
+
+    @classmethod
+    def from_records(cls, records: list[dict[str, Any]]) -> "AlertColumns":
+        properties = [r.get("properties") or {} for r in records]
+        return cls(
+            ids=np.asarray([r["id"] for r in records], dtype=str),
+            severity=DictColumn.encode([r["severity"] for r in records]),
+            status=DictColumn.encode([r["status"] for r in records]),
+            resource_id=DictColumn.encode([r["resource_id"] for r in records]),
+            description=DictColumn.encode([r["description"] for r in records]),
+            created_at=to_epoch([r["created_at"] for r in records]),
+            metric_value=np.asarray(
+                [p.get("metric_value", np.nan) for p in properties], dtype=np.float64
+            ),
+            threshold=np.asarray(
+                [p.get("threshold", np.nan) for p in properties], dtype=np.float64
+            ),
+        )
+
+    def concat(self, other: "AlertColumns") -> "AlertColumns":
+        return AlertColumns(
+            ids=np.concatenate([self.ids, other.ids]),
+            severity=self.severity.concat(other.severity),
+            status=self.status.concat(other.status),
+            resource_id=self.resource_id.concat(other.resource_id),
+            description=self.description.concat(other.description),
+            created_at=np.concatenate([self.created_at, other.created_at]),
+            metric_value=np.concatenate([self.metric_value, other.metric_value]),
+            threshold=np.concatenate([self.threshold, other.threshold]),
+        )
+
+    def sort_column(self, field: str) -> np.ndarray | None:
+        """An array ordering rows by a field, or None if unsupported."""
+        if field == "id":
+            return self.ids
+        if field in DICT_COLUMNS:
+            column = getattr(self, field)
+            return column.ranks()[column.codes]
+        name = field.removeprefix("properties.")
+        if name in NUMERIC_COLUMNS:
+            return getattr(self, name)
+        return None
+
+    def record(self, row: int) -> dict[str, Any]:
+        """Rebuild the JSON form of one alert."""
+        properties = {}
+        for name in ("metric_value", "threshold"):
+            value = float(getattr(self, name)[row])
+            if not np.isnan(value):
+                properties[name] = int(value) if value.is_integer() else value
+        return {
+            "id": str(self.ids[row]),
+            "severity": self.severity.values[self.severity.codes[row]],
+            "resource_id": self.resource_id.values[self.resource_id.codes[row]],
+            "description": self.description.values[self.description.codes[row]],
+            "created_at": from_epoch(self.created_at[row]),
+            "status": self.status.values[self.status.codes[row]],
+            "properties": properties,
+        }
+
+
+def write_columns(columns: AlertColumns, directory: Path):
+    """
+    Write alerts as one .npy file per column plus meta.json, replacing each
+    file on its own with meta.json last. The set as a whole is not atomic:
+    a reader that opens the files during a write can mix new columns with
+    old ones. ColumnarAlertStore only re-opens them once meta.json changes.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    arrays = {"id": columns.ids, "id_order": np.argsort(columns.ids, kind="stable")}
+    for name in DICT_COLUMNS:
+        arrays[name] = getattr(columns, name).codes
+    for name, dtype in NUMERIC_COLUMNS.items():
+        arrays[name] = getattr(columns, name).astype(dtype)
+
+    for name, array in arrays.items():
+        tmp = directory / f"{name}.npy.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp, directory / f"{name}.npy")
+
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "rows": len(columns),
+        "dictionaries": {name: getattr(columns, name).values for name in DICT_COLUMNS},
+    }
+    tmp = directory / f"{META_FILE}.tmp"
+    tmp.write_text(json.dumps(meta))
+    os.replace(tmp, directory / META_FILE)
+
+
+def column_dtypes(id_dtype: np.dtype) -> dict[str, np.dtype]:
+    """The .npy file of every column, by name, with its dtype."""
+    dtypes = {"id": np.dtype(id_dtype), "id_order": np.dtype(np.int64)}
+    for name in DICT_COLUMNS:
+        dtypes[name] = np.dtype(np.int32)
+    for name, dtype in NUMERIC_COLUMNS.items():
+        dtypes[name] = np.dtype(dtype)
+    return dtypes
+
+
+def allocate_columns(directory: Path, rows: int, id_dtype: np.dtype):
+    """
+    Create empty column files of the given length to be filled in place,
+    e.g. by several processes each writing its own row range through
+    open_allocated. publish_columns makes them visible to readers.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    for name, dtype in column_dtypes(id_dtype).items():
+        array = np.lib.format.open_memmap(
+            directory / f"{name}.npy.tmp", mode="w+", dtype=dtype, shape=(rows,)
+        )
+        del array
+
+
+def open_allocated(directory: Path, name: str) -> np.memmap:
+    return np.load(directory / f"{name}.npy.tmp", mmap_mode="r+")
+
+
+def publish_columns(directory: Path, dictionaries: dict[str, list[str]]):
+    """Move allocated column files into place, then write meta.json last."""
+    rows = 0
+    for path in sorted(directory.glob("*.npy.tmp")):
+        rows = len(np.load(path, mmap_mode="r"))
+        os.replace(path, directory / path.name.removesuffix(".tmp"))
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "rows": rows,
+        "dictionaries": dictionaries,
+    }
+    tmp = directory / f"{META_FILE}.tmp"
+    tmp.write_text(json.dumps(meta))
+    os.replace(tmp, directory / META_FILE)
+
+
+def load_columns(directory: Path) -> tuple[AlertColumns, np.ndarray]:
+    """
+    Open a column directory with memory-mapped arrays, so only the columns
+    (and pages) a query touches are read from disk.
+    Returns the columns and the id sort order.
+    """
+    meta = json.loads((directory / META_FILE).read_text())
+    if meta.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported column format in {directory}")
+
+    def load(name: str) -> np.ndarray:
+        return np.load(directory / f"{name}.npy", mmap_mode="r")
+
+    dictionaries = meta["dictionaries"]
+    columns = AlertColumns(
+        ids=load("id"),
+        severity=DictColumn(load("severity"), dictionaries["severity"]),
+        status=DictColumn(load("status"), dictionaries["status"]),
+        resource_id=DictColumn(load("resource_id"), dictionaries["resource_id"]),
+        description=DictColumn(load("description"), dictionaries["description"]),
+        created_at=load("created_at"),
+        metric_value=load("metric_value"),
+        threshold=load("threshold"),
+    )
+    return columns, load("id_order")
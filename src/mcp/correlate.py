@@ -0,0 +1,171 @@
+import hashlib
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+from columns import AlertColumns, from_epoch
+
+# (resource_id, description, severity)
+Fingerprint = tuple[str, str, str]
+
+
+def resource_scope(resource_id: str) -> str:
+    """The /subscriptions/<id>/resourceGroups/<name> part of a resource ID."""
+    parts = resource_id.split("/")
+    if len(parts) >= 3 and parts[1].lower() == "subscriptions":
+        if len(parts) >= 5 and parts[3].lower() == "resourcegroups":
+            return "/".join(parts[:5])
+        return "/".join(parts[:3])
+    return ""
+
+
+@dataclass
+class Incident:
+    """Alerts sharing a fingerprint, collapsed into one entry."""
+
+    resource_id: str
+    description: str
+    severity: str
+    count: int
+    # Alerts not yet closed
+    open: int
+    first_seen: int
+    last_seen: int
+    last_alert_id: str
+    max_metric_value: float
+
+    @property
+    def fingerprint(self) -> str:
+        key = "\n".join((self.resource_id, self.description, self.severity))
+        return hashlib.sha1(key.encode()).hexdigest()[:12]
+
+    def merge(self, other: "Incident"):
+        self.count += other.count
+        self.open += other.open
+        self.first_seen = min(self.first_seen, other.first_seen)
+        if other.last_seen >= self.last_seen:
+            self.last_seen = other.last_seen
+            self.last_alert_id = other.last_alert_id
+        self.max_metric_value = float(
+            np.fmax(self.max_metric_value, other.max_metric_value)
+        )
+
+    def to_dict(self, scope: str = "") -> dict[str, Any]:
+        resource = self.resource_id
+        if scope and resource.startswith(scope + "/"):
+            resource = resource[len(scope) + 1 :]
+        return {
+            "fingerprint": self.fingerprint,
+            "resource": resource,
+            "description": self.description,
+            "severity": self.severity,
+            "count": self.count,
+            "open": self.open,
+            "first_seen": from_epoch(self.first_seen),
+            "last_seen": from_epoch(self.last_seen),
+            "last_alert_id": self.last_alert_id,
+            "max_metric_value": None
+            if np.isnan(self.max_metric_value)
+            else self.max_metric_value,
+        }
+
+
+def correlate(columns: AlertColumns, rows: np.ndarray) -> dict[Fingerprint, Incident]:
+    """
+    Collapse the given rows into incidents with one vectorized pass:
+    rows are grouped on their combined dictionary codes, and only one
+    Python object is built per fingerprint.
+    """
+    if len(rows) == 0:
+        return {}
+    descriptions = len(columns.description.values)
+    severities = len(columns.severity.values)
+    key = (
+        columns.resource_id.codes[rows].astype(np.int64) * descriptions
+        + columns.description.codes[rows]
+    ) * severities + columns.severity.codes[rows]
+    created = np.asarray(columns.created_at[rows])
+
+    # Sort by fingerprint, then time, so each group is one contiguous run
+    order = np.lexsort((created, key))
+    key = key[order]
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    ends = np.r_[starts[1:], len(key)] - 1
+    counts = ends - starts + 1
+    closed = columns.status.code_of("Closed")
+    still_open = np.add.reduceat(
+        (columns.status.codes[rows][order] != closed).astype(np.int64), starts
+    )
+    max_metric = np.fmax.reduceat(np.asarray(columns.metric_value[rows])[order], starts)
+    sorted_created = created[order]
+    last_rows = rows[order[ends]]
+
+    incidents = {}
+    for i, group_key in enumerate(key[starts].tolist()):
+        rest, severity = divmod(group_key, severities)
+        resource, description = divmod(rest, descriptions)
+        fingerprint = (
+            columns.resource_id.values[resource],
+            columns.description.values[description],
+            columns.severity.values[severity],
+        )
+        incidents[fingerprint] = Incident(
+            *fingerprint,
+            count=int(counts[i]),
+            open=int(still_open[i]),
+            first_seen=int(sorted_created[starts[i]]),
+            last_seen=int(sorted_created[ends[i]]),
+            last_alert_id=str(columns.ids[last_rows[i]]),
+            max_metric_value=float(max_metric[i]),
+        )
+    return incidents
+
+
+class IncidentIndex:
+    """
+    Incidents over all alerts, kept up to date incrementally: alert stores
+    only ever append rows until their base data is rewritten, so each update
+    correlates just the new rows and merges them in.
+    """
+
+    def __init__(self) -> None:
+        self.incidents: dict[Fingerprint, Incident] = {}
+        self.rows = 0
+        self._base: str | None = None
+        self._lock = threading.Lock()
+
+    def update(self, columns: AlertColumns, base: str) -> dict[Fingerprint, Incident]:
+        """Fold in rows added since the last update (or rebuild if `base` changed)."""
+        with self._lock:
+            if base != self._base or len(columns) < self.rows:
+                self.incidents = {}
+                self.rows = 0
+                self._base = base
+            if len(columns) > self.rows:
+                new = correlate(columns, np.arange(self.rows, len(columns)))
+                for fingerprint, incident in new.items():
+                    known = self.incidents.get(fingerprint)
+                    if known is None:
+                        self.incidents[fingerprint] = incident
+                    else:
+                        known.merge(incident)
+                self.rows = len(columns)
+            return self.incidents
+
+
+def group_by_scope(incidents: list[Incident]) -> list[dict[str, Any]]:
+    """Group incidents under their resource group, noisiest group first."""
+    groups: dict[str, list[Incident]] = {}
+    for incident in incidents:
+        groups.setdefault(resource_scope(incident.resource_id), []).append(incident)
+    ordered = sorted(groups.items(), key=lambda g: -sum(i.count for i in g[1]))
+    return [
+        {
+            "scope": scope,
+            "alerts": sum(i.count for i in members),
+            "resources": len({i.resource_id for i in members}),
+            "incidents": [i.to_dict(scope) for i in members],
+        }
+        for scope, members in ordered
+    ]
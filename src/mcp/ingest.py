@@ -0,0 +1,178 @@
+import fcntl
+import json
+import os
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import IO, Any
+
+from columns import epoch_us
+
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+
+REQUIRED_ALERT_FIELDS = ("id", "severity", "resource_id", "description")
+
+
+def segment_paths(directory: Path) -> list[Path]:
+    """Segment files in write order."""
+    if not directory.exists():
+        return []
+    return sorted(
+        p
+        for p in directory.iterdir()
+        if p.name.startswith(SEGMENT_PREFIX) and p.name.endswith(SEGMENT_SUFFIX)
+    )
+
+
+@contextmanager
+def segment_lock(directory: Path) -> Iterator[None]:
+    """Exclusive lock on the segment directory, shared by writers and compaction."""
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / ".lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def normalize_alert(alert: dict[str, Any]) -> dict[str, Any]:
+    """Validate an incoming alert and fill in optional fields."""
+    missing = [f for f in REQUIRED_ALERT_FIELDS if not alert.get(f)]
+    if missing:
+        raise ValueError(f"Alert is missing {', '.join(missing)}: {alert}")
+    created_at = alert.get("created_at") or datetime.now(timezone.utc).isoformat()
+    try:
+        epoch_us(str(created_at))
+    except ValueError as e:
+        raise ValueError(f"Alert has an invalid created_at: {alert}") from e
+    properties = alert.get("properties") or {}
+    if not isinstance(properties, dict):
+        raise ValueError(f"Alert properties must be an object: {alert}")
+    return {
+        "id": str(alert["id"]),
+        "severity": str(alert["severity"]),
+        "resource_id": str(alert["resource_id"]),
+        "description": str(alert["description"]),
+        "created_at": str(created_at),
+        "status": alert.get("status") or "New",
+        "properties": properties,
+    }
+
+
+class SegmentLog:
+    """
+    Append-only alert log made of JSONL segment files.
+    Appends are serialized across processes with a lock file, and fsyncs
+    are batched so that bursts of small appends share one disk flush.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        max_segment_bytes: int = 64 * 1024 * 1024,
+        fsync_interval: float = 0.05,
+    ):
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.fsync_interval = fsync_interval
+        self._file: IO[bytes] | None = None
+        self._last_fsync = 0.0
+        self._timer: threading.Timer | None = None
+        self._lock = threading.Lock()
+
+    def _open_segment(self, incoming: int) -> IO[bytes]:
+        """Return the segment to append to, rotating when it is full."""
+        segments = segment_paths(self.directory)
+        path = segments[-1] if segments else None
+        if path is None or path.stat().st_size + incoming > self.max_segment_bytes:
+            # Timestamped names sort in write order and are never reused,
+            # even after compaction removes the old segments
+            path = self.directory / f"{SEGMENT_PREFIX}{time.time_ns()}{SEGMENT_SUFFIX}"
+        if self._file is None or self._file.name != str(path):
+            self._close_file()
+            self._file = open(path, "ab")
+        return self._file
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    def _flush_pending(self):
+        with self._lock:
+            self._timer = None
+            if self._file is not None:
+                os.fsync(self._file.fileno())
+                self._last_fsync = time.monotonic()
+
+    def append(self, alerts: list[dict[str, Any]]):
+        """Append a batch of alerts as one write."""
+        if not alerts:
+            return
+        data = "".join(
+            json.dumps(alert, separators=(",", ":")) + "\n" for alert in alerts
+        ).encode()
+
+        with self._lock:
+            with segment_lock(self.directory):
+                f = self._open_segment(len(data))
+                f.write(data)
+                f.flush()
+
+            # Flush now if the last fsync is old enough, otherwise let a
+            # timer pick up this and any further appends in the interval
+            if time.monotonic() - self._last_fsync >= self.fsync_interval:
+                os.fsync(f.fileno())
+                self._last_fsync = time.monotonic()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.fsync_interval, self._flush_pending)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def close(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._close_file()
+
+
+class SegmentReader:
+    """Tails the segment files, returning only lines appended since last read."""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.offsets: dict[str, int] = {}
+
+    @property
+    def position(self) -> int:
+        """Total bytes consumed so far; grows with every new append."""
+        return sum(self.offsets.values())
+
+    def reset(self):
+        self.offsets = {}
+
+    def read_new(self) -> list[dict[str, Any]]:
+        records = []
+        paths = segment_paths(self.directory)
+        # Forget segments removed by compaction
+        names = {path.name for path in paths}
+        self.offsets = {n: o for n, o in self.offsets.items() if n in names}
+        for path in paths:
+            offset = self.offsets.get(path.name, 0)
+            if path.stat().st_size <= offset:
+                continue
+            with open(path, "rb") as f:
+                f.seek(offset)
+                data = f.read()
+            # Leave a partially written last line for the next read
+            end = data.rfind(b"\n") + 1
+            for line in data[:end].splitlines():
+                if line.strip():
+                    records.append(json.loads(line))
+            self.offsets[path.name] = offset + end
+        return records
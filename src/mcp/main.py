@@ -1,19 +1,46 @@
+import json
+
 from fastmcp import FastMCP
+from shaping import shaped
+from tracing import TracingMiddleware, setup_tracing
 from utils import (
     CONFIGS_FILE,
     LOGS_FILE,
+    MAX_QUERY_LIMIT,
     analyze_alert_logic,
+    analyze_alerts_logic,
+    evaluate_compliance_logic,
     generate_fix_logic,
+    get_resource_alerts_logic,
     get_resource_config_logic,
+    ingest_alerts_logic,
+    list_incidents_logic,
+    list_resources_logic,
+    list_violations_logic,
+    query_logs_logic,
+    query_resource_configs_logic,
+    result_cache,
+    summarize_alerts_logic,
 )
 
 # Initialize FastMCP server
-mcp = FastMCP("Azure Ops Copilot")
+mcp = FastMCP(
+    "Azure Ops Copilot",
+    instructions=(
+        "Query tools take max_tokens, a budget for their output (0 for no "
+        "limit); rows that do not fit are left out and a last line says how "
+        "to get them. Tools returning rows also take format: json (a JSON "
+        "header line, then one object per line) or table (a JSON header line, "
+        "a line of column names, then |-separated rows)."
+    ),
+)
+mcp.add_middleware(TracingMiddleware())
 
 # --- Tools ---
 
 
 @mcp.tool()
+@shaped()
 def analyze_alert(alert_id: str) -> str:
     """
     Analyze an Azure Monitor alert by ID.
@@ -23,6 +50,30 @@ def analyze_alert(alert_id: str) -> str:
 
 
 @mcp.tool()
+@shaped(rows=True)
+def analyze_alerts(
+    alert_ids: str = "",
+    severity: str = "",
+    status: str = "",
+    resource_prefix: str = "",
+    since: str = "",
+    until: str = "",
+    limit: int = 20,
+) -> str:
+    """
+    Analyze many Azure Monitor alerts in one call instead of one call per alert.
+    Select alerts by alert_ids (comma-separated) or by the severity, status,
+    resource_prefix and since/until filters (newest first, up to limit).
+    Returns a JSON header with total, returned and missing ids, then one
+    row per resource with its config and the alerts raised on it.
+    """
+    return analyze_alerts_logic(
+        alert_ids, severity, status, resource_prefix, since, until, limit
+    )
+
+
+@mcp.tool()
+@shaped()
 def get_resource_config(resource_id: str) -> str:
     """
     Get the configuration of an Azure resource.
@@ -31,15 +82,19 @@ def get_resource_config(resource_id: str) -> str:
 
 
 @mcp.tool()
-def generate_fix(issue_type: str, resource_type: str) -> str:
+@shaped()
+def generate_fix(issue_type: str, resource_type: str, params: str = "") -> str:
     """
     Generate a fix for a specific issue type and resource type.
     Returns a Bicep or CLI snippet.
+    params: optional comma-separated name=value pairs filled into the
+    template, e.g. "vmName=vm-01,vmSize=Standard_D8s_v3".
     """
-    return generate_fix_logic(issue_type, resource_type)
+    return generate_fix_logic(issue_type, resource_type, params)
 
 
 @mcp.tool()
+@shaped(rows=True)
 def get_all_logs() -> str:
     """
     Get all recent Azure Monitor logs/alerts.
@@ -51,6 +106,7 @@ def get_all_logs() -> str:
 
 
 @mcp.tool()
+@shaped(rows=True)
 def get_all_resource_configs() -> str:
     """
     Get all Azure resource configurations.
@@ -61,6 +117,209 @@ def get_all_resource_configs() -> str:
     return "[]"
 
 
+@mcp.tool()
+@shaped(rows=True)
+def query_logs(
+    severity: str = "",
+    status: str = "",
+    resource_prefix: str = "",
+    since: str = "",
+    until: str = "",
+    fields: str = "",
+    sort: str = "-created_at",
+    limit: int = 50,
+    cursor: str = "",
+) -> str:
+    """
+    Query Azure Monitor alerts server-side instead of fetching them all.
+    Filters: severity, status, resource_prefix (start of the resource ID),
+    since/until (ISO timestamps on created_at).
+    fields: comma-separated projection, e.g. "id,severity,properties.metric_value".
+    sort: comma-separated keys, prefix with "-" for descending.
+    Returns a JSON header with total and next_cursor, then one row per
+    alert. Pass next_cursor back as cursor to get the next page.
+    """
+    return query_logs_logic(
+        severity, status, resource_prefix, since, until, fields, sort, limit, cursor
+    )
+
+
+@mcp.tool()
+@shaped(rows=True)
+def query_resource_configs(
+    resource_type: str = "",
+    location: str = "",
+    compliance_status: str = "",
+    resource_prefix: str = "",
+    fields: str = "",
+    sort: str = "resource_id",
+    limit: int = 50,
+    cursor: str = "",
+) -> str:
+    """
+    Query Azure resource configurations server-side instead of fetching them all.
+    Filters: resource_type (e.g. "Microsoft.Web/sites"), location,
+    compliance_status, resource_prefix (start of the resource ID).
+    fields: comma-separated projection, e.g. "resource_id,properties.httpsOnly".
+    sort: comma-separated keys, prefix with "-" for descending.
+    Returns a JSON header with total and next_cursor, then one row per
+    config. Pass next_cursor back as cursor to get the next page.
+    """
+    return query_resource_configs_logic(
+        resource_type,
+        location,
+        compliance_status,
+        resource_prefix,
+        fields,
+        sort,
+        limit,
+        cursor,
+    )
+
+
+@mcp.tool()
+@shaped(rows=True)
+def list_resources(
+    scope: str = "",
+    resource_type: str = "",
+    fields: str = "",
+    limit: int = 50,
+    cursor: str = "",
+) -> str:
+    """
+    List the Azure resources under a scope: a subscription
+    ("/subscriptions/sub-1"), a resource group
+    ("/subscriptions/sub-1/resourceGroups/rg-1") or any leading part of a
+    resource ID, matched segment by segment and case-insensitively.
+    resource_type: optional, e.g. "Microsoft.Sql/servers/databases".
+    fields: comma-separated projection, e.g. "resource_id,location".
+    Returns a JSON header with total and next_cursor, then one row per
+    config. Pass next_cursor back as cursor to get the next page.
+    """
+    return list_resources_logic(scope, resource_type, fields, limit, cursor)
+
+
+@mcp.tool()
+@shaped(rows=True)
+def get_resource_alerts(
+    resource: str,
+    severity: str = "",
+    status: str = "",
+    since: str = "",
+    until: str = "",
+    alerts_per_resource: int = 3,
+    limit: int = 20,
+) -> str:
+    """
+    Get the alerts raised on a resource or on every resource under a scope.
+    resource: a full resource ID, a short name ("vm-01"), the end of an ID
+    ("servers/sql-01/databases/db-01") or a scope such as a resource group.
+    severity/status/since/until: optional alert filters.
+    Returns a JSON header with resource and alert totals, then one row per
+    resource with its config, alert counts and latest alerts.
+    """
+    return get_resource_alerts_logic(
+        resource, severity, status, since, until, alerts_per_resource, limit
+    )
+
+
+@mcp.tool()
+@shaped(rows=True)
+def evaluate_compliance(
+    scope: str = "", resource_type: str = "", rule: str = ""
+) -> str:
+    """
+    Evaluate the compliance policies (data/policies.json) against the
+    current resource configurations, e.g. "httpsOnly must be true" or
+    "vmSize in the allowed list".
+    scope/resource_type/rule: optionally narrow to a subscription or
+    resource group, a resource type or a single rule.
+    Returns a JSON header with compliant and non-compliant resource counts,
+    then one row per rule with its violation count.
+    """
+    return evaluate_compliance_logic(scope, resource_type, rule)
+
+
+@mcp.tool()
+@shaped(rows=True)
+def list_violations(
+    rule: str = "",
+    resource_type: str = "",
+    severity: str = "",
+    scope: str = "",
+    limit: int = 50,
+    cursor: str = "",
+) -> str:
+    """
+    List the resources that violate a compliance policy, with the expected
+    and actual value of the checked field.
+    rule/resource_type/severity/scope: optional filters.
+    Returns a JSON header with total and next_cursor, then one row per
+    violation. Pass next_cursor back as cursor to get the next page.
+    """
+    return list_violations_logic(rule, resource_type, severity, scope, limit, cursor)
+
+
+@mcp.tool()
+@shaped()
+def summarize_alerts(
+    group_by: str = "severity",
+    bucket: str = "",
+    top_n: int = 5,
+    severity: str = "",
+    status: str = "",
+    since: str = "",
+    until: str = "",
+) -> str:
+    """
+    Summarize Azure Monitor alerts without reading them one by one.
+    group_by: comma-separated, any of severity, status, resource, description.
+    bucket: optional time bucket width on created_at, e.g. "15m", "1h", "1d".
+    top_n: number of noisiest resources to list.
+    severity/status/since/until: optional filters.
+    Returns small tables of counts plus metric_value percentiles vs threshold.
+    """
+    return summarize_alerts_logic(
+        group_by, bucket, top_n, severity, status, since, until
+    )
+
+
+@mcp.tool()
+@shaped(rows=True)
+def list_incidents(
+    severity: str = "",
+    status: str = "",
+    resource_prefix: str = "",
+    since: str = "",
+    until: str = "",
+    min_count: int = 1,
+    limit: int = 20,
+) -> str:
+    """
+    List incidents instead of raw alerts: alerts with the same resource,
+    description and severity are collapsed into one incident with a count,
+    first/last seen and the number still open.
+    severity/status/resource_prefix/since/until: optional alert filters.
+    min_count: skip incidents with fewer alerts, e.g. 2 for repeats only.
+    Returns a JSON header with alert and incident totals, then one row per
+    resource group with its incidents, most frequent first.
+    """
+    return list_incidents_logic(
+        severity, status, resource_prefix, since, until, min_count, limit
+    )
+
+
+@mcp.tool()
+def ingest_alerts(alerts: list[dict]) -> str:
+    """
+    Append a batch of Azure Monitor alerts to the alert log.
+    Each alert needs id, severity, resource_id and description; created_at,
+    status and properties are optional. Already-known ids are skipped.
+    Returns the number of alerts ingested and skipped as JSON.
+    """
+    return ingest_alerts_logic(alerts)
+
+
 @mcp.tool()
 def integration_placeholder(service_name: str, action: str) -> str:
     """
@@ -76,18 +335,23 @@ def integration_placeholder(service_name: str, action: str) -> str:
 
 @mcp.resource("azure://logs/recent")
 def get_recent_logs() -> str:
-    """Get the most recent Azure Monitor logs."""
-    if LOGS_FILE.exists():
-        return LOGS_FILE.read_text()
-    return "[]"
+    """Get the 100 most recent Azure Monitor logs as JSON lines."""
+    return query_logs_logic(sort="-created_at", limit=100)
 
 
 @mcp.resource("azure://configs/all")
 def get_all_configs() -> str:
-    """Get all resource configurations."""
-    if CONFIGS_FILE.exists():
-        return CONFIGS_FILE.read_text()
-    return "[]"
+    """Get a summary of all resource configurations as JSON lines."""
+    return query_resource_configs_logic(
+        fields="resource_id,type,location,compliance_status",
+        limit=MAX_QUERY_LIMIT,
+    )
+
+
+@mcp.resource("azure://cache/stats")
+def get_cache_stats() -> str:
+    """Hit/miss counters of the tool result cache."""
+    return json.dumps(result_cache.stats())
 
 
 # --- Prompts ---
@@ -114,4 +378,5 @@ def suggest_fix(resource_id: str, issue: str) -> str:
 
 
 if __name__ == "__main__":
+    setup_tracing()
     mcp.run()
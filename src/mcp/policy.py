@@ -0,0 +1,290 @@
+import json
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from store import get_field
+
+# Operators a rule may use, and whether they compare numbers
+OPERATORS = {
+    "equals": False,
+    "not_equals": False,
+    "in": False,
+    "not_in": False,
+    "exists": False,
+    ">=": True,
+    ">": True,
+    "<=": True,
+    "<": True,
+}
+
+
+def value_key(value: Any) -> str:
+    """Canonical key of a config value (10 and 10.0 are the same value)."""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return json.dumps(value, sort_keys=True, separators=(",", ":"))
+
+
+class FieldColumn:
+    """
+    One flattened config field over all resources: values dictionary-encoded
+    (-1 where the field is missing) plus a numeric copy for comparisons.
+    Rows are updated in place when configs change.
+    """
+
+    def __init__(self, size: int = 0):
+        self.codes: np.ndarray = np.full(size, -1, dtype=np.int32)
+        self.numbers: np.ndarray = np.full(size, np.nan, dtype=np.float64)
+        self.values: list[Any] = []
+        # Strings are looked up as they are; other values by value_key
+        self._strings: dict[str, int] = {}
+        self._lookup: dict[str, int] = {}
+
+    def resize(self, size: int):
+        extra = size - len(self.codes)
+        if extra > 0:
+            self.codes = np.concatenate([self.codes, np.full(extra, -1, np.int32)])
+            self.numbers = np.concatenate([self.numbers, np.full(extra, np.nan)])
+
+    def code_of(self, value: Any) -> int:
+        """Code of a value, or -2 (matching no row) if it never occurs."""
+        if isinstance(value, str):
+            return self._strings.get(value, -2)
+        return self._lookup.get(value_key(value), -2)
+
+    def encode(self, item: Any) -> int:
+        if item is None:
+            return -1
+        if isinstance(item, str):
+            table, key = self._strings, item
+        else:
+            table, key = self._lookup, value_key(item)
+        code = table.get(key)
+        if code is None:
+            code = table[key] = len(self.values)
+            self.values.append(item)
+        return code
+
+    def set(self, rows: np.ndarray, items: list[Any]):
+        self.codes[rows] = [self.encode(item) for item in items]
+        self.numbers[rows] = [
+            item
+            if isinstance(item, (int, float)) and not isinstance(item, bool)
+            else np.nan
+            for item in items
+        ]
+
+    def clear(self, rows: np.ndarray):
+        self.codes[rows] = -1
+        self.numbers[rows] = np.nan
+
+    def value(self, row: int) -> Any:
+        code = self.codes[row]
+        return None if code < 0 else self.values[code]
+
+
+# Predicate over a field column: whether the given rows pass
+Predicate = Callable[[FieldColumn, np.ndarray], np.ndarray]
+
+
+class Rule:
+    """A policy rule from the manifest, compiled once into a predicate."""
+
+    def __init__(self, entry: dict[str, Any]):
+        self.name: str = entry["name"]
+        self.description: str = entry.get("description", "")
+        # Empty: applies to every resource type
+        self.resource_type: str = entry.get("resource_type", "")
+        self.field: str = entry["field"]
+        self.operator: str = entry["operator"]
+        self.value: Any = entry.get("value")
+        self.severity: str = entry.get("severity", "Medium")
+        if self.operator not in OPERATORS:
+            raise ValueError(f"Rule {self.name}: unknown operator {self.operator}")
+        if OPERATORS[self.operator] and not isinstance(self.value, (int, float)):
+            raise ValueError(f"Rule {self.name}: {self.operator} needs a number")
+        self.predicate = self.compile()
+
+    def compile(self) -> Predicate:
+        """
+        Missing fields fail every operator but not_equals and not_in.
+        Codes are looked up per call, as the field dictionaries grow.
+        """
+        operator, value = self.operator, self.value
+        if operator == "exists":
+            return lambda column, rows: (
+                (column.codes[rows] >= 0) == bool(value if value is not None else True)
+            )
+        if operator in ("equals", "not_equals"):
+            keep = operator == "equals"
+            return lambda column, rows: (
+                (column.codes[rows] == column.code_of(value)) == keep
+            )
+        if operator in ("in", "not_in"):
+            keep = operator == "in"
+            return lambda column, rows: (
+                np.isin(column.codes[rows], [column.code_of(v) for v in value]) == keep
+            )
+        compare = {
+            ">=": np.greater_equal,
+            ">": np.greater,
+            "<=": np.less_equal,
+            "<": np.less,
+        }[operator]
+        # NaN (missing or not a number) compares False
+        return lambda column, rows: compare(column.numbers[rows], value)
+
+    def expected(self) -> str:
+        if self.operator == "exists":
+            return "exists" if self.value in (None, True) else "absent"
+        return f"{self.operator} {json.dumps(self.value)}"
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "rule": self.name,
+            "description": self.description,
+            "severity": self.severity,
+            "resource_type": self.resource_type or "*",
+            "field": self.field,
+            "expected": self.expected(),
+        }
+
+
+class PolicyEngine:
+    """
+    Evaluates policy rules over every resource config in one vectorized
+    pass. The rule manifest is re-read and compiled only when it changes;
+    when the configs change only resources whose config differs are
+    flattened and re-evaluated.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.rules: list[Rule] = []
+        self.resource_ids: list[str] = []
+        self.rows: dict[str, int] = {}
+        self.configs: list[dict[str, Any] | None] = []
+        self.present: np.ndarray = np.zeros(0, dtype=bool)
+        self.fields: dict[str, FieldColumn] = {}
+        # rules x rows: whether the rule applies to / is violated by a resource
+        self.applies = np.zeros((0, 0), dtype=bool)
+        self.violations = np.zeros((0, 0), dtype=bool)
+        # Rows evaluated by the last update, for reporting
+        self.reevaluated = 0
+        self._signature: int | None = None
+        self._configs_version: str | None = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _stat_signature(self) -> int | None:
+        try:
+            return self.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _reset(self, rules: list[Rule]):
+        self.rules = rules
+        self.resource_ids = []
+        self.rows = {}
+        self.configs = []
+        self.present = np.zeros(0, dtype=bool)
+        self.fields = {
+            name: FieldColumn() for name in {"type"} | {rule.field for rule in rules}
+        }
+        self.applies = np.zeros((len(rules), 0), dtype=bool)
+        self.violations = np.zeros((len(rules), 0), dtype=bool)
+
+    def update(self, configs: list[dict[str, Any]], configs_version: str):
+        """Bring the results up to date with the rules file and the configs."""
+        signature = self._stat_signature()
+        if (
+            self._loaded
+            and signature == self._signature
+            and configs_version == self._configs_version
+        ):
+            return
+        with self._lock:
+            signature = self._stat_signature()
+            if signature != self._signature or not self._loaded:
+                entries = json.loads(self.path.read_text()) if signature else []
+                self._reset([Rule(entry) for entry in entries])
+                self._signature = signature
+                self._configs_version = None
+                self._loaded = True
+            if configs_version != self._configs_version:
+                self._sync(configs)
+                self._configs_version = configs_version
+
+    def _sync(self, configs: list[dict[str, Any]]):
+        """Diff the configs against the last evaluated copy by resource ID."""
+        changed: list[int] = []
+        seen = np.zeros(len(self.resource_ids) + len(configs), dtype=bool)
+        for config in configs:
+            resource_id = config["resource_id"]
+            row = self.rows.get(resource_id)
+            if row is None:
+                row = self.rows[resource_id] = len(self.resource_ids)
+                self.resource_ids.append(resource_id)
+                self.configs.append(config)
+                changed.append(row)
+            elif self.configs[row] != config:
+                self.configs[row] = config
+                changed.append(row)
+            seen[row] = True
+
+        size = len(self.resource_ids)
+        self.present = seen[:size]
+        for column in self.fields.values():
+            column.resize(size)
+        if size > self.violations.shape[1]:
+            grow = np.zeros((len(self.rules), size - self.violations.shape[1]), bool)
+            self.applies = np.concatenate([self.applies, grow], axis=1)
+            self.violations = np.concatenate([self.violations, grow], axis=1)
+        self._evaluate(np.asarray(changed, dtype=np.int64))
+
+    def _evaluate(self, rows: np.ndarray):
+        self.reevaluated = len(rows)
+        if not len(rows):
+            return
+        configs = [self.configs[row] or {} for row in rows.tolist()]
+        types = self.fields["type"]
+        types.set(rows, [config.get("type") for config in configs])
+
+        # Flatten each field only for resources a rule reading it applies to
+        for name, column in self.fields.items():
+            if name == "type":
+                continue
+            readers = [rule for rule in self.rules if rule.field == name]
+            if any(not rule.resource_type for rule in readers):
+                needed: np.ndarray = np.ones(len(rows), dtype=bool)
+            else:
+                codes = [types.code_of(rule.resource_type) for rule in readers]
+                needed = np.isin(types.codes[rows], codes)
+            column.clear(rows[~needed])
+            picked = np.flatnonzero(needed)
+            column.set(
+                rows[picked], [get_field(configs[i], name) for i in picked.tolist()]
+            )
+
+        for i, rule in enumerate(self.rules):
+            if rule.resource_type:
+                applies = types.codes[rows] == types.code_of(rule.resource_type)
+            else:
+                applies = np.ones(len(rows), dtype=bool)
+            passed = rule.predicate(self.fields[rule.field], rows)
+            self.applies[i, rows] = applies
+            self.violations[i, rows] = applies & ~passed
+
+    def select(
+        self, rule: str = "", resource_type: str = ""
+    ) -> tuple[list[int], np.ndarray]:
+        """Indexes of the matching rules and a mask of the matching resources."""
+        rules = [i for i, r in enumerate(self.rules) if not rule or r.name == rule]
+        mask = self.present.copy()
+        if resource_type:
+            types = self.fields["type"]
+            mask &= types.codes == types.code_of(resource_type)
+        return rules, mask
@@ -0,0 +1,240 @@
+import bisect
+from itertools import accumulate, islice
+from typing import Iterator
+
+
+def split_resource_id(resource_id: str) -> list[str]:
+    """Lower-cased path segments (ARM resource IDs are case-insensitive)."""
+    return [s for s in resource_id.lower().split("/") if s]
+
+
+def pair_key(segments: list[str]) -> list[str]:
+    """
+    Trie key of an ID: its segments joined in type/name pairs, e.g.
+    ["subscriptions/sub-1", "resourcegroups/rg-1", "providers/microsoft.web",
+    "sites/app-01"]. Pairs halve the depth of the trie.
+    """
+    return ["/".join(segments[i : i + 2]) for i in range(0, len(segments), 2)]
+
+
+def split_scope(segments: list[str]) -> tuple[list[str], list[str]]:
+    """
+    Split segments into the scope (subscription and resource group) and the
+    part from the first "providers" on. IDs without a provider segment,
+    such as short names, have no scope unless they start with a subscription.
+    """
+    if "providers" in segments:
+        i = segments.index("providers")
+        return segments[:i], segments[i:]
+    if segments[:1] == ["subscriptions"]:
+        return segments, []
+    return [], segments
+
+
+def resource_type(resource_id: str) -> str:
+    """
+    The type of an ARM resource ID, e.g. "Microsoft.Sql/servers/databases"
+    for ".../providers/Microsoft.Sql/servers/sql-01/databases/db-01".
+    """
+    return type_of([s for s in resource_id.split("/") if s])
+
+
+def type_of(segments: list[str]) -> str:
+    """resource_type of an ID already split into segments."""
+    # Extension resources nest providers; the last one names the type
+    for i in range(len(segments) - 2, -1, -1):
+        if segments[i].lower() == "providers":
+            return "/".join([segments[i + 1]] + segments[i + 2 :: 2])
+    return ""
+
+
+class TrieNode:
+    __slots__ = ("children", "resource_ids", "size", "_order", "_starts")
+
+    def __init__(self) -> None:
+        self.children: dict[str, TrieNode] = {}
+        # Resource IDs whose key ends at this node (a list once there are any)
+        self.resource_ids: list[str] | tuple[()] = ()
+        # Resource IDs in this subtree, so pages can skip whole subtrees
+        self.size = 0
+        # Sorted child segments, dropped when a child is added, and the
+        # offset of each child's first ID, dropped when the subtree grows
+        self._order: list[str] | None = None
+        self._starts: list[int] | None = None
+
+    def add_child(self, segment: str) -> "TrieNode":
+        child = self.children[segment] = TrieNode()
+        self._order = None
+        return child
+
+    def order(self) -> list[str]:
+        """Child segments in key order, sorted once per change."""
+        if self._order is None:
+            self._order = sorted(self.children)
+        return self._order
+
+    def starts(self) -> list[int]:
+        """Offset of each child's first ID below this node, then the total."""
+        if self._starts is None:
+            sizes = (self.children[segment].size for segment in self.order())
+            self._starts = list(accumulate(sizes, initial=0))
+        return self._starts
+
+
+class PathTrie:
+    """A trie over path segments, with resource IDs at the nodes."""
+
+    def __init__(self) -> None:
+        self.root = TrieNode()
+
+    def insert(self, key: list[str], resource_id: str):
+        node = self.root
+        node.size += 1
+        node._starts = None
+        for segment in key:
+            child = node.children.get(segment)
+            if child is None:
+                child = node.add_child(segment)
+            node = child
+            node.size += 1
+            node._starts = None
+        if isinstance(node.resource_ids, list):
+            node.resource_ids.append(resource_id)
+        else:
+            node.resource_ids = [resource_id]
+
+    def find(self, key: list[str]) -> TrieNode | None:
+        node: TrieNode | None = self.root
+        for segment in key:
+            if node is None:
+                return None
+            node = node.children.get(segment)
+        return node
+
+    def find_scope(self, segments: list[str]) -> TrieNode | None:
+        """
+        The node under a scope given as segments. A scope ending in a type
+        without a name (".../resourceGroups") selects the children of
+        that type.
+        """
+        node = self.find(pair_key(segments[: len(segments) // 2 * 2]))
+        if node is None or len(segments) % 2 == 0:
+            return node
+        # Keys of one type are a contiguous run of the sorted keys ("0"
+        # sorts right after "/")
+        order = node.order()
+        first = bisect.bisect_left(order, segments[-1] + "/")
+        last = bisect.bisect_left(order, segments[-1] + "0", first)
+        view = TrieNode()
+        view.children = {k: node.children[k] for k in order[first:last]}
+        view._order = order[first:last]
+        view.size = sum(c.size for c in view.children.values())
+        return view
+
+    def walk(self, node: TrieNode, skip: int = 0) -> Iterator[str]:
+        """Resource IDs under a node in key order, after skipping `skip`."""
+        if skip < len(node.resource_ids):
+            yield from node.resource_ids[skip:]
+            skip = 0
+        else:
+            skip -= len(node.resource_ids)
+        # Start at the child holding the first ID wanted
+        order = node.order()
+        starts = node.starts()
+        first = bisect.bisect_right(starts, skip) - 1
+        skip -= starts[first]
+        for i in range(first, len(order)):
+            yield from self.walk(node.children[order[i]], skip)
+            skip = 0
+
+
+class ResourceTrie:
+    """
+    ARM resource IDs indexed by path segment, so lookups cost time in
+    proportion to the key and the result rather than the whole estate:
+    - a trie over the full ID for exact lookups and subtrees
+      (a subscription, a resource group, a server and its databases),
+    - per resource type, a trie over the scope for "all SQL databases in sub-1",
+    - the IDs by short name, for short names and partial paths such as
+      "servers/sql-01/databases/db-01".
+    """
+
+    def __init__(self) -> None:
+        self.prefixes = PathTrie()
+        self.by_type: dict[str, PathTrie] = {}
+        self.by_name: dict[str, list[str]] = {}
+
+    def __len__(self) -> int:
+        return self.prefixes.root.size
+
+    def add(self, resource_id: str):
+        segments = split_resource_id(resource_id)
+        if not segments:
+            return
+        key = pair_key(segments)
+        node = self.prefixes.find(key)
+        if node is not None and resource_id in node.resource_ids:
+            return
+        self.prefixes.insert(key, resource_id)
+        kind = type_of(segments)
+        trie = self.by_type.get(kind)
+        if trie is None:
+            trie = self.by_type[kind] = PathTrie()
+        trie.insert(pair_key(split_scope(segments)[0]), resource_id)
+        self.by_name.setdefault(segments[-1], []).append(resource_id)
+
+    def get(self, resource_id: str) -> str | None:
+        """The stored form of a full resource ID, matched case-insensitively."""
+        node = self.prefixes.find(pair_key(split_resource_id(resource_id)))
+        return node.resource_ids[0] if node is not None and node.resource_ids else None
+
+    def resolve(self, name: str, limit: int = 10) -> tuple[list[str], int]:
+        """
+        Resource IDs matching a full ID, a short name or the trailing
+        segments of an ID, up to `limit`, and how many match in total.
+        A total above one means the name is ambiguous.
+        """
+        exact = self.get(name)
+        if exact is not None:
+            return [exact], 1
+        segments = split_resource_id(name)
+        if not segments:
+            return [], 0
+        candidates = self.by_name.get(segments[-1], [])
+        if len(segments) > 1:
+            candidates = [
+                c
+                for c in candidates
+                if split_resource_id(c)[-len(segments) :] == segments
+            ]
+        return candidates[:limit], len(candidates)
+
+    def subtree(
+        self, scope: str = "", kind: str = "", offset: int = 0, limit: int = 50
+    ) -> tuple[list[str], int]:
+        """
+        A page of the resource IDs under a scope (any leading part of an
+        ID, matched segment by segment), optionally of one resource type.
+        Returns the page and the total under the scope.
+        """
+        segments = split_resource_id(scope)
+        if kind:
+            trie = self.by_type.get(kind.lower())
+            if trie is None:
+                return [], 0
+            if "providers" not in segments:
+                node = trie.find_scope(segments)
+                if node is None:
+                    return [], 0
+                return list(islice(trie.walk(node, offset), limit)), node.size
+            # Scopes below a resource group are small; filter them by type
+            matches = [
+                r
+                for r in self.subtree(scope, offset=0, limit=len(self))[0]
+                if resource_type(r).lower() == kind.lower()
+            ]
+            return matches[offset : offset + limit], len(matches)
+        node = self.prefixes.find_scope(segments)
+        if node is None:
+            return [], 0
+        return list(islice(self.prefixes.walk(node, offset), limit)), node.size
@@ -0,0 +1,94 @@
+import functools
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+
+class ResultCache:
+    """
+    Bounded LRU cache of tool results with a TTL.
+    Each entry remembers the data version it was computed from and is
+    dropped as soon as that version changes.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: OrderedDict[str, tuple[str, float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, version: str) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_version, expires, value = entry
+                if entry_version == version and time.monotonic() < expires:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+                self.invalidations += 1
+            self.misses += 1
+            return None
+
+    def put(self, key: str, version: str, value: str):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (version, time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+    def cached(self, version: Callable[[], str]) -> Callable:
+        """
+        Decorate a pure tool function whose result depends only on its
+        arguments and the data version. Error results are not cached.
+        """
+
+        def decorator(fn: Callable[..., str]) -> Callable[..., str]:
+            signature = inspect.signature(fn)
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs) -> str:
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                # Normalize arguments so "vm-01 " and "vm-01" share an entry
+                arguments = {
+                    k: v.strip() if isinstance(v, str) else v
+                    for k, v in bound.arguments.items()
+                }
+                key = json.dumps([fn.__name__, arguments], sort_keys=True, default=str)
+                current = version()
+                result = self.get(key, current)
+                if result is None:
+                    result = fn(**arguments)
+                    if not result.startswith("Error"):
+                        self.put(key, current, result)
+                return result
+
+            return wrapper
+
+        return decorator
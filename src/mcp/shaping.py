@@ -0,0 +1,208 @@
+import functools
+import inspect
+import json
+import os
+from collections.abc import Callable, Iterable, Iterator
+from typing import Any
+
+from store import decode_cursor, encode_cursor
+
+FORMATS = ("json", "table")
+# Output budget of a tool call unless the caller gives one (0: no limit)
+DEFAULT_MAX_TOKENS = int(os.getenv("TOOL_MAX_TOKENS", "2000"))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count: about four characters per token."""
+    return len(text) // 4 + 1
+
+
+def is_empty(value: Any) -> bool:
+    return value is None or (isinstance(value, (str, list, dict)) and not value)
+
+
+def compact(value: Any) -> Any:
+    """Drop null and empty fields, recursively (zeros and false are kept)."""
+    if isinstance(value, dict):
+        kept = {}
+        for key, item in value.items():
+            item = compact(item)
+            if not is_empty(item):
+                kept[key] = item
+        return kept
+    if isinstance(value, list):
+        return [compact(item) for item in value]
+    return value
+
+
+def dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value.replace("|", "\\|").replace("\n", " ")
+    return dumps(value)
+
+
+def table(rows: list[dict[str, Any]]) -> Iterator[str]:
+    """Rows as a line of column names, then one |-separated line per row."""
+    columns = list(dict.fromkeys(key for row in rows for key in row))
+    yield "|".join(columns)
+    for row in rows:
+        yield "|".join(cell(row.get(column)) for column in columns)
+
+
+def parse(text: str) -> tuple[dict[str, Any] | None, list[Any]] | None:
+    """
+    Split a JSON tool result into its header and rows: JSON lines are a
+    header line then one row per line, a JSON array is rows without a
+    header, and a single object is one row. None if the text is not JSON.
+    """
+    if not text.lstrip().startswith(("{", "[")):
+        return None
+    try:
+        document = json.loads(text)
+    except json.JSONDecodeError:
+        try:
+            lines = [json.loads(line) for line in text.splitlines() if line.strip()]
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(lines[0], dict):
+            return None
+        return lines[0], lines[1:]
+    return None, document if isinstance(document, list) else [document]
+
+
+def fit(head: list[str], body: Iterable[str], max_tokens: int) -> tuple[list[str], int]:
+    """`head` plus the lines of `body` that fit in the budget, and how many did."""
+    lines = list(head)
+    used = sum(estimate_tokens(line) for line in lines)
+    shown = 0
+    for line in body:
+        used += estimate_tokens(line)
+        if max_tokens and used > max_tokens:
+            break
+        lines.append(line)
+        shown += 1
+    return lines, shown
+
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """Cut text to the budget, at a line boundary where there is one."""
+    if not max_tokens or estimate_tokens(text) <= max_tokens:
+        return text
+    cut = text[: max_tokens * 4]
+    if "\n" in cut:
+        cut = cut[: cut.rindex("\n")]
+    return f"{cut}\n… cut at {max_tokens} of about {estimate_tokens(text)} tokens"
+
+
+def shape(
+    text: str,
+    format: str = "json",
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    offset: int | None = None,
+) -> str:
+    """
+    Re-encode a tool result compactly and fit it in `max_tokens`. Rows
+    that do not fit are dropped whole and a last line says how many; for
+    paged results (`offset` given) the header's next_cursor is moved so
+    that the next page starts at the first row not shown.
+    """
+    if text.startswith("Error"):
+        return text
+    parsed = parse(text)
+    if parsed is None:
+        return truncate_text(text, max_tokens)
+    header, rows = parsed
+    # The header is kept whole: a null next_cursor means there are no more pages
+    rows = [compact(row) for row in rows]
+
+    tabular = (
+        format == "table" and len(rows) > 1 and all(isinstance(r, dict) for r in rows)
+    )
+    head = [dumps(header)] if header is not None else []
+    if tabular:
+        body = table(rows)
+        head.append(next(body))
+    else:
+        body = (dumps(row) for row in rows)
+    lines, shown = fit(head, body, max_tokens)
+    if shown == 0 and rows:
+        # Not even one row fits: show the first one, cut to the budget
+        lines = head[:1] if header is not None else []
+        lines.append(truncate_text(dumps(rows[0]), max_tokens))
+        shown = 1
+    if shown == len(rows):
+        return "\n".join(lines)
+
+    omitted = len(rows) - shown
+    if header is not None and offset is not None:
+        header["returned"] = shown
+        header["next_cursor"] = encode_cursor(offset + shown)
+        lines[0] = dumps(header)
+        hint = "continue with next_cursor"
+    else:
+        hint = "narrow the filters or lower the limit to see them"
+    lines.append(f"… {omitted} more rows not shown; {hint}")
+    return "\n".join(lines)
+
+
+def shaped(rows: bool = False) -> Callable:
+    """
+    Decorate a tool to shape its output: the tool gains a `max_tokens`
+    parameter and, for tools returning rows, a `format` parameter ("json"
+    for one JSON object per row, "table" for a line of column names and
+    one |-separated line per row). Tools with a `cursor` parameter get a
+    next_cursor that resumes after the last row shown.
+    """
+
+    def decorator(tool: Callable[..., str]) -> Callable[..., str]:
+        signature = inspect.signature(tool)
+        paged = "cursor" in signature.parameters
+
+        @functools.wraps(tool)
+        def wrapper(*args, **kwargs) -> str:
+            max_tokens = kwargs.pop("max_tokens", DEFAULT_MAX_TOKENS)
+            format = kwargs.pop("format", "json") if rows else "json"
+            if format not in FORMATS:
+                return f"Error: format must be one of {', '.join(FORMATS)}"
+            result = tool(*args, **kwargs)
+            offset = None
+            if paged and not result.startswith("Error"):
+                bound = signature.bind(*args, **kwargs)
+                offset = decode_cursor(bound.arguments.get("cursor") or None)
+            return shape(result, format, max(0, max_tokens), offset)
+
+        extra = [
+            inspect.Parameter(
+                "max_tokens",
+                inspect.Parameter.KEYWORD_ONLY,
+                default=DEFAULT_MAX_TOKENS,
+                annotation=int,
+            )
+        ]
+        annotations = {**tool.__annotations__, "max_tokens": int}
+        if rows:
+            extra.insert(
+                0,
+                inspect.Parameter(
+                    "format",
+                    inspect.Parameter.KEYWORD_ONLY,
+                    default="json",
+                    annotation=str,
+                ),
+            )
+            annotations["format"] = str
+        setattr(
+            wrapper,
+            "__signature__",
+            signature.replace(parameters=[*signature.parameters.values(), *extra]),
+        )
+        wrapper.__annotations__ = annotations
+        return wrapper
+
+    return decorator
@@ -0,0 +1,595 @@
+import base64
+import bisect
+import heapq
+import json
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from columns import NAT, AlertColumns, epoch_us, load_columns, to_epoch
+from ingest import SegmentReader
+from resource_trie import ResourceTrie
+from tracing import tracer
+
+
+def get_field(record: dict[str, Any], field: str) -> Any:
+    """Read a possibly dotted field (e.g. 'properties.metric_value')."""
+    value: Any = record
+    for part in field.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def project(record: dict[str, Any], fields: list[str] | None) -> dict[str, Any]:
+    """Keep only the requested fields of a record."""
+    if not fields:
+        return record
+    return {field: get_field(record, field) for field in fields}
+
+
+def sort_key(value: Any) -> tuple:
+    """Order values of mixed types; missing values sort last."""
+    if value is None:
+        return (2, "")
+    if isinstance(value, (int, float)):
+        return (0, value)
+    return (1, str(value))
+
+
+def sort_records(records: list[dict[str, Any]], sort: list[str] | None):
+    """Sort records in place by keys like 'created_at' or '-severity'."""
+    # Stable sorts applied right to left leave the first key primary
+    for key in reversed(sort or []):
+        field = key.lstrip("+-")
+        records.sort(
+            key=lambda r: sort_key(get_field(r, field)),
+            reverse=key.startswith("-"),
+        )
+
+
+def encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"o": offset}).encode()).decode()
+
+
+def decode_cursor(cursor: str | None) -> int:
+    if not cursor:
+        return 0
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(cursor.encode()))["o"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def record_times(records: list[dict[str, Any]], field: str) -> list[int]:
+    """Epoch microseconds of each record's timestamp; NAT if missing or invalid."""
+    timestamps = [str(r.get(field) or "") for r in records]
+    try:
+        return to_epoch(timestamps).tolist()
+    except ValueError:
+        times = []
+        for timestamp in timestamps:
+            try:
+                times.append(epoch_us(timestamp))
+            except ValueError:
+                times.append(NAT)
+        return times
+
+
+class JSONFileStore:
+    """
+    Keeps a parsed copy of a JSON array file in memory, plus any records
+    appended to an optional segment log.
+    The file is only re-read when its mtime or size changes; new segment
+    lines are tailed and indexed incrementally.
+    """
+
+    # Field that uniquely identifies a record; later duplicates are dropped
+    key_field = "id"
+    # Fields with an exact-match index (value -> record positions)
+    indexed_fields: tuple[str, ...] = ()
+    # Field holding the record's ISO timestamp, if any
+    time_field: str | None = None
+
+    def __init__(
+        self,
+        path: Path | None,
+        segments: SegmentReader | None = None,
+        seen: Callable[[str], bool] | None = None,
+    ):
+        self.path = path
+        self.segments = segments
+        # Keys already held elsewhere (e.g. in a columnar base) are skipped
+        self.seen = seen
+        self.records: list[dict[str, Any]] = []
+        self.by_key: dict[str, dict[str, Any]] = {}
+        self.index: dict[str, dict[Any, list[int]]] = {}
+        self._resource_ids: list[str] = []
+        self._positions_by_resource: dict[str, list[int]] = {}
+        # Epoch microseconds of each record's time_field, for since/until
+        self._times: list[int] = []
+        self._signature: tuple[int, int] | None = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _stat_signature(self) -> tuple[int, int] | None:
+        if self.path is None:
+            return None
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    @property
+    def version(self) -> str:
+        """Opaque token that changes whenever the data changes."""
+        signature = self._signature
+        version = "missing" if signature is None else f"{signature[0]}-{signature[1]}"
+        if self.segments is not None:
+            version += f"+{self.segments.position}"
+        return version
+
+    @property
+    def base_version(self) -> str:
+        """
+        Changes when the file is reloaded, but not when segment records are
+        appended: until it changes, records only ever grow at the end.
+        """
+        signature = self._signature
+        return "missing" if signature is None else f"{signature[0]}-{signature[1]}"
+
+    def refresh(self):
+        """Reload the file if it changed, then pick up new segment records."""
+        signature = self._stat_signature()
+        if signature == self._signature and self._loaded and self.segments is None:
+            return
+        with self._lock:
+            signature = self._stat_signature()
+            if signature != self._signature or not self._loaded:
+                with tracer.start_as_current_span(
+                    "store.reload", attributes={"store.path": str(self.path)}
+                ):
+                    records = []
+                    if signature is not None:
+                        assert self.path is not None
+                        with open(self.path, "r") as f:
+                            records = json.load(f)
+                    self._reset()
+                    if self.segments is not None:
+                        self.segments.reset()
+                    self._add(records)
+                self._signature = signature
+                self._loaded = True
+            if self.segments is not None:
+                new = self.segments.read_new()
+                if new:
+                    with tracer.start_as_current_span(
+                        "store.append", attributes={"store.records": len(new)}
+                    ):
+                        self._add(new)
+
+    def _reset(self):
+        self.records = []
+        self.by_key = {}
+        self.index = {f: {} for f in self.indexed_fields}
+        self._resource_ids = []
+        self._positions_by_resource = {}
+        self._times = []
+
+    def _add(self, records: list[dict[str, Any]]):
+        """Index new records in place, skipping keys that are already known."""
+        accepted = []
+        for record in records:
+            key = record[self.key_field]
+            if key in self.by_key or (self.seen is not None and self.seen(key)):
+                continue
+            self.by_key[key] = record
+            accepted.append(record)
+
+        start = len(self.records)
+        self.records.extend(accepted)
+        if self.time_field:
+            self._times.extend(record_times(accepted, self.time_field))
+        new_ids = []
+        for pos, record in enumerate(accepted, start):
+            for field in self.indexed_fields:
+                self.index[field].setdefault(record.get(field), []).append(pos)
+            resource_id = record["resource_id"]
+            if resource_id not in self._positions_by_resource:
+                self._positions_by_resource[resource_id] = []
+                new_ids.append(resource_id)
+            self._positions_by_resource[resource_id].append(pos)
+        # Sort the new IDs once and merge them in, rather than one insort each
+        new_ids.sort()
+        if self._resource_ids:
+            self._resource_ids = list(heapq.merge(self._resource_ids, new_ids))
+        else:
+            self._resource_ids = new_ids
+        self._on_add(accepted)
+
+    def _on_add(self, records: list[dict[str, Any]]):
+        """Hook for subclasses keeping extra lookup tables."""
+
+    def _prefix_positions(self, prefix: str) -> list[int]:
+        positions: list[int] = []
+        start = bisect.bisect_left(self._resource_ids, prefix)
+        for resource_id in self._resource_ids[start:]:
+            if not resource_id.startswith(prefix):
+                break
+            positions.extend(self._positions_by_resource[resource_id])
+        return positions
+
+    def query(
+        self,
+        where: dict[str, Any] | None = None,
+        resource_prefix: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        fields: list[str] | None = None,
+        sort: list[str] | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+    ) -> tuple[list[dict[str, Any]], int, str | None]:
+        """
+        Filter, sort and page through the records.
+        Returns (page, total matches, next cursor or None).
+        """
+        self.refresh()
+        where = {k: v for k, v in (where or {}).items() if v not in (None, "")}
+
+        # Start from the smallest indexed candidate set, filter the rest
+        candidates: list[list[int]] = []
+        for field in [f for f in where if f in self.index]:
+            candidates.append(self.index[field].get(where.pop(field), []))
+        if resource_prefix:
+            candidates.append(self._prefix_positions(resource_prefix))
+
+        positions: list[int]
+        if candidates:
+            candidates.sort(key=len)
+            positions = candidates[0]
+            for other in candidates[1:]:
+                allowed = set(other)
+                positions = [p for p in positions if p in allowed]
+            positions = sorted(positions)
+        else:
+            positions = list(range(len(self.records)))
+
+        if self.time_field and (since or until):
+            # Compared as epochs, like the columnar store, not as strings
+            low = int(to_epoch([since])[0]) if since else None
+            high = int(to_epoch([until])[0]) if until else None
+            times = self._times
+            positions = [
+                p
+                for p in positions
+                if (low is None or times[p] >= low)
+                and (high is None or times[p] < high)
+            ]
+
+        matches = [self.records[p] for p in positions]
+        if where:
+            matches = [
+                r
+                for r in matches
+                if all(get_field(r, f) == v for f, v in where.items())
+            ]
+        sort_records(matches, sort)
+
+        offset = decode_cursor(cursor)
+        limit = max(1, limit)
+        page = [project(r, fields) for r in matches[offset : offset + limit]]
+        next_cursor = (
+            encode_cursor(offset + limit) if offset + limit < len(matches) else None
+        )
+        return page, len(matches), next_cursor
+
+
+class AlertStore(JSONFileStore):
+    """Alerts indexed by id and by resource."""
+
+    indexed_fields = ("severity", "status")
+    time_field = "created_at"
+
+    def __init__(
+        self,
+        path: Path | None,
+        segments: SegmentReader | None = None,
+        seen: Callable[[str], bool] | None = None,
+    ):
+        super().__init__(path, segments, seen)
+        self.by_resource: dict[str, list[dict[str, Any]]] = {}
+        self._columns: AlertColumns | None = None
+
+    @property
+    def by_id(self) -> dict[str, dict[str, Any]]:
+        return self.by_key
+
+    def _reset(self):
+        super()._reset()
+        self.by_resource = {}
+        self._columns = None
+
+    def _on_add(self, records: list[dict[str, Any]]):
+        for alert in records:
+            self.by_resource.setdefault(alert["resource_id"], []).append(alert)
+        if self._columns is not None and records:
+            self._columns = self._columns.concat(AlertColumns.from_records(records))
+
+    def get(self, alert_id: str) -> dict[str, Any] | None:
+        self.refresh()
+        return self.by_id.get(alert_id)
+
+    def for_resource(self, resource_id: str) -> list[dict[str, Any]]:
+        self.refresh()
+        return self.by_resource.get(resource_id, [])
+
+    def columns(self) -> AlertColumns:
+        """Columnar view of the alerts, built lazily and extended on append."""
+        self.refresh()
+        columns = self._columns
+        if columns is None:
+            columns = self._columns = AlertColumns.from_records(self.records)
+        return columns
+
+
+class ColumnarAlertStore:
+    """
+    Alerts served from a memory-mapped column directory (see columns.py).
+    Records are only materialized for the rows a caller actually returns.
+    Alerts appended to the segment log since the columns were written are
+    kept in a small in-memory tail store.
+    """
+
+    def __init__(self, directory: Path, segments_dir: Path | None = None):
+        self.directory = directory
+        self.segments_dir = segments_dir
+        self._columns: AlertColumns | None = None
+        self._id_order: np.ndarray | None = None
+        self._signature: tuple[int, int] | None = None
+        self._merged: tuple[str, AlertColumns] | None = None
+        self._lock = threading.Lock()
+        self.tail = self._new_tail()
+
+    def _new_tail(self) -> AlertStore:
+        segments = SegmentReader(self.segments_dir) if self.segments_dir else None
+        return AlertStore(None, segments, seen=self._base_row_exists)
+
+    def _stat_signature(self) -> tuple[int, int] | None:
+        try:
+            stat = (self.directory / "meta.json").stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    @property
+    def version(self) -> str:
+        signature = self._signature
+        version = "missing" if signature is None else f"{signature[0]}-{signature[1]}"
+        return f"{version}+{self.tail.version}"
+
+    @property
+    def base_version(self) -> str:
+        """Changes when the columns are re-opened; rows only grow until then."""
+        signature = self._signature
+        version = "missing" if signature is None else f"{signature[0]}-{signature[1]}"
+        return f"{version}+{self.tail.base_version}"
+
+    def refresh(self):
+        """Re-open the column files if meta.json was rewritten, then tail segments."""
+        signature = self._stat_signature()
+        if signature != self._signature or self._columns is None:
+            with self._lock:
+                signature = self._stat_signature()
+                if signature != self._signature or self._columns is None:
+                    if signature is None:
+                        self._columns = AlertColumns.from_records([])
+                        self._id_order = np.zeros(0, dtype=np.int64)
+                    else:
+                        with tracer.start_as_current_span("store.open_columns"):
+                            self._columns, self._id_order = load_columns(self.directory)
+                    self._signature = signature
+                    self._merged = None
+                    # Compaction may have folded segments into the columns
+                    self.tail = self._new_tail()
+        self.tail.refresh()
+
+    def _base_row(self, alert_id: str) -> int | None:
+        columns, order = self._columns, self._id_order
+        if columns is None or order is None:
+            return None
+        # Binary search over the sorted id permutation stored with the columns
+        pos = bisect.bisect_left(
+            range(len(order)), alert_id, key=lambda i: columns.ids[order[i]]
+        )
+        if pos < len(order) and columns.ids[order[pos]] == alert_id:
+            return int(order[pos])
+        return None
+
+    def _base_row_exists(self, alert_id: str) -> bool:
+        return self._base_row(alert_id) is not None
+
+    def columns(self) -> AlertColumns:
+        """
+        The base columns, memory-mapped. Once alerts have been appended the
+        view is merged with the tail and cached per version.
+        """
+        self.refresh()
+        assert self._columns is not None
+        if not self.tail.records:
+            return self._columns
+        version = self.version
+        if self._merged is None or self._merged[0] != version:
+            self._merged = (version, self._columns.concat(self.tail.columns()))
+        return self._merged[1]
+
+    def get(self, alert_id: str) -> dict[str, Any] | None:
+        self.refresh()
+        assert self._columns is not None
+        row = self._base_row(alert_id)
+        if row is not None:
+            return self._columns.record(row)
+        return self.tail.get(alert_id)
+
+    def for_resource(self, resource_id: str) -> list[dict[str, Any]]:
+        self.refresh()
+        assert self._columns is not None
+        rows = np.flatnonzero(self._columns.resource_id.mask(resource_id))
+        return [self._columns.record(int(row)) for row in rows] + list(
+            self.tail.for_resource(resource_id)
+        )
+
+    def _query_base(
+        self,
+        where: dict[str, Any],
+        resource_prefix: str | None,
+        since: str | None,
+        until: str | None,
+        sort: list[str] | None,
+    ) -> np.ndarray:
+        """Matching base rows, in sort order."""
+        columns = self._columns
+        assert columns is not None
+        mask = np.ones(len(columns), dtype=bool)
+        for field, value in where.items():
+            if value in (None, ""):
+                continue
+            if field not in ("severity", "status", "resource_id", "description"):
+                raise ValueError(f"Cannot filter on {field}")
+            mask &= getattr(columns, field).mask(value)
+        if resource_prefix:
+            mask &= columns.resource_id.prefix_mask(resource_prefix)
+        if since:
+            mask &= columns.created_at >= to_epoch([since])[0]
+        if until:
+            mask &= columns.created_at < to_epoch([until])[0]
+        rows = np.flatnonzero(mask)
+
+        if sort:
+            keys = []
+            for key in sort:
+                column = columns.sort_column(key.lstrip("+-"))
+                if column is None:
+                    raise ValueError(f"Cannot sort on {key.lstrip('+-')}")
+                values = np.asarray(column[rows])
+                if key.startswith("-"):
+                    # Descending: rank the values and negate the ranks
+                    values = -np.unique(values, return_inverse=True)[1]
+                keys.append(values)
+            # lexsort treats its last key as the primary one
+            rows = rows[np.lexsort(keys[::-1])]
+        return rows
+
+    def query(
+        self,
+        where: dict[str, Any] | None = None,
+        resource_prefix: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        fields: list[str] | None = None,
+        sort: list[str] | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+    ) -> tuple[list[dict[str, Any]], int, str | None]:
+        """Same contract as JSONFileStore.query, evaluated with column masks."""
+        self.refresh()
+        assert self._columns is not None
+        where = where or {}
+        offset = decode_cursor(cursor)
+        limit = max(1, limit)
+
+        rows = self._query_base(where, resource_prefix, since, until, sort)
+        matches = [self._columns.record(int(r)) for r in rows[: offset + limit]]
+        total = len(rows)
+        if self.tail.records:
+            # The first offset+limit rows overall come from the first
+            # offset+limit rows of each source
+            tail_page, tail_total, _ = self.tail.query(
+                where, resource_prefix, since, until, None, sort, offset + limit
+            )
+            matches += tail_page
+            total += tail_total
+            sort_records(matches, sort)
+
+        page = [project(r, fields) for r in matches[offset : offset + limit]]
+        next_cursor = encode_cursor(offset + limit) if offset + limit < total else None
+        return page, total, next_cursor
+
+
+class ConfigStore(JSONFileStore):
+    """Resource configs indexed by full resource ID and by ID path segments."""
+
+    key_field = "resource_id"
+    indexed_fields = ("type", "location", "compliance_status")
+
+    def __init__(self, path: Path):
+        super().__init__(path)
+        self._tree: ResourceTrie | None = None
+
+    @property
+    def by_resource_id(self) -> dict[str, dict[str, Any]]:
+        return self.by_key
+
+    def _reset(self):
+        super()._reset()
+        self._tree = None
+
+    def _on_add(self, records: list[dict[str, Any]]):
+        if self._tree is not None:
+            for config in records:
+                self._tree.add(config["resource_id"])
+
+    @property
+    def tree(self) -> ResourceTrie:
+        """Resource-ID trie over the configs, built lazily and extended on append."""
+        self.refresh()
+        tree = self._tree
+        if tree is None:
+            with self._lock:
+                if self._tree is None:
+                    tree = ResourceTrie()
+                    for config in self.records:
+                        tree.add(config["resource_id"])
+                    self._tree = tree
+                tree = self._tree
+        return tree
+
+    def get(self, resource_id: str) -> dict[str, Any] | None:
+        """
+        Look up a config by full resource ID, falling back to a short name or
+        partial path. Ambiguous names match nothing; see resolve.
+        """
+        self.refresh()
+        config = self.by_resource_id.get(resource_id)
+        if config is not None:
+            return config
+        matches, total = self.tree.resolve(resource_id, limit=1)
+        return self.by_resource_id[matches[0]] if total == 1 else None
+
+    def resolve(self, name: str, limit: int = 10) -> tuple[list[dict[str, Any]], int]:
+        """Configs matching a full ID, short name or partial path, and the total."""
+        matches, total = self.tree.resolve(name, limit)
+        return [self.by_resource_id[r] for r in matches], total
+
+    def subtree(
+        self,
+        scope: str = "",
+        resource_type: str = "",
+        fields: list[str] | None = None,
+        limit: int = 50,
+        cursor: str | None = None,
+    ) -> tuple[list[dict[str, Any]], int, str | None]:
+        """
+        Page through the configs under a scope (subscription, resource group
+        or any leading part of a resource ID), optionally of one type.
+        """
+        offset = decode_cursor(cursor)
+        limit = max(1, limit)
+        matches, total = self.tree.subtree(scope, resource_type, offset, limit)
+        page = [project(self.by_resource_id[r], fields) for r in matches]
+        next_cursor = encode_cursor(offset + limit) if offset + limit < total else None
+        return page, total, next_cursor
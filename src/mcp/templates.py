@@ -0,0 +1,212 @@
+import json
+import re
+import threading
+from pathlib import Path
+from typing import Any
+
+MANIFEST_FILE = "templates.json"
+
+# {{name}} or {{name|default}}
+PLACEHOLDER = re.compile(r"\{\{\s*(\w+)\s*(?:\|([^}]*))?\}\}")
+# Bicep parameter declaration, with or without a default value
+BICEP_PARAM = re.compile(r"^(param\s+(\w+)\s+\w+)(\s*=.*)?$", re.MULTILINE)
+
+
+# Boundaries inside camel-case words: highCPU, HighCPU, SQLDatabase
+CAMEL_BOUNDARY = re.compile(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])")
+
+
+def tokenize(text: str) -> set[str]:
+    """
+    Split text into lowercase word tokens for keyword matching. Camel-case
+    words give both the whole word and its parts, so 'virtualMachines'
+    matches 'virtualmachine' and 'SQLDatabase' matches 'sql' and
+    'database'. A trailing plural 's' is dropped.
+    """
+    tokens = set()
+    words = re.split(r"[^a-z0-9]+", f"{text} {CAMEL_BOUNDARY.sub(' ', text)}".lower())
+    for token in words:
+        if len(token) > 3 and token.endswith("s"):
+            token = token[:-1]
+        if token:
+            tokens.add(token)
+    return tokens
+
+
+def render(body: str, template_format: str, params: dict[str, str]) -> str:
+    """Fill in {{name|default}} placeholders and, for Bicep, param defaults."""
+
+    def placeholder(match: re.Match) -> str:
+        name, default = match.group(1), match.group(2)
+        if name in params:
+            return params[name]
+        # Leave unknown placeholders without a default visible
+        return default if default is not None else match.group(0)
+
+    body = PLACEHOLDER.sub(placeholder, body)
+    if template_format == "bicep" and params:
+
+        def bicep_param(match: re.Match) -> str:
+            if match.group(2) not in params:
+                return match.group(0)
+            value = params[match.group(2)].replace("'", "\\'")
+            return f"{match.group(1)} = '{value}'"
+
+        body = BICEP_PARAM.sub(bicep_param, body)
+    return body
+
+
+class Template:
+    """One fix template and its metadata from the manifest."""
+
+    def __init__(self, entry: dict[str, Any], directory: Path, priority: int):
+        self.name: str = entry.get("name") or Path(entry["file"]).stem
+        self.path = directory / entry["file"]
+        self.format: str = entry.get("format") or self.path.suffix.lstrip(".")
+        self.description: str = entry.get("description", "")
+        self.keywords = {k for kw in entry.get("keywords", []) for k in tokenize(kw)}
+        self.resource_types = {
+            k for rt in entry.get("resource_types", []) for k in tokenize(rt)
+        }
+        # "all": needs a keyword and a resource type hit; "any": either one
+        self.match: str = entry.get("match", "all")
+        self.params: list[str] = entry.get("params", [])
+        self.priority = priority
+
+    def score(self, issue_hits: int, resource_hits: int) -> int:
+        """Match score, or 0 if the template does not apply."""
+        if self.match == "any":
+            matched = issue_hits > 0 or resource_hits > 0
+        else:
+            matched = (issue_hits > 0 or not self.keywords) and (
+                resource_hits > 0 or not self.resource_types
+            )
+        return 2 * issue_hits + resource_hits if matched else 0
+
+
+class TemplateRegistry:
+    """
+    Fix templates indexed by issue keyword and resource type.
+    The manifest is re-read only when it changes, and template bodies are
+    kept in memory until their file's mtime changes.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.templates: dict[str, Template] = {}
+        self.by_keyword: dict[str, list[Template]] = {}
+        self.by_resource_type: dict[str, list[Template]] = {}
+        self._bodies: dict[str, tuple[int, str]] = {}
+        self._signature: int | None = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _stat_signature(self) -> int | None:
+        try:
+            return (self.directory / MANIFEST_FILE).stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def refresh(self) -> None:
+        """Rebuild the indexes if the manifest changed."""
+        signature = self._stat_signature()
+        if signature == self._signature and self._loaded:
+            return
+        with self._lock:
+            signature = self._stat_signature()
+            if signature == self._signature and self._loaded:
+                return
+            entries = []
+            if signature is not None:
+                entries = json.loads((self.directory / MANIFEST_FILE).read_text())
+
+            templates: dict[str, Template] = {}
+            by_keyword: dict[str, list[Template]] = {}
+            by_resource_type: dict[str, list[Template]] = {}
+            for priority, entry in enumerate(entries):
+                template = Template(entry, self.directory, priority)
+                templates[template.name] = template
+                for keyword in template.keywords:
+                    by_keyword.setdefault(keyword, []).append(template)
+                for resource_type in template.resource_types:
+                    by_resource_type.setdefault(resource_type, []).append(template)
+
+            self.templates = templates
+            self.by_keyword = by_keyword
+            self.by_resource_type = by_resource_type
+            self._bodies = {}
+            self._signature = signature
+            self._loaded = True
+
+    @property
+    def version(self) -> str:
+        """Token that changes when the manifest or any template file changes."""
+        self.refresh()
+        parts = [str(self._signature)]
+        for template in self.templates.values():
+            try:
+                parts.append(str(template.path.stat().st_mtime_ns))
+            except FileNotFoundError:
+                parts.append("missing")
+        return "-".join(parts)
+
+    def match(self, issue_type: str, resource_type: str) -> Template | None:
+        """Best template for an issue and resource type, or None."""
+        self.refresh()
+        issue_hits: dict[str, int] = {}
+        resource_hits: dict[str, int] = {}
+        candidates: dict[str, Template] = {}
+        for token in tokenize(issue_type):
+            for template in self.by_keyword.get(token, []):
+                issue_hits[template.name] = issue_hits.get(template.name, 0) + 1
+                candidates[template.name] = template
+        # Resource types are also matched with spaces removed ("virtual machine")
+        resource_tokens = tokenize(resource_type) | tokenize(
+            resource_type.replace(" ", "")
+        )
+        for token in resource_tokens:
+            for template in self.by_resource_type.get(token, []):
+                resource_hits[template.name] = resource_hits.get(template.name, 0) + 1
+                candidates[template.name] = template
+
+        # Sides without a token hit fall back to substrings, as in "highcpu",
+        # "azurevm" or "vmss"
+        issue = re.sub(r"[^a-z0-9]", "", issue_type.lower())
+        resource = re.sub(r"[^a-z0-9]", "", resource_type.lower())
+        for name, template in self.templates.items():
+            if not issue_hits.get(name):
+                issue_hits[name] = sum(1 for k in template.keywords if k in issue)
+            if not resource_hits.get(name):
+                resource_hits[name] = sum(
+                    1 for k in template.resource_types if k in resource
+                )
+            if issue_hits[name] or resource_hits[name]:
+                candidates[name] = template
+
+        best: Template | None = None
+        best_key = (0, 0)
+        for name, template in candidates.items():
+            score = template.score(issue_hits.get(name, 0), resource_hits.get(name, 0))
+            # Higher score wins; ties go to the template listed first
+            key = (score, -template.priority)
+            if score > 0 and (best is None or key > best_key):
+                best, best_key = template, key
+        return best
+
+    def body(self, template: Template) -> str | None:
+        """Template text, cached until the file changes."""
+        try:
+            mtime = template.path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+        cached = self._bodies.get(template.name)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, template.path.read_text())
+            self._bodies[template.name] = cached
+        return cached[1]
+
+    def render(self, template: Template, params: dict[str, str]) -> str | None:
+        body = self.body(template)
+        if body is None:
+            return None
+        return render(body, template.format, params)
@@ -0,0 +1,44 @@
+import os
+
+from fastmcp.server.middleware import Middleware, MiddlewareContext
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+tracer = trace.get_tracer("azure-ops-copilot.mcp")
+
+
+def setup_tracing():
+    """Export spans over OTLP/HTTP when OTEL_EXPORTER_OTLP_ENDPOINT is set."""
+    if not os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT"):
+        return
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+        OTLPSpanExporter,
+    )
+
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": "azure-ops-copilot-mcp"})
+    )
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+    trace.set_tracer_provider(provider)
+
+
+class TracingMiddleware(Middleware):
+    """
+    Wrap every tool call in a span, continuing the caller's trace from the
+    traceparent the backend puts in the request metadata.
+    """
+
+    async def on_call_tool(self, context: MiddlewareContext, call_next):
+        ctx = context.fastmcp_context
+        request = ctx.request_context if ctx is not None else None
+        meta = request.meta if request is not None else None
+        carrier = meta.model_dump() if meta is not None else {}
+        with tracer.start_as_current_span(
+            f"tool {context.message.name}",
+            context=propagate.extract(carrier),
+            kind=trace.SpanKind.SERVER,
+            attributes={"mcp.tool": context.message.name},
+        ):
+            return await call_next(context)
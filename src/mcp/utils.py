@@ -1,26 +1,103 @@
 import json
+import os
 from pathlib import Path
 
+import numpy as np
+from aggregate import GROUP_COLUMNS, summarize_alerts
+from columns import to_epoch
+from correlate import IncidentIndex, correlate, group_by_scope
+from ingest import SegmentLog, SegmentReader, normalize_alert
+from policy import PolicyEngine
+from result_cache import ResultCache
+from store import (
+    AlertStore,
+    ColumnarAlertStore,
+    ConfigStore,
+    decode_cursor,
+    encode_cursor,
+)
+from templates import TemplateRegistry
+
 # Constants
-DATA_DIR = Path(__file__).parent.parent.parent / "data"
+DATA_DIR = Path(
+    os.getenv("COPILOT_DATA_DIR", Path(__file__).parent.parent.parent / "data")
+)
 LOGS_FILE = DATA_DIR / "logs.json"
+# Optional columnar copy of the logs (see scripts/convert_logs.py)
+LOGS_COLUMNS_DIR = DATA_DIR / "logs.columns"
+# Append-only segment log for streamed alerts
+ALERT_SEGMENTS_DIR = DATA_DIR / "alerts"
 CONFIGS_FILE = DATA_DIR / "configs.json"
 TEMPLATES_DIR = DATA_DIR / "templates"
+# Compliance rules evaluated over the configs
+POLICIES_FILE = DATA_DIR / "policies.json"
+
+# Shared in-memory stores, reloaded only when the files change
+alert_store: AlertStore | ColumnarAlertStore = (
+    ColumnarAlertStore(LOGS_COLUMNS_DIR, ALERT_SEGMENTS_DIR)
+    if LOGS_COLUMNS_DIR.exists()
+    else AlertStore(LOGS_FILE, SegmentReader(ALERT_SEGMENTS_DIR))
+)
+alert_log = SegmentLog(ALERT_SEGMENTS_DIR)
+config_store = ConfigStore(CONFIGS_FILE)
+template_registry = TemplateRegistry(TEMPLATES_DIR)
+# Alerts collapsed into incidents, extended as new alerts arrive
+incident_index = IncidentIndex()
+policy_engine = PolicyEngine(POLICIES_FILE)
+
+# Upper bound on rows returned by a single query page
+MAX_QUERY_LIMIT = 500
+
+# Results of the pure lookup tools, invalidated when their data changes
+result_cache = ResultCache(
+    max_entries=int(os.getenv("TOOL_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("TOOL_CACHE_TTL", "300")),
+)
+
+
+def alerts_version() -> str:
+    alert_store.refresh()
+    return alert_store.version
+
 
+def configs_version() -> str:
+    config_store.refresh()
+    return config_store.version
 
+
+def templates_version() -> str:
+    return template_registry.version
+
+
+def split_csv(value: str) -> list[str]:
+    """Split a comma-separated tool argument into its non-empty parts."""
+    return [part.strip() for part in value.split(",") if part.strip()]
+
+
+def format_page(page: list[dict], total: int, next_cursor: str | None) -> str:
+    """
+    Render a query page as compact JSON lines: a header line with the total
+    and the next cursor, then one line per record.
+    """
+    header = {"total": total, "returned": len(page), "next_cursor": next_cursor}
+    lines = [json.dumps(header, separators=(",", ":"))]
+    lines.extend(json.dumps(r, separators=(",", ":")) for r in page)
+    return "\n".join(lines)
+
+
+@result_cache.cached(alerts_version)
 def analyze_alert_logic(alert_id: str) -> str:
     """
     Analyze an Azure Monitor alert by ID.
     Returns the alert details and potential root cause.
     """
     try:
-        if not LOGS_FILE.exists():
+        if not any(
+            p.exists() for p in (LOGS_FILE, LOGS_COLUMNS_DIR, ALERT_SEGMENTS_DIR)
+        ):
             return "Error: Logs file not found."
 
-        with open(LOGS_FILE, "r") as f:
-            logs = json.load(f)
-
-        alert = next((log for log in logs if log["id"] == alert_id), None)
+        alert = alert_store.get(alert_id)
         if not alert:
             return f"Error: Alert {alert_id} not found."
 
@@ -29,6 +106,7 @@ def analyze_alert_logic(alert_id: str) -> str:
         return f"Error analyzing alert: {str(e)}"
 
 
+@result_cache.cached(configs_version)
 def get_resource_config_logic(resource_id: str) -> str:
     """
     Get the configuration of an Azure resource.
@@ -38,48 +116,536 @@ def get_resource_config_logic(resource_id: str) -> str:
         if not CONFIGS_FILE.exists():
             return "Error: Configs file not found."
 
-        with open(CONFIGS_FILE, "r") as f:
-            configs = json.load(f)
+        # Exact match first, then short names and partial paths
+        configs, total = config_store.resolve(resource_id, limit=10)
+        if total == 0:
+            return f"Error: Resource {resource_id} not found."
+        if total > 1:
+            candidates = ", ".join(c["resource_id"] for c in configs)
+            return (
+                f"Error: Resource {resource_id} is ambiguous ({total} matches: "
+                f"{candidates}). Use the full resource ID."
+            )
 
-        # Try exact match first
-        config = next((c for c in configs if c["resource_id"] == resource_id), None)
+        return json.dumps(configs[0], separators=(",", ":"))
+    except Exception as e:
+        return f"Error reading config: {str(e)}"
 
-        # If no exact match, try matching the end of the resource_id (for short names)
-        if not config:
-            config = next(
-                (c for c in configs if c["resource_id"].endswith(f"/{resource_id}")),
-                None,
+
+def analyze_alerts_logic(
+    alert_ids: str = "",
+    severity: str = "",
+    status: str = "",
+    resource_prefix: str = "",
+    since: str = "",
+    until: str = "",
+    limit: int = 20,
+) -> str:
+    """
+    Analyze many alerts in one pass, by comma-separated IDs or by filter.
+    Alerts are grouped under their resource, so each linked config is
+    returned once. Returns compact JSON lines.
+    """
+    try:
+        ids = split_csv(alert_ids)
+        missing = []
+        if ids:
+            alerts = []
+            for alert_id in ids[:MAX_QUERY_LIMIT]:
+                alert = alert_store.get(alert_id)
+                if alert:
+                    alerts.append(alert)
+                else:
+                    missing.append(alert_id)
+            total = len(ids)
+        else:
+            alerts, total, _ = alert_store.query(
+                where={"severity": severity, "status": status},
+                resource_prefix=resource_prefix or None,
+                since=since or None,
+                until=until or None,
+                sort=["-created_at"],
+                limit=min(limit, MAX_QUERY_LIMIT),
             )
 
-        if not config:
-            return f"Error: Resource {resource_id} not found."
+        by_resource: dict[str, dict] = {}
+        for alert in alerts:
+            resource_id = alert["resource_id"]
+            if resource_id not in by_resource:
+                config = config_store.get(resource_id) or {}
+                by_resource[resource_id] = {
+                    "resource_id": resource_id,
+                    "type": config.get("type"),
+                    "location": config.get("location"),
+                    "compliance_status": config.get("compliance_status"),
+                    "properties": config.get("properties"),
+                    "alerts": [],
+                }
+            properties = alert.get("properties") or {}
+            by_resource[resource_id]["alerts"].append(
+                {
+                    "id": alert["id"],
+                    "severity": alert["severity"],
+                    "status": alert.get("status"),
+                    "description": alert["description"],
+                    "created_at": alert.get("created_at"),
+                    "metric_value": properties.get("metric_value"),
+                    "threshold": properties.get("threshold"),
+                }
+            )
 
-        return json.dumps(config, indent=2)
+        header = {
+            "total": total,
+            "returned": len(alerts),
+            "resources": len(by_resource),
+            "missing": missing,
+        }
+        lines = [json.dumps(header, separators=(",", ":"))]
+        lines.extend(json.dumps(r, separators=(",", ":")) for r in by_resource.values())
+        return "\n".join(lines)
     except Exception as e:
-        return f"Error reading config: {str(e)}"
+        return f"Error analyzing alerts: {str(e)}"
+
 
+def parse_params(params: str) -> dict[str, str]:
+    """Parse 'name=value,name2=value2' into a dict."""
+    parsed = {}
+    for pair in split_csv(params):
+        name, sep, value = pair.partition("=")
+        if not sep:
+            raise ValueError(f"Invalid parameter '{pair}', expected name=value")
+        parsed[name.strip()] = value.strip()
+    return parsed
 
-def generate_fix_logic(issue_type: str, resource_type: str) -> str:
+
+@result_cache.cached(templates_version)
+def generate_fix_logic(issue_type: str, resource_type: str, params: str = "") -> str:
     """
     Generate a fix for a specific issue type and resource type.
-    Returns a Bicep or CLI snippet.
-    """
-    # Normalize inputs for better matching
-    issue_lower = issue_type.lower()
-    resource_lower = resource_type.lower().replace(" ", "")
-
-    # VM CPU/Performance issues
-    if "cpu" in issue_lower and (
-        "vm" in resource_lower or "virtualmachine" in resource_lower
-    ):
-        template_path = TEMPLATES_DIR / "vm_resize.bicep"
-        if template_path.exists():
-            return template_path.read_text()
-
-    # SQL Database issues
-    if "dtu" in issue_lower or "sql" in issue_lower or "database" in resource_lower:
-        template_path = TEMPLATES_DIR / "sql_scale.sh"
-        if template_path.exists():
-            return template_path.read_text()
-
-    return "No specific fix template found for this issue. Please investigate manually."
+    Returns a Bicep or CLI snippet, rendered with the given parameters.
+    """
+    try:
+        template = template_registry.match(issue_type, resource_type)
+        if template is not None:
+            fix = template_registry.render(template, parse_params(params))
+            if fix is not None:
+                return fix
+
+        return "No specific fix template found for this issue. Please investigate manually."
+    except Exception as e:
+        return f"Error generating fix: {str(e)}"
+
+
+def query_logs_logic(
+    severity: str = "",
+    status: str = "",
+    resource_prefix: str = "",
+    since: str = "",
+    until: str = "",
+    fields: str = "",
+    sort: str = "-created_at",
+    limit: int = 50,
+    cursor: str = "",
+) -> str:
+    """
+    Query alerts with filters, a field projection, sort keys and paging.
+    Returns compact JSON lines.
+    """
+    try:
+        page, total, next_cursor = alert_store.query(
+            where={"severity": severity, "status": status},
+            resource_prefix=resource_prefix or None,
+            since=since or None,
+            until=until or None,
+            fields=split_csv(fields),
+            sort=split_csv(sort),
+            limit=min(limit, MAX_QUERY_LIMIT),
+            cursor=cursor or None,
+        )
+        return format_page(page, total, next_cursor)
+    except Exception as e:
+        return f"Error querying logs: {str(e)}"
+
+
+def query_resource_configs_logic(
+    resource_type: str = "",
+    location: str = "",
+    compliance_status: str = "",
+    resource_prefix: str = "",
+    fields: str = "",
+    sort: str = "resource_id",
+    limit: int = 50,
+    cursor: str = "",
+) -> str:
+    """
+    Query resource configs with filters, a field projection, sort keys and
+    paging. Returns compact JSON lines.
+    """
+    try:
+        page, total, next_cursor = config_store.query(
+            where={
+                "type": resource_type,
+                "location": location,
+                "compliance_status": compliance_status,
+            },
+            resource_prefix=resource_prefix or None,
+            fields=split_csv(fields),
+            sort=split_csv(sort),
+            limit=min(limit, MAX_QUERY_LIMIT),
+            cursor=cursor or None,
+        )
+        return format_page(page, total, next_cursor)
+    except Exception as e:
+        return f"Error querying configs: {str(e)}"
+
+
+def list_resources_logic(
+    scope: str = "",
+    resource_type: str = "",
+    fields: str = "",
+    limit: int = 50,
+    cursor: str = "",
+) -> str:
+    """
+    List the resource configs under a subscription, resource group or any
+    leading part of a resource ID, optionally of one type.
+    Returns compact JSON lines.
+    """
+    try:
+        page, total, next_cursor = config_store.subtree(
+            scope,
+            resource_type,
+            fields=split_csv(fields),
+            limit=min(limit, MAX_QUERY_LIMIT),
+            cursor=cursor or None,
+        )
+        return format_page(page, total, next_cursor)
+    except Exception as e:
+        return f"Error listing resources: {str(e)}"
+
+
+def get_resource_alerts_logic(
+    resource: str,
+    severity: str = "",
+    status: str = "",
+    since: str = "",
+    until: str = "",
+    alerts_per_resource: int = 3,
+    limit: int = 20,
+) -> str:
+    """
+    Join resources to their alerts. `resource` is a full ID, a short name,
+    a partial path or a scope such as a resource group; every resource it
+    matches is joined. Returns compact JSON lines.
+    """
+    try:
+        if not resource:
+            return "Error: resource is required."
+        configs, total = config_store.resolve(resource, limit=MAX_QUERY_LIMIT)
+        if total == 0:
+            configs, total, _ = config_store.subtree(resource, limit=MAX_QUERY_LIMIT)
+        # Resources with alerts but no config can still be joined by full ID
+        resource_ids = [c["resource_id"] for c in configs] or [resource]
+
+        columns = alert_store.columns()
+        codes = [columns.resource_id.code_of(r) for r in resource_ids]
+        mask = np.isin(columns.resource_id.codes, [c for c in codes if c >= 0])
+        if severity:
+            mask &= columns.severity.mask(severity)
+        if status:
+            mask &= columns.status.mask(status)
+        if since:
+            mask &= columns.created_at >= to_epoch([since])[0]
+        if until:
+            mask &= columns.created_at < to_epoch([until])[0]
+        rows = np.flatnonzero(mask)
+        header = {
+            "resources": total,
+            "joined": len(resource_ids),
+            "with_alerts": 0,
+            "alerts": len(rows),
+            "returned": 0,
+        }
+        if len(rows) == 0:
+            return json.dumps(header, separators=(",", ":"))
+
+        # Group rows by resource, newest first within each resource
+        resource_codes = columns.resource_id.codes[rows]
+        rows = rows[np.lexsort((-columns.created_at[rows], resource_codes))]
+        resource_codes = columns.resource_id.codes[rows]
+        starts = np.flatnonzero(np.r_[True, resource_codes[1:] != resource_codes[:-1]])
+        ends = np.r_[starts[1:], len(rows)]
+        closed = columns.status.code_of("Closed")
+        not_closed = columns.status.codes[rows] != closed
+
+        lines = []
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            resource_id = columns.resource_id.values[resource_codes[start]]
+            config = config_store.get(resource_id) or {}
+            latest = []
+            for row in rows[start : min(end, start + alerts_per_resource)]:
+                alert = columns.record(int(row))
+                latest.append(
+                    {
+                        k: alert[k]
+                        for k in (
+                            "id",
+                            "severity",
+                            "status",
+                            "description",
+                            "created_at",
+                        )
+                    }
+                )
+            lines.append(
+                {
+                    "resource_id": resource_id,
+                    "type": config.get("type"),
+                    "location": config.get("location"),
+                    "compliance_status": config.get("compliance_status"),
+                    "alerts": end - start,
+                    "open": int(not_closed[start:end].sum()),
+                    "latest": latest,
+                }
+            )
+        lines.sort(key=lambda line: -line["alerts"])
+
+        header["with_alerts"] = len(lines)
+        header["returned"] = min(len(lines), limit)
+        return "\n".join(
+            json.dumps(line, separators=(",", ":"))
+            for line in [header] + lines[: max(0, limit)]
+        )
+    except Exception as e:
+        return f"Error joining resource alerts: {str(e)}"
+
+
+def evaluate_policies(
+    rule: str = "", resource_type: str = "", scope: str = ""
+) -> tuple[list[int], np.ndarray]:
+    """
+    Bring the policy results up to date with the configs and select rules
+    by name and resources by type and scope.
+    """
+    version = configs_version()
+    policy_engine.update(config_store.records, version)
+    rules, mask = policy_engine.select(rule, resource_type)
+    if rule and not rules:
+        raise ValueError(
+            f"Unknown rule {rule}. Use any of: "
+            + ", ".join(r.name for r in policy_engine.rules)
+        )
+    if scope:
+        resource_ids, _ = config_store.tree.subtree(scope, limit=len(mask))
+        in_scope = np.zeros(len(mask), dtype=bool)
+        in_scope[[policy_engine.rows[r] for r in resource_ids]] = True
+        mask &= in_scope
+    return rules, mask
+
+
+def evaluate_compliance_logic(
+    scope: str = "", resource_type: str = "", rule: str = ""
+) -> str:
+    """
+    Evaluate the compliance rules over all resource configs (or a scope,
+    type or single rule) and report violation counts per rule.
+    """
+    try:
+        if not POLICIES_FILE.exists():
+            return "Error: Policies file not found."
+        rules, mask = evaluate_policies(rule, resource_type, scope)
+        applies = policy_engine.applies[rules][:, mask]
+        violations = policy_engine.violations[rules][:, mask]
+        non_compliant = int(violations.any(axis=0).sum())
+        evaluated = int(applies.any(axis=0).sum())
+        header = {
+            "resources": int(mask.sum()),
+            "evaluated": evaluated,
+            "compliant": evaluated - non_compliant,
+            "non_compliant": non_compliant,
+            "rules": len(rules),
+            "reevaluated": policy_engine.reevaluated,
+        }
+        lines = [header]
+        for i, index in enumerate(rules):
+            lines.append(
+                policy_engine.rules[index].to_dict()
+                | {
+                    "applies_to": int(applies[i].sum()),
+                    "violations": int(violations[i].sum()),
+                }
+            )
+        return "\n".join(json.dumps(line, separators=(",", ":")) for line in lines)
+    except Exception as e:
+        return f"Error evaluating compliance: {str(e)}"
+
+
+def list_violations_logic(
+    rule: str = "",
+    resource_type: str = "",
+    severity: str = "",
+    scope: str = "",
+    limit: int = 50,
+    cursor: str = "",
+) -> str:
+    """
+    List the (resource, rule) pairs that fail a compliance rule, with the
+    expected and actual values. Returns compact JSON lines.
+    """
+    try:
+        if not POLICIES_FILE.exists():
+            return "Error: Policies file not found."
+        rules, mask = evaluate_policies(rule, resource_type, scope)
+        if severity:
+            rules = [i for i in rules if policy_engine.rules[i].severity == severity]
+        violations = policy_engine.violations[rules] & mask
+        # Rule by rule, in manifest order
+        rule_rows, rows = np.nonzero(violations)
+        offset = decode_cursor(cursor or None)
+        limit = max(1, min(limit, MAX_QUERY_LIMIT))
+
+        page = []
+        for i, row in zip(
+            rule_rows[offset : offset + limit].tolist(),
+            rows[offset : offset + limit].tolist(),
+        ):
+            policy = policy_engine.rules[rules[i]]
+            page.append(
+                {
+                    "resource_id": policy_engine.resource_ids[row],
+                    "rule": policy.name,
+                    "severity": policy.severity,
+                    "field": policy.field,
+                    "expected": policy.expected(),
+                    "actual": policy_engine.fields[policy.field].value(row),
+                }
+            )
+        total = len(rows)
+        next_cursor = encode_cursor(offset + limit) if offset + limit < total else None
+        return format_page(page, total, next_cursor)
+    except Exception as e:
+        return f"Error listing violations: {str(e)}"
+
+
+def summarize_alerts_logic(
+    group_by: str = "severity",
+    bucket: str = "",
+    top_n: int = 5,
+    severity: str = "",
+    status: str = "",
+    since: str = "",
+    until: str = "",
+) -> str:
+    """
+    Aggregate alerts server-side: counts per group, optional time buckets,
+    the noisiest resources and metric_value percentiles against threshold.
+    """
+    try:
+        groups = split_csv(group_by)
+        unknown = [g for g in groups if g not in GROUP_COLUMNS]
+        if unknown:
+            return (
+                f"Error: Cannot group by {', '.join(unknown)}. "
+                f"Use any of: {', '.join(GROUP_COLUMNS)}."
+            )
+
+        columns = alert_store.columns()
+        mask = np.ones(len(columns), dtype=bool)
+        if severity:
+            mask &= columns.severity.mask(severity)
+        if status:
+            mask &= columns.status.mask(status)
+        if since:
+            mask &= columns.created_at >= to_epoch([since])[0]
+        if until:
+            mask &= columns.created_at < to_epoch([until])[0]
+
+        return summarize_alerts(columns, mask, groups, bucket, top_n)
+    except Exception as e:
+        return f"Error summarizing alerts: {str(e)}"
+
+
+def list_incidents_logic(
+    severity: str = "",
+    status: str = "",
+    resource_prefix: str = "",
+    since: str = "",
+    until: str = "",
+    min_count: int = 1,
+    limit: int = 20,
+) -> str:
+    """
+    Collapse alerts sharing (resource_id, description, severity) into
+    incidents, grouped by resource group, most frequent first.
+    Without status or time filters this reads the incremental incident
+    index; otherwise the matching alerts are correlated on the fly.
+    """
+    try:
+        # Read the base version first: if the store reloads in between, the
+        # index sees a stale version next time and rebuilds
+        alert_store.refresh()
+        base_version = alert_store.base_version
+        columns = alert_store.columns()
+        if status or since or until:
+            mask = np.ones(len(columns), dtype=bool)
+            if severity:
+                mask &= columns.severity.mask(severity)
+            if status:
+                mask &= columns.status.mask(status)
+            if resource_prefix:
+                mask &= columns.resource_id.prefix_mask(resource_prefix)
+            if since:
+                mask &= columns.created_at >= to_epoch([since])[0]
+            if until:
+                mask &= columns.created_at < to_epoch([until])[0]
+            incidents = list(correlate(columns, np.flatnonzero(mask)).values())
+        else:
+            incidents = [
+                incident
+                for incident in incident_index.update(columns, base_version).values()
+                if (not severity or incident.severity == severity)
+                and incident.resource_id.startswith(resource_prefix)
+            ]
+
+        incidents = [i for i in incidents if i.count >= min_count]
+        incidents.sort(key=lambda i: (-i.count, -i.last_seen))
+        top = incidents[: min(limit, MAX_QUERY_LIMIT)]
+        groups = group_by_scope(top)
+        header = {
+            "alerts": sum(i.count for i in incidents),
+            "incidents": len(incidents),
+            "returned": len(top),
+            "groups": len(groups),
+        }
+        lines = [json.dumps(header, separators=(",", ":"))]
+        lines.extend(json.dumps(g, separators=(",", ":")) for g in groups)
+        return "\n".join(lines)
+    except Exception as e:
+        return f"Error listing incidents: {str(e)}"
+
+
+def ingest_alerts_logic(alerts: list[dict]) -> str:
+    """
+    Append a batch of alerts to the segment log and index them.
+    Alerts whose id is already known are skipped, so retries are safe.
+    """
+    try:
+        batch = [normalize_alert(alert) for alert in alerts]
+        alert_store.refresh()
+        seen: set[str] = set()
+        new = []
+        for alert in batch:
+            if alert["id"] in seen or alert_store.get(alert["id"]) is not None:
+                continue
+            seen.add(alert["id"])
+            new.append(alert)
+
+        alert_log.append(new)
+        # Tail our own write so the indexes include the batch right away
+        alert_store.refresh()
+        return json.dumps(
+            {"ingested": len(new), "duplicates": len(batch) - len(new)},
+            separators=(",", ":"),
+        )
+    except Exception as e:
+        return f"Error ingesting alerts: {str(e)}"